@@ -1,42 +1,87 @@
-import psycopg2
-from faker import Faker
-import random
+import argparse
+import csv
+import io
+import time
+from psycopg2.pool import ThreadedConnectionPool
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
 from datetime import timedelta
+import batch_generator as bg
 
-fake = Faker()
+DB_PARAMS = {
+    "dbname": "BD2-Project",
+    "user": "postgres",
+    "password": "root",
+    "host": "localhost",
+    "port": "5432"
+}
 
+# Filas construidas y enviadas por cada COPY
+CHUNK_ROWS = 10000
+DEFAULT_SEED = 42
 
-conn = psycopg2.connect(
-    dbname="BD2-Project",
-    user="postgres",
-    password="root",
-    host="localhost",
-    port="5432"
-)
-cur = conn.cursor()
+# Ventanas temporales (equivalentes a date_time_this_year / this_decade de Faker) hasta la fecha
+# de referencia: hoy salvo --seed / --anchor-date (bg.resolve_anchor) o set_anchor()
+def time_windows(anchor):
+    year_start, today = bg.year_range(anchor)
+    return year_start, today, today - timedelta(days=10 * bg.YEAR_DAYS)
 
-def clean_database():
-    print("🧹 Limpiando todas las tablas...")
 
+YEAR_START, TODAY, DECADE_START = time_windows(bg.resolve_anchor())
+
+
+def set_anchor(anchor):
+    global YEAR_START, TODAY, DECADE_START
+    YEAR_START, TODAY, DECADE_START = time_windows(anchor)
+
+# Volúmenes base (--scale 1); los catálogos fijos no escalan
+BASE_VOLUMES = {
+    "app_user": 10000,
+    "advertiser": 500,
+    "campaign": 2000,
+    "video": 100000,
+    "subscription": 20000,
+    "transaction": 50000,
+    "gifttransaction": 20000,
+    "contentreport": 5000,
+}
+
+
+def clean_database(conn):
+    print("🧹 Limpiando todas las tablas...")
+    cur = conn.cursor()
     try:
         cur.execute("SET session_replication_role = replica;")  # Desactiva restricciones FK temporalmente
 
-        # Orden de borrado: desde las tablas más dependientes a las más generales
+        # Orden de borrado: desde las tablas más dependientes a las más generales.
+        # En modo replica tampoco se disparan los triggers ni los ON DELETE CASCADE, así que las
+        # tablas derivadas (campaign_stats, trending_video, feed_celebrity, social_counts) se
+        # vacían explícitamente; al cargar de nuevo, los triggers de sentencia las repueblan.
         tables = [
             'gifttransaction',
             'contentreport',
             'transaction',
+            'campaign_stats',
             'virtualgift',
             'subscription',
             'subscriptionplan',
             'campaign',
             'advertiser',
+            'trending_video',
+            'feed_fanout_queue',
             'video',
+            'social_counts',
             'follow',
+            'feed_celebrity',
             'app_user'
         ]
 
         for table in tables:
+            # Las tablas derivadas solo existen tras aplicar migrations/
+            cur.execute("SELECT to_regclass(%s);", (table,))
+            if cur.fetchone()[0] is None:
+                print(f" - {table} no existe (migración sin aplicar), se omite")
+                continue
             cur.execute(f"DELETE FROM {table};")
             print(f" - {table} vaciada")
 
@@ -47,289 +92,304 @@ def clean_database():
     except Exception as e:
         print("❌ Error limpiando base de datos:", e)
         conn.rollback()
+    finally:
+        cur.close()
+
+
+def copy_rows(cur, table, columns, rows):
+    # CSV en memoria -> COPY FROM STDIN (campo vacío sin comillas = NULL)
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
 
-def generate_users(total=10000):
-    print(f"🔹 Generando {total} usuarios...")
+def chunked(total, build_chunk):
+    for offset in range(0, total, CHUNK_ROWS):
+        yield build_chunk(offset, min(CHUNK_ROWS, total - offset))
+
+
+def fetch_ids(cur, query, params=None):
+    # ORDER BY para que el dataset sea reproducible con el mismo seed
+    cur.execute(query + " ORDER BY 1", params)
+    return [r[0] for r in cur.fetchall()]
+
+# =====================
+# GENERADORES POR TABLA
+# =====================
+
+def generate_users(cur, total, rng, pools):
     roles = ['user'] * 85 + ['creator'] * 10 + ['admin'] * 5
-    try:
-        for i in range(total):
-            role = random.choice(roles)
-            cur.execute("""
-                INSERT INTO app_user (name, last_name, username, email, password_hash, registration_date, profile_pic_url, role, birth_date)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                fake.first_name(),
-                fake.last_name(),
-                f"user{i}_{fake.user_name()}",
-                fake.unique.email(),
-                fake.sha256(),
-                fake.date_time_this_decade(),
-                fake.image_url(),
-                role,
-                fake.date_of_birth(minimum_age=16, maximum_age=40)
-            ))
-            if i % 500 == 0:
-                conn.commit()
-                print(f"> {i} usuarios insertados...")
-        conn.commit()
-    except Exception as e:
-        print("❌ Error generando usuarios:", e)
-        conn.rollback()
+    return chunked(total, lambda offset, n: bg.rows(
+        bg.choice(rng, pools["first_names"], n),
+        bg.choice(rng, pools["last_names"], n),
+        bg.usernames(rng, pools, offset, n),
+        bg.emails(rng, pools, offset, n),
+        bg.hex_digests(rng, n),
+        bg.timestamps(rng, DECADE_START, TODAY, n),
+        np.char.add("https://picsum.photos/seed/", bg.integers(rng, 1, 100000, n).astype(str)),
+        bg.choice(rng, roles, n),
+        bg.birth_dates(rng, n, minimum_age=16, maximum_age=40, today=TODAY.date())
+    ))
 
-def generate_advertisers(n=500):
-    print(f"🔹 Generando {n} advertisers...")
-    try:
-        for i in range(n):
-            cur.execute("""
-                INSERT INTO advertiser (company_name, billing_info)
-                VALUES (%s, %s)
-            """, (
-                fake.company(),
-                fake.address()
-            ))
-        conn.commit()
-    except Exception as e:
-        print("❌ Error en advertisers:", e)
-        conn.rollback()
 
-def generate_campaigns(n=2000):
-    print(f"🔹 Generando {n} campañas...")
-    try:
-        cur.execute("SELECT advertiser_id FROM advertiser")
-        advertisers = [r[0] for r in cur.fetchall()]
-        for i in range(n):
-            adv = random.choice(advertisers)
-            start = fake.date_this_year()
-            end = start + timedelta(days=random.randint(7, 30))
-            cur.execute("""
-                INSERT INTO campaign (advertiser_id, budget, start_date, end_date, targeting_criteria)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                adv,
-                round(random.uniform(100.0, 5000.0), 2),
-                start,
-                end,
-                fake.sentence(nb_words=6)
-            ))
-            if i % 500 == 0:
-                conn.commit()
-                print(f"> {i} campañas insertadas...")
-        conn.commit()
-    except Exception as e:
-        print("❌ Error en campañas:", e)
-        conn.rollback()
+def generate_advertisers(cur, total, rng, pools):
+    return chunked(total, lambda offset, n: bg.rows(
+        bg.choice(rng, pools["companies"], n),
+        bg.choice(rng, pools["addresses"], n)
+    ))
 
-def generate_subscription_plans():
-    print("🔹 Generando planes de suscripción...")
-    try:
-        plans = [
-            ("Starter", 5, 30, "Acceso básico."),
-            ("Pro", 15, 90, "Contenido extendido."),
-            ("Elite", 30, 180, "Experiencia completa.")
-        ]
-        for name, price, duration, desc in plans:
-            cur.execute("""
-                INSERT INTO subscriptionplan (name, price, duration_days, description)
-                VALUES (%s, %s, %s, %s)
-            """, (name, price, duration, desc))
-        conn.commit()
-    except Exception as e:
-        print("❌ Error en subscription plans:", e)
-        conn.rollback()
 
-def generate_videos(n=50000):
-    print(f"🔹 Generando {n} videos...")
-    try:
-        cur.execute('SELECT user_id FROM app_user WHERE role = %s', ('creator',))
-        creators = [r[0] for r in cur.fetchall()]
-        vis = ['public', 'private', 'followers_only']
-        for i in range(n):
-            cur.execute("""
-                INSERT INTO video (creator_id, title, description, duration, upload_datetime, visibility)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                random.choice(creators),
-                fake.sentence(nb_words=6),
-                fake.text(max_nb_chars=200),
-                random.randint(10, 300),
-                fake.date_time_this_year(),
-                random.choice(vis)
-            ))
-            if i % 1000 == 0:
-                conn.commit()
-                print(f"> {i} videos insertados...")
-        conn.commit()
-    except Exception as e:
-        print("❌ Error en videos:", e)
-        conn.rollback()
+def generate_campaigns(cur, total, rng, pools):
+    advertisers = fetch_ids(cur, "SELECT advertiser_id FROM advertiser")
+
+    def build(offset, n):
+        start = bg.dates(rng, YEAR_START, TODAY, n)
+        return bg.rows(
+            bg.choice(rng, advertisers, n),
+            bg.uniform(rng, 100.0, 5000.0, n),
+            start,
+            bg.add_days(start, bg.integers(rng, 7, 30, n)),
+            bg.sentences(rng, pools, n, nb_words=6)
+        )
+    return chunked(total, build)
+
+
+def generate_subscription_plans(cur, total, rng, pools):
+    yield [
+        ("Starter", 5, 30, "Acceso básico."),
+        ("Pro", 15, 90, "Contenido extendido."),
+        ("Elite", 30, 180, "Experiencia completa.")
+    ]
 
-def generate_subscriptions(n=20000):
-    print(f"🔹 Generando {n} suscripciones...")
-    try:
-        cur.execute("SELECT user_id FROM app_user WHERE role = %s", ('user',))
-        subs = [r[0] for r in cur.fetchall()]
-        cur.execute("SELECT user_id FROM app_user WHERE role = %s", ('creator',))
-        creators = [r[0] for r in cur.fetchall()]
-        cur.execute("SELECT plan_id FROM subscriptionplan")
-        plans = [r[0] for r in cur.fetchall()]
-        statuses = ['active', 'cancelled', 'expired']
-        for i in range(n):
-            cur.execute("""
-                INSERT INTO subscription (subscriber_id, creator_id, plan_id, start_date, end_date, status)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                random.choice(subs),
-                random.choice(creators),
-                random.choice(plans),
-                fake.date_this_year(),
-                fake.date_this_year(),
-                random.choice(statuses)
-            ))
-            if i % 1000 == 0:
-                conn.commit()
-                print(f"> {i} suscripciones insertadas...")
-        conn.commit()
-    except Exception as e:
-        print("❌ Error en suscripciones:", e)
-        conn.rollback()
 
-def generate_virtual_gifts():
-    print("🔹 Generando regalos virtuales...")
-    gifts = [
+def generate_videos(cur, total, rng, pools):
+    creators = fetch_ids(cur, "SELECT user_id FROM app_user WHERE role = %s", ('creator',))
+    vis = ['public', 'private', 'followers_only']
+    return chunked(total, lambda offset, n: bg.rows(
+        bg.choice(rng, creators, n),
+        bg.sentences(rng, pools, n, nb_words=6),
+        bg.texts(rng, pools, n, max_nb_chars=200),
+        bg.integers(rng, 10, 300, n),
+        bg.timestamps(rng, YEAR_START, TODAY, n),
+        bg.choice(rng, vis, n)
+    ))
+
+
+def generate_subscriptions(cur, total, rng, pools):
+    subs = fetch_ids(cur, "SELECT user_id FROM app_user WHERE role = %s", ('user',))
+    creators = fetch_ids(cur, "SELECT user_id FROM app_user WHERE role = %s", ('creator',))
+    plans = fetch_ids(cur, "SELECT plan_id FROM subscriptionplan")
+    statuses = ['active', 'cancelled', 'expired']
+    return chunked(total, lambda offset, n: bg.rows(
+        bg.choice(rng, subs, n),
+        bg.choice(rng, creators, n),
+        bg.choice(rng, plans, n),
+        bg.dates(rng, YEAR_START, TODAY, n),
+        bg.dates(rng, YEAR_START, TODAY, n),
+        bg.choice(rng, statuses, n)
+    ))
+
+
+def generate_virtual_gifts(cur, total, rng, pools):
+    yield [
         ("Rose", 1.0),
         ("Coffee", 2.0),
         ("Diamond", 5.0),
         ("Super Like", 3.5),
         ("Rocket", 10.0)
     ]
-    try:
-        for name, price in gifts:
-            cur.execute("""
-                INSERT INTO virtualgift (name, price)
-                VALUES (%s, %s)
-            """, (name, price))
-        conn.commit()
-    except Exception as e:
-        print("❌ Error en virtualgift:", e)
-        conn.rollback()
 
-def generate_transactions(n=50000):
-    print(f"🔹 Generando {n} transacciones...")
-    try:
-        cur.execute("SELECT user_id FROM app_user")
-        users = [r[0] for r in cur.fetchall()]
-        cur.execute("SELECT advertiser_id FROM advertiser")
-        advertisers = [r[0] for r in cur.fetchall()]
-        currencies = ['USD', 'COP', 'EUR']
-        types = ['subscription', 'gift', 'ad_payment']
-
-        for i in range(n):
-            t_type = random.choice(types)
-            user = random.choice(users)
-            adv = random.choice(advertisers) if t_type == 'ad_payment' else None
-            cur.execute("""
-                INSERT INTO transaction (user_id, advertiser_id, amount, currency, type, transaction_datetime, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                user,
-                adv,
-                round(random.uniform(0.99, 100.00), 2),
-                random.choice(currencies),
-                t_type,
-                fake.date_time_this_year(),
-                random.choice([True, True, False])
-            ))
-            if i % 1000 == 0:
-                conn.commit()
-                print(f"> {i} transacciones insertadas...")
-        conn.commit()
-    except Exception as e:
-        print("❌ Error en transacciones:", e)
-        conn.rollback()
 
-def generate_gift_transactions(n=20000):
-    print(f"🔹 Generando {n} gifttransactions...")
-    try:
-        cur.execute("SELECT transaction_id FROM transaction WHERE type = 'gift'")
-        gift_txs = [r[0] for r in cur.fetchall()]
-        cur.execute("SELECT user_id FROM app_user")
-        users = [r[0] for r in cur.fetchall()]
-        cur.execute("SELECT gift_id FROM virtualgift")
-        gifts = [r[0] for r in cur.fetchall()]
-
-        for i in range(n):
-            tx_id = random.choice(gift_txs)
-            sender = random.choice(users)
-            receiver = random.choice([u for u in users if u != sender])
-            gift = random.choice(gifts)
-            cur.execute("""
-                INSERT INTO gifttransaction (transaction_id, sender_id, receiver_id, gift_id)
-                VALUES (%s, %s, %s, %s)
-            """, (
-                tx_id,
-                sender,
-                receiver,
-                gift
-            ))
-            if i % 1000 == 0:
-                conn.commit()
-                print(f"> {i} regalos insertados...")
-        conn.commit()
-    except Exception as e:
-        print("❌ Error en gifttransaction:", e)
-        conn.rollback()
+def generate_transactions(cur, total, rng, pools):
+    users = fetch_ids(cur, "SELECT user_id FROM app_user")
+    cur.execute("SELECT campaign_id, advertiser_id, start_date, end_date FROM campaign ORDER BY 1")
+    campaigns = np.array(cur.fetchall(), dtype=object)
+    currencies = ['USD', 'COP', 'EUR']
+    # Sin campañas (p. ej. --scale muy bajo) no hay pagos de anuncios que atribuir
+    types = ['subscription', 'gift', 'ad_payment'] if len(campaigns) else ['subscription', 'gift']
+
+    def ad_timestamps(campaign, n):
+        if not len(campaigns):
+            return np.full(n, None, dtype=object)
+        return bg.timestamps_within(rng, campaign[:, 2], campaign[:, 3])
+
+    def build(offset, n):
+        t_type = bg.choice(rng, types, n)
+        ad = t_type == 'ad_payment'
+        # Los pagos de anuncios se atribuyen a una campaña y caen dentro de su ventana
+        if len(campaigns):
+            campaign = campaigns[rng.integers(0, len(campaigns), size=n)]
+        else:
+            campaign = np.full((n, 4), None, dtype=object)
+        return bg.rows(
+            bg.choice(rng, users, n),
+            np.where(ad, campaign[:, 1], None),
+            np.where(ad, campaign[:, 0], None),
+            bg.uniform(rng, 0.99, 100.00, n),
+            bg.choice(rng, currencies, n),
+            t_type,
+            np.where(ad, ad_timestamps(campaign, n), bg.timestamps(rng, YEAR_START, TODAY, n)),
+            bg.booleans(rng, n, p_true=2 / 3)
+        )
+    return chunked(total, build)
+
+
+def generate_gift_transactions(cur, total, rng, pools):
+    gift_txs = fetch_ids(cur, "SELECT transaction_id FROM transaction WHERE type = 'gift'")
+    users = fetch_ids(cur, "SELECT user_id FROM app_user")
+    gifts = fetch_ids(cur, "SELECT gift_id FROM virtualgift")
 
-def generate_content_reports(n=5000):
-    print(f"🔹 Generando {n} reportes de contenido...")
+    def build(offset, n):
+        senders, receivers = bg.distinct_pairs(rng, users, n)
+        return bg.rows(
+            bg.choice(rng, gift_txs, n),
+            senders,
+            receivers,
+            bg.choice(rng, gifts, n)
+        )
+    return chunked(total, build)
+
+
+def generate_content_reports(cur, total, rng, pools):
+    videos = fetch_ids(cur, "SELECT video_id FROM video")
+    reporters = fetch_ids(cur, "SELECT user_id FROM app_user WHERE role IN ('user', 'creator')")
+    moderators = fetch_ids(cur, "SELECT user_id FROM app_user WHERE role = 'admin'")
+    statuses = ['pending', 'resolved', 'rejected']
+    reasons = ['Inappropriate content', 'Spam', 'Copyright issue', 'Hate speech', 'Violence']
+    return chunked(total, lambda offset, n: bg.rows(
+        bg.choice(rng, videos, n),
+        bg.choice(rng, reporters, n),
+        bg.nullable(rng, bg.choice(rng, moderators, n), p_null=0.5),
+        bg.choice(rng, reasons, n),
+        bg.choice(rng, statuses, n),
+        bg.timestamps(rng, YEAR_START, TODAY, n)
+    ))
+
+# tabla -> (columnas, tablas padre, generador)
+TABLES = {
+    "app_user": (
+        ["name", "last_name", "username", "email", "password_hash", "registration_date", "profile_pic_url", "role", "birth_date"],
+        [], generate_users),
+    "advertiser": (["company_name", "billing_info"], [], generate_advertisers),
+    "subscriptionplan": (["name", "price", "duration_days", "description"], [], generate_subscription_plans),
+    "virtualgift": (["name", "price"], [], generate_virtual_gifts),
+    "campaign": (
+        ["advertiser_id", "budget", "start_date", "end_date", "targeting_criteria"],
+        ["advertiser"], generate_campaigns),
+    "video": (
+        ["creator_id", "title", "description", "duration", "upload_datetime", "visibility"],
+        ["app_user"], generate_videos),
+    "subscription": (
+        ["subscriber_id", "creator_id", "plan_id", "start_date", "end_date", "status"],
+        ["app_user", "subscriptionplan"], generate_subscriptions),
+    "transaction": (
+        ["user_id", "advertiser_id", "campaign_id", "amount", "currency", "type", "transaction_datetime", "status"],
+        ["app_user", "campaign"], generate_transactions),
+    "gifttransaction": (
+        ["transaction_id", "sender_id", "receiver_id", "gift_id"],
+        ["transaction", "app_user", "virtualgift"], generate_gift_transactions),
+    "contentreport": (
+        ["video_id", "reporter_id", "reviewed_by", "reason", "status", "report_date"],
+        ["video", "app_user"], generate_content_reports),
+}
+
+# =====================
+# PIPELINE
+# =====================
+
+def load_table(pool, table, total, seed, pools):
+    columns, _, generator = TABLES[table]
+    rng = bg.make_rng(seed, list(TABLES).index(table))
+    conn = pool.getconn()
+    cur = conn.cursor()
+    start = time.perf_counter()
+    rows = 0
     try:
-        cur.execute("SELECT video_id FROM video")
-        videos = [r[0] for r in cur.fetchall()]
-        cur.execute("SELECT user_id FROM app_user WHERE role IN ('user', 'creator')")
-        reporters = [r[0] for r in cur.fetchall()]
-        cur.execute("SELECT user_id FROM app_user WHERE role = 'admin'")
-        moderators = [r[0] for r in cur.fetchall()]
-        statuses = ['pending', 'resolved', 'rejected']
-        reasons = ['Inappropriate content', 'Spam', 'Copyright issue', 'Hate speech', 'Violence']
-
-        for i in range(n):
-            cur.execute("""
-                INSERT INTO contentreport (video_id, reporter_id, reviewed_by, reason, status, report_date)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                random.choice(videos),
-                random.choice(reporters),
-                random.choice(moderators) if random.random() > 0.5 else None,
-                random.choice(reasons),
-                random.choice(statuses),
-                fake.date_time_this_year()
-            ))
-            if i % 500 == 0:
-                conn.commit()
-                print(f"> {i} reportes insertados...")
+        for chunk in generator(cur, total, rng, pools):
+            copy_rows(cur, table, columns, chunk)
+            rows += len(chunk)
+            print(f"> {table}: {rows} filas copiadas...")
         conn.commit()
-    except Exception as e:
-        print("❌ Error en contentreport:", e)
+    except Exception:
         conn.rollback()
+        raise
+    finally:
+        cur.close()
+        pool.putconn(conn)
+    return rows, time.perf_counter() - start
+
+
+def run_pipeline(pool, volumes, workers, seed, pools):
+    # Cada tabla espera solo a sus tablas padre; las independientes cargan en paralelo
+    pending = dict(TABLES)
+    done, failed, running, stats = set(), set(), {}, {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for table in list(pending):
+                parents = pending[table][1]
+                if any(p in failed for p in parents):
+                    print(f"⚠️ {table} omitida: falló una tabla padre.")
+                    failed.add(table)
+                    del pending[table]
+                elif all(p in done for p in parents):
+                    print(f"🔹 Generando {volumes.get(table, 0)} filas en {table}...")
+                    running[executor.submit(load_table, pool, table, volumes.get(table, 0), seed, pools)] = table
+                    del pending[table]
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                table = running.pop(future)
+                try:
+                    stats[table] = future.result()
+                    done.add(table)
+                except Exception as e:
+                    print(f"❌ Error en {table}:", e)
+                    failed.add(table)
+    return stats
+
+
+def print_summary(stats, elapsed):
+    print("\n📊 Resumen de carga")
+    print(f"{'tabla':<18}{'filas':>10}{'seg':>10}{'filas/s':>12}")
+    for table, (rows, seconds) in stats.items():
+        rate = rows / seconds if seconds > 0 else 0
+        print(f"{table:<18}{rows:>10}{seconds:>10.2f}{rate:>12.0f}")
+    total_rows = sum(rows for rows, _ in stats.values())
+    print(f"{'TOTAL':<18}{total_rows:>10}{elapsed:>10.2f}{total_rows / elapsed if elapsed > 0 else 0:>12.0f}")
 
 # =====================
 # EJECUCIÓN PRINCIPAL
 # =====================
-try:
-    generate_users(10000)
-    generate_advertisers(500)
-    generate_campaigns(2000)
-    generate_subscription_plans()
-    generate_videos(100000)
-    generate_subscriptions(20000)
-    generate_virtual_gifts()
-    generate_transactions(50000)
-    generate_gift_transactions(20000)
-    generate_content_reports(5000)
-    print("✅ Base de datos completamente poblada.")
-except Exception as global_error:
-    print("❌ Error global:", global_error)
-    conn.rollback()
-finally:
-    cur.close()
-    conn.close()
-    print("🔒 Conexión cerrada.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pobla la base de datos PostgreSQL con datos sintéticos vía COPY.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplicador de volúmenes (10, 100, ...)")
+    parser.add_argument("--workers", type=int, default=4, help="Tablas cargadas en paralelo")
+    parser.add_argument("--seed", type=int, default=None,
+                        help=f"Semilla del generador (por defecto {DEFAULT_SEED}); con seed explícito la fecha de "
+                             "referencia queda fija y el mismo seed da el mismo dataset")
+    parser.add_argument("--clean", action="store_true", help="Vacía las tablas antes de poblar")
+    parser.add_argument("--anchor-date", type=bg.parse_anchor, default=None,
+                        help="Fin de las ventanas temporales, YYYY-MM-DD o 'today' (por defecto hoy, fija con --seed)")
+    args = parser.parse_args()
+    set_anchor(bg.resolve_anchor(args.anchor_date, seeded=args.seed is not None))
+    seed = DEFAULT_SEED if args.seed is None else args.seed
+
+    volumes = {table: int(n * args.scale) for table, n in BASE_VOLUMES.items()}
+    pool = ThreadedConnectionPool(1, args.workers, **DB_PARAMS)
+    try:
+        if args.clean:
+            conn = pool.getconn()
+            clean_database(conn)
+            pool.putconn(conn)
+        start = time.perf_counter()
+        stats = run_pipeline(pool, volumes, args.workers, seed, bg.build_pools(seed))
+        print_summary(stats, time.perf_counter() - start)
+        if len(stats) == len(TABLES):
+            print("✅ Base de datos completamente poblada.")
+    except Exception as global_error:
+        print("❌ Error global:", global_error)
+    finally:
+        pool.closeall()
+        print("🔒 Conexión cerrada.")
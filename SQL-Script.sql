@@ -114,3 +114,6 @@ CREATE TABLE contentreport (
     status report_status DEFAULT 'pending',
     report_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- Cambios posteriores al esquema base (índices, búsqueda, outbox...): migrations/V###__*.sql
+-- Aplicar con: python migrations/migrate.py
@@ -0,0 +1,106 @@
+# cache.py
+import asyncio
+import time
+from collections import OrderedDict
+
+# Caché en proceso con TTL y single-flight: ante un miss, solo una corrutina ejecuta
+# el loader y las demás esperan su resultado (evita estampidas contra la base de datos).
+
+
+class TTLCache:
+    def __init__(self, ttl_sec, max_entries=1024):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._inflight = {}
+
+    async def get_or_load(self, key, loader):
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1], True
+
+        inflight = self._inflight.get(key)
+        if inflight:
+            self.hits += 1
+            return await asyncio.shield(inflight), True
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # marcada como recuperada aunque no haya otras corrutinas esperando
+            raise
+        finally:
+            del self._inflight[key]
+        if len(self._entries) >= self.max_entries:
+            self._evict()
+        self._entries[key] = (time.monotonic() + self.ttl_sec, value)
+        future.set_result(value)
+        return value, False
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        while len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class LRUCache:
+    # Caché LRU con TTL para valores que el llamador carga aparte (p. ej. adyacencias del grafo social)
+    def __init__(self, max_entries, ttl_sec):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def peek(self, key):
+        # Sin contar acceso ni cambiar el orden LRU
+        entry = self._entries.get(key)
+        return entry[1] if entry and entry[0] > time.monotonic() else None
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_sec, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
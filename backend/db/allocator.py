@@ -0,0 +1,17 @@
+# db/allocator.py
+from backend.db.postgres import AsyncSessionLocal
+from backend.db import queries
+
+# Reserva de rangos contiguos sobre index_allocator (migrations/V005).
+# Se confirma en una transacción propia y corta: el bloqueo de la fila dura solo el UPDATE,
+# así que peticiones concurrentes reciben rangos disjuntos sin esperar a los INSERT de las demás.
+# Un rango reservado y no usado (p. ej. por un rollback) queda como hueco, nunca se reutiliza.
+
+
+async def reserve_range(name, count):
+    async with AsyncSessionLocal() as session:
+        start = await queries.RESERVE_INDEX_RANGE.fetchval(session, name=name, count=count)
+        await session.commit()
+    if start is None:
+        raise LookupError(f"Allocator '{name}' not found in index_allocator")
+    return start
@@ -0,0 +1,154 @@
+# db/counters.py
+import random
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from firebase_admin import firestore
+from backend.db.firebase import db as firebase_db
+from backend.db import queries
+
+# Contadores pre-agregados por creador y por video, en buckets diarios y horarios:
+#   CreatorStats/{creator_id}/Daily/{YYYY-MM-DD}_{shard}
+#   VideoStats/{video_id}/Hourly/{YYYY-MM-DDTHH}_{shard}
+# Cada bucket se reparte en NUM_SHARDS documentos para no saturar un solo doc con escrituras.
+NUM_SHARDS = 4
+GRANULARITIES = {"Daily": "%Y-%m-%d", "Hourly": "%Y-%m-%dT%H"}
+ROOTS = ("CreatorStats", "VideoStats")
+METRICS = ("views", "reactions")
+WRITE_BATCH_LIMIT = 500
+RECONCILE_MARGIN = timedelta(minutes=5)
+
+
+def bucket_key(ts, granularity):
+    return ts.strftime(GRANULARITIES[granularity])
+
+
+def count_events(events):
+    # events: (creator_id, video_id, metric, timestamp) -> {(root, owner, gran, bucket): {metric: n}}
+    totals = defaultdict(Counter)
+    for creator_id, video_id, metric, ts in events:
+        for gran in GRANULARITIES:
+            key = bucket_key(ts, gran)
+            totals[("CreatorStats", str(creator_id), gran, key)][metric] += 1
+            totals[("VideoStats", str(video_id), gran, key)][metric] += 1
+    return totals
+
+
+def counter_ref(root, owner_id, gran, key, shard):
+    return firebase_db.collection(root).document(owner_id).collection(gran).document(f"{key}_{shard}")
+
+
+def add_increments(batch, totals):
+    # Añade los incrementos a un batch existente (misma escritura atómica que el evento)
+    for (root, owner_id, gran, key), metrics in totals.items():
+        data = {"bucket": key, **{m: firestore.Increment(n) for m, n in metrics.items()}}
+        batch.set(counter_ref(root, owner_id, gran, key, random.randrange(NUM_SHARDS)), data, merge=True)
+    return len(totals)
+
+
+def apply_increments(totals):
+    items = list(totals.items())
+    for offset in range(0, len(items), WRITE_BATCH_LIMIT):
+        batch = firebase_db.batch()
+        add_increments(batch, dict(items[offset:offset + WRITE_BATCH_LIMIT]))
+        batch.commit()
+
+
+def _sum_snapshots(snapshots, totals):
+    for snap in snapshots:
+        data = snap.to_dict()
+        for m in METRICS:
+            totals[m] += data.get(m, 0)
+
+
+def window_totals(root, owner_id, since):
+    # Días completos desde buckets diarios + el día parcial de `since` desde buckets horarios
+    doc = firebase_db.collection(root).document(str(owner_id))
+    first_full_day = bucket_key(since + timedelta(days=1), "Daily")
+    totals = Counter()
+    _sum_snapshots(doc.collection("Daily").where("bucket", ">=", first_full_day).stream(), totals)
+    _sum_snapshots(
+        doc.collection("Hourly")
+        .where("bucket", ">=", bucket_key(since, "Hourly"))
+        .where("bucket", "<", first_full_day)
+        .stream(),
+        totals,
+    )
+    return {m: totals[m] for m in METRICS}
+
+
+def load_events(since):
+    # Eventos (video_id, metric, timestamp) desde `since`, proyectando solo los campos necesarios
+    events = []
+    for collection, metric in (("Views", "views"), ("Reactions", "reactions")):
+        for snap in firebase_db.collection(collection).where("timestamp", ">=", since).select(["video_id", "timestamp"]).stream():
+            data = snap.to_dict()
+            events.append((str(data["video_id"]), metric, data["timestamp"]))
+    return events
+
+
+async def fetch_video_creators(session, video_ids):
+    ids = [int(v) for v in video_ids if str(v).isdigit()]
+    if not ids:
+        return {}
+    rows = await queries.VIDEO_CREATORS.fetch(session, ids=ids)
+    return {str(video_id): creator_id for video_id, creator_id in rows}
+
+
+def reconcile_cutoff(now=None):
+    # Solo se reconcilian buckets cerrados: hasta la hora completa anterior a now - RECONCILE_MARGIN,
+    # para no competir con los incrementos de eventos que todavía están en el write-behind
+    now = now or datetime.utcnow()
+    return (now - RECONCILE_MARGIN).replace(minute=0, second=0, microsecond=0)
+
+
+def _closed(key, gran, until):
+    return key < bucket_key(until, gran)
+
+
+def reconcile(since, events, creators, until=None):
+    # Reconstruye los contadores en [since, until) (since al inicio de un día, para no truncar buckets);
+    # creators: {video_id: creator_id}
+    until = until or reconcile_cutoff()
+    totals = count_events(
+        (creators[video_id], video_id, metric, ts) for video_id, metric, ts in events if video_id in creators
+    )
+    totals = {key: metrics for key, metrics in totals.items() if _closed(key[3], key[2], until)}
+
+    # Lo que suman hoy los shards. La consulta por collection group necesita la exención de índice
+    # de `bucket` declarada en firestore.indexes.json (firebase deploy --only firestore:indexes).
+    observed = defaultdict(Counter)
+    for gran in GRANULARITIES:
+        query = (
+            firebase_db.collection_group(gran)
+            .where("bucket", ">=", bucket_key(since, gran))
+            .where("bucket", "<", bucket_key(until, gran))
+        )
+        for snap in query.stream():
+            owner = snap.reference.parent.parent
+            if owner.parent.id not in ROOTS:
+                continue
+            data = snap.to_dict()
+            _sum_snapshots([snap], observed[(owner.parent.id, owner.id, gran, data["bucket"])])
+
+    # Corregir con Increment(diferencia) en lugar de borrar y reescribir: un incremento concurrente
+    # nunca se pisa, solo se suma a la corrección. Los buckets sin eventos quedan en 0.
+    corrections = {}
+    for key in totals.keys() | observed.keys():
+        expected = totals.get(key, Counter())
+        delta = {m: expected[m] - observed[key][m] for m in METRICS if expected[m] != observed[key][m]}
+        if delta:
+            corrections[key] = delta
+    items = list(corrections.items())
+    for offset in range(0, len(items), WRITE_BATCH_LIMIT):
+        batch = firebase_db.batch()
+        for (root, owner_id, gran, key), delta in items[offset:offset + WRITE_BATCH_LIMIT]:
+            data = {"bucket": key, **{m: firestore.Increment(n) for m, n in delta.items()}}
+            batch.set(counter_ref(root, owner_id, gran, key, 0), data, merge=True)
+        batch.commit()
+
+    return {
+        "events": len(events),
+        "until": until,
+        "buckets_checked": len(totals.keys() | observed.keys()),
+        "buckets_corrected": len(items),
+    }
@@ -0,0 +1,225 @@
+# db/feed.py
+import asyncio
+import random
+from firebase_admin import firestore
+from backend import config
+from backend.db.postgres import AsyncSessionLocal
+from backend.db import queries
+from backend.db.firebase import db as firebase_db, run as fs_run
+
+# Feed por usuario en FeedCache/{user_id} = {"videos": [video_id, ...], "updated_at"}.
+#   - Fan-out-on-write: al subir un video, un worker en segundo plano añade su ID al feed de
+#     cada seguidor (ArrayUnion en WriteBatch de 500), paginando follow por follower_id.
+#     El trabajo se encola en feed_fanout_queue (migrations/V011) en la misma transacción que
+#     el video, así un reinicio no pierde fan-outs pendientes; el worker guarda el avance por
+#     página y borra la fila al terminar.
+#   - Creadores con más de FEED_CELEBRITY_FOLLOWERS seguidores quedan en feed_celebrity
+#     (migrations/V007) y sus videos se mezclan al leer el feed (fan-out-on-read).
+#   - Recorte sin leer cada feed en el fan-out: get_feed recorta el documento que ya leyó cuando
+#     pasa de FEED_TRIM_AT, y en cada página solo 1 de cada FEED_TRIM_SAMPLE feeds se relee y
+#     se recorta. Así el coste de lectura del fan-out es ~1/FEED_TRIM_SAMPLE de las escrituras
+#     y un feed que nunca se lee sigue acotado (1 MiB en Firestore): se revisa de media cada
+#     FEED_TRIM_SAMPLE videos, pasando a lo sumo unas decenas de IDs de FEED_TRIM_AT.
+# Los IDs de video son crecientes, así que el feed se ordena por ID sin leer los videos.
+FEED_SIZE = 100
+FEED_TRIM_AT = 2 * FEED_SIZE
+FEED_TRIM_SAMPLE = 20
+FANOUT_PAGE_SIZE = 500
+FANOUT_ERROR_BACKOFF_SEC = 2.0
+FANOUT_ERROR_BACKOFF_MAX_SEC = 30.0
+FANOUT_IDLE_SLEEP_SEC = 1.0
+FANOUT_LEASE_SEC = 300.0  # se renueva en cada página
+
+
+async def enqueue(session, video_id, creator_id):
+    # Debe llamarse dentro de la transacción que inserta el video
+    await queries.ENQUEUE_FANOUT.fetch(session, video_id=video_id, creator_id=creator_id)
+
+
+def feed_ref(user_id):
+    return firebase_db.collection("FeedCache").document(str(user_id))
+
+
+def push_to_feeds(follower_ids, video_id):
+    # Idempotente (ArrayUnion + merge): una página fallida se puede repetir entera
+    refs = [feed_ref(follower_id) for follower_id in follower_ids]
+    batch = firebase_db.batch()
+    for ref in refs:
+        batch.set(ref, {
+            "videos": firestore.ArrayUnion([str(video_id)]),
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        }, merge=True)
+    batch.commit()
+    sample = [ref for ref in refs if random.random() < 1 / FEED_TRIM_SAMPLE]
+    return trim_feeds(sample) if sample else 0
+
+
+def stale_videos(videos):
+    # IDs que sobran de un feed por encima de FEED_TRIM_AT (los más antiguos)
+    if len(videos) <= FEED_TRIM_AT:
+        return []
+    return sorted(videos, key=int)[:len(videos) - FEED_SIZE]
+
+
+def trim_feeds(refs):
+    # ArrayRemove de los IDs más antiguos es atómico frente a ArrayUnion concurrentes del
+    # fan-out (solo añaden IDs más nuevos que los que se quitan)
+    batch = firebase_db.batch()
+    trimmed = 0
+    for snap in firebase_db.get_all(refs, field_paths=["videos"]):
+        stale = stale_videos((snap.to_dict() or {}).get("videos", []) if snap.exists else [])
+        if stale:
+            batch.update(snap.reference, {"videos": firestore.ArrayRemove(stale)})
+            trimmed += 1
+    if trimmed:
+        batch.commit()
+    return trimmed
+
+
+class FeedFanout:
+    def __init__(self, page_size=FANOUT_PAGE_SIZE, celebrity_followers=config.FEED_CELEBRITY_FOLLOWERS,
+                 max_attempts=config.FEED_FANOUT_MAX_ATTEMPTS):
+        self.page_size = page_size
+        self.celebrity_followers = celebrity_followers
+        self.max_attempts = max_attempts
+        self.videos = 0
+        self.feeds_written = 0
+        self.feeds_trimmed = 0
+        self.skipped_celebrity = 0
+        self.failures = 0
+        self.failed_pages = 0
+        self._task = None
+        self._wakeup = None
+        self._stopping = None
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        # Termina la página en curso y libera el video; el resto queda en feed_fanout_queue
+        if self._task:
+            self._stopping.set()
+            self._wakeup.set()
+            await self._task
+
+    def wake(self):
+        # Llamar después del commit del video: evita esperar a la siguiente consulta de la cola
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _claim(self):
+        async with AsyncSessionLocal() as session:
+            job = await queries.CLAIM_FANOUT.fetchrow(session, lease_sec=FANOUT_LEASE_SEC)
+            await session.commit()
+        return job
+
+    async def _finish(self, query, video_id):
+        async with AsyncSessionLocal() as session:
+            await query.fetch(session, video_id=video_id)
+            await session.commit()
+
+    async def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                job = await self._claim()
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), FANOUT_IDLE_SLEEP_SEC)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+                await self.fanout(job["video_id"], job["creator_id"], job["after_id"])
+            except Exception as e:
+                # El lease vence y el video se reintenta desde la última página guardada
+                self.failures += 1
+                print(f"❌ Feed fan-out error: {e}")
+                await asyncio.sleep(FANOUT_ERROR_BACKOFF_SEC)
+
+    async def _push_page(self, follower_ids, video_id):
+        # Reintentos con backoff exponencial; False si la página se da por perdida
+        for attempt in range(self.max_attempts):
+            try:
+                self.feeds_trimmed += await fs_run(push_to_feeds, follower_ids, video_id)
+                return True
+            except Exception as e:
+                self.failures += 1
+                print(f"❌ Feed fan-out error (video {video_id}, intento {attempt + 1}/{self.max_attempts}): {e}")
+                if attempt + 1 < self.max_attempts:
+                    await asyncio.sleep(min(FANOUT_ERROR_BACKOFF_SEC * 2 ** attempt, FANOUT_ERROR_BACKOFF_MAX_SEC))
+        return False
+
+    async def _next_page(self, video_id, creator_id, after_id):
+        # Una sesión corta por página: guarda el avance (y renueva el lease) y lee la página
+        # siguiente; la conexión vuelve al pool antes de escribir en Firestore y no queda una
+        # transacción abierta (idle in transaction) durante los reintentos
+        async with AsyncSessionLocal() as session:
+            await queries.FANOUT_PROGRESS.fetch(
+                session, video_id=video_id, after_id=after_id, lease_sec=FANOUT_LEASE_SEC
+            )
+            rows = await queries.FOLLOWERS_PAGE.fetch(
+                session, creator_id=creator_id, after_id=after_id, limit=self.page_size
+            )
+            await session.commit()
+        return [r["follower_id"] for r in rows]
+
+    async def fanout(self, video_id, creator_id, after_id=0):
+        if after_id == 0:
+            async with AsyncSessionLocal() as session:
+                followers = await queries.FOLLOWER_COUNT.fetchval(session, creator_id=creator_id)
+                if followers > self.celebrity_followers:
+                    await queries.MARK_CELEBRITY.fetch(session, creator_id=creator_id, followers=followers)
+                    await queries.FINISH_FANOUT.fetch(session, video_id=video_id)
+                    await session.commit()
+                    self.skipped_celebrity += 1
+                    return
+                await queries.UNMARK_CELEBRITY.fetch(session, creator_id=creator_id)
+                await session.commit()
+
+        while True:
+            if self._stopping.is_set():
+                await self._finish(queries.RELEASE_FANOUT, video_id)
+                return
+            follower_ids = await self._next_page(video_id, creator_id, after_id)
+            if not follower_ids:
+                break
+            if await self._push_page(follower_ids, video_id):
+                self.feeds_written += len(follower_ids)
+            else:
+                # Las páginas siguientes se siguen repartiendo
+                self.failed_pages += 1
+                print(f"☠️ Feed fan-out: video {video_id} sin entregar a los seguidores {follower_ids[0]}..{follower_ids[-1]}")
+            after_id = follower_ids[-1]
+        await self._finish(queries.FINISH_FANOUT, video_id)
+        self.videos += 1
+
+    def stats(self):
+        return {
+            "videos": self.videos,
+            "feeds_written": self.feeds_written,
+            "feeds_trimmed": self.feeds_trimmed,
+            "skipped_celebrity": self.skipped_celebrity,
+            "failures": self.failures,
+            "failed_pages": self.failed_pages,
+        }
+
+
+fanout = FeedFanout()
+
+
+async def get_feed(session, user_id, limit=20):
+    snap = await fs_run(feed_ref(user_id).get)
+    stored = (snap.to_dict() or {}).get("videos", []) if snap.exists else []
+    stale = stale_videos(stored)
+    if stale:
+        # Recorte perezoso con el documento ya leído
+        await fs_run(snap.reference.update, {"videos": firestore.ArrayRemove(stale)})
+        fanout.feeds_trimmed += 1
+    pushed = [int(v) for v in stored]
+    pulled = [r["video_id"] for r in await queries.FEED_CELEBRITY_VIDEOS.fetch(session, user_id=user_id, limit=limit)]
+    # Entre recortes el documento tiene más de FEED_SIZE IDs: solo cuentan los FEED_SIZE más recientes
+    pushed = sorted(pushed, reverse=True)[:FEED_SIZE]
+    videos = sorted(set(pushed) | set(pulled), reverse=True)[:limit]
+    return {"user_id": user_id, "videos": videos, "from_cache": len(pushed), "from_celebrities": len(pulled)}
@@ -1,8 +1,47 @@
 # db/firebase.py
+import asyncio
+import functools
+import importlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import firebase_admin
 from firebase_admin import credentials, firestore
-from backend.config import FIREBASE_CREDENTIALS
+from backend import metrics
+from backend import profiling
+from backend.config import FIREBASE_CREDENTIALS, FIRESTORE_CLIENT_FACTORY, FIRESTORE_MAX_WORKERS, FIRESTORE_PROJECT
 
-cred = credentials.Certificate(FIREBASE_CREDENTIALS)
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+
+def create_client():
+    if FIRESTORE_CLIENT_FACTORY:
+        # Cliente inyectado (benchmarks, pruebas): el resto del módulo, run() incluido, no cambia
+        module, _, name = FIRESTORE_CLIENT_FACTORY.partition(":")
+        return getattr(importlib.import_module(module), name)()
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        # Emulador local (benchmarks, pruebas): sin credenciales, el SDK lee el host del entorno
+        from google.cloud import firestore as gc_firestore
+        return gc_firestore.Client(project=FIRESTORE_PROJECT)
+    cred = credentials.Certificate(FIREBASE_CREDENTIALS)
+    firebase_admin.initialize_app(cred)
+    return firestore.client()
+
+
+db = create_client()
+
+# El SDK de Firestore es bloqueante: sus llamadas de red (commit, stream, get, set, add)
+# se ejecutan en un pool acotado y dedicado para no detener el event loop de FastAPI.
+executor = ThreadPoolExecutor(max_workers=FIRESTORE_MAX_WORKERS, thread_name_prefix="firestore")
+
+
+async def run(fn, *args, **kwargs):
+    # Punto único de acceso a Firestore desde el event loop: aquí se mide su tiempo por petición
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs)
+    session = profiling.current_session.get()
+    if session is not None:
+        call = session.track_thread(call)
+    start = time.perf_counter()
+    try:
+        return await loop.run_in_executor(executor, call)
+    finally:
+        metrics.record_firestore(time.perf_counter() - start)
@@ -0,0 +1,71 @@
+# db/firestore_queries.py
+import time
+from datetime import datetime, date
+
+# Capa de consultas sobre Firestore:
+#   - aggregate(): count()/sum()/avg() resueltos en el servidor (no se descargan documentos)
+#   - fetch(): documentos completos o solo los campos pedidos con select()
+# Ambos devuelven también latencia y un estimado de bytes transferidos para comparar.
+
+FETCH_MODES = ("full", "projection", "count")
+
+
+def estimate_bytes(value):
+    # Tamaño aproximado según las reglas de almacenamiento de Firestore
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime, date)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(k.encode("utf-8")) + 1 + estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_bytes(v) for v in value)
+    return len(str(value))
+
+
+def aggregate(query, count=True, sums=(), avgs=()):
+    # Una sola consulta de agregación con todos los alias pedidos
+    start = time.perf_counter()
+    agg = query.count(alias="count") if count else None
+    for field in sums:
+        agg = agg.sum(field, alias=f"sum_{field}") if agg else query.sum(field, alias=f"sum_{field}")
+    for field in avgs:
+        agg = agg.avg(field, alias=f"avg_{field}") if agg else query.avg(field, alias=f"avg_{field}")
+    values = {r.alias: r.value for row in agg.get() for r in row}
+    return {
+        "values": values,
+        "bytes_transferred_approx": sum(len(k) + 1 + 8 for k in values),
+        "time_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def fetch(query, fields=None, limit=None, collect=True):
+    # collect=False: solo cuenta y mide bytes, sin retener los documentos en memoria
+    start = time.perf_counter()
+    if fields:
+        query = query.select(list(fields))
+    if limit:
+        query = query.limit(limit)
+    docs = []
+    count = 0
+    transferred = 0
+    for snap in query.stream():
+        data = snap.to_dict()
+        transferred += len(snap.id) + 1 + estimate_bytes(data)
+        count += 1
+        if collect:
+            docs.append(data)
+    return {
+        "documents": docs,
+        "count": count,
+        "bytes_transferred_approx": transferred,
+        "time_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def parse_fields(fields):
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
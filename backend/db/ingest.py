@@ -0,0 +1,61 @@
+# db/ingest.py
+import time
+from backend import metrics
+
+APP_USER_COLUMNS = ["name", "last_name", "username", "email", "password_hash", "role"]
+INGEST_MODES = ("copy", "values", "executemany")
+
+# Máximo de filas por sentencia INSERT ... VALUES (PostgreSQL admite 32767 parámetros)
+VALUES_CHUNK_ROWS = 1000
+
+
+def build_user_rows(start_index, count):
+    return [
+        (f"Name{i}", f"Last{i}", f"bigdata_user_{i}", f"bigdata_user_{i}@example.com", "hash", "user")
+        for i in range(start_index, start_index + count)
+    ]
+
+
+async def copy_rows(pg_conn, table, columns, rows):
+    # COPY FROM STDIN en formato binario
+    await pg_conn.copy_records_to_table(table, records=rows, columns=columns)
+
+
+async def insert_values_rows(pg_conn, table, columns, rows):
+    width = len(columns)
+    for offset in range(0, len(rows), VALUES_CHUNK_ROWS):
+        chunk = rows[offset:offset + VALUES_CHUNK_ROWS]
+        placeholders = ", ".join(
+            "(" + ", ".join(f"${r * width + c + 1}" for c in range(width)) + ")"
+            for r in range(len(chunk))
+        )
+        args = [value for row in chunk for value in row]
+        await pg_conn.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {placeholders}", *args
+        )
+
+
+async def executemany_rows(pg_conn, table, columns, rows):
+    placeholders = ", ".join(f"${c + 1}" for c in range(len(columns)))
+    await pg_conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+    )
+
+
+INGEST_STRATEGIES = {
+    "copy": copy_rows,
+    "values": insert_values_rows,
+    "executemany": executemany_rows,
+}
+
+
+async def ingest_rows(pg_conn, mode, table, columns, rows):
+    start = time.perf_counter()
+    await INGEST_STRATEGIES[mode](pg_conn, table, columns, rows)
+    elapsed = time.perf_counter() - start
+    metrics.record_db(elapsed)
+    return {
+        "rows": len(rows),
+        "time_ms": round(elapsed * 1000, 2),
+        "rows_per_sec": round(len(rows) / elapsed, 2) if elapsed > 0 else None,
+    }
@@ -0,0 +1,180 @@
+# db/outbox.py
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime
+from sqlalchemy import text
+from backend import config
+from backend.db.postgres import AsyncSessionLocal
+from backend.db import queries
+from backend.db.firebase import db as firebase_db, run as fs_run
+
+# Relay del transactional outbox: lee firestore_outbox en lotes y los replica con WriteBatch.
+# set() sobre un ID fijo es idempotente, así que reintentar un lote no duplica documentos.
+# Si un lote falla se reintenta fila a fila: las que vuelven a fallar esperan con backoff
+# exponencial propio (next_attempt_at) y tras OUTBOX_MAX_ATTEMPTS quedan marcadas con failed_at
+# (migrations/V010), fuera de la cola, sin bloquear al resto.
+RELAY_BATCH_SIZE = 500
+RELAY_IDLE_SLEEP_SEC = 0.2
+RELAY_ERROR_BACKOFF_SEC = 2.0
+ROW_BACKOFF_SEC = 1.0
+ROW_BACKOFF_MAX_SEC = 300.0
+DATETIME_FIELDS = ("upload_datetime",)
+
+
+async def enqueue(session, collection, document_id, payload):
+    # Debe llamarse dentro de la transacción que escribe la fila de origen
+    await queries.ENQUEUE_OUTBOX.fetch(
+        session, collection=collection, document_id=str(document_id), payload=json.dumps(payload, default=str)
+    )
+
+
+def decode_payload(payload):
+    data = json.loads(payload) if isinstance(payload, str) else dict(payload)
+    for field in DATETIME_FIELDS:
+        if isinstance(data.get(field), str):
+            data[field] = datetime.fromisoformat(data[field])
+    return data
+
+
+def commit_documents(rows):
+    batch = firebase_db.batch()
+    for row in rows:
+        batch.set(firebase_db.collection(row["collection"]).document(row["document_id"]), decode_payload(row["payload"]))
+    batch.commit()
+
+
+class OutboxRelay:
+    def __init__(self, batch_size=RELAY_BATCH_SIZE, max_attempts=config.OUTBOX_MAX_ATTEMPTS):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.relayed = 0
+        self.failures = 0
+        self.failed_rows = 0
+        self.lag_ms = deque(maxlen=10000)  # lag por documento: created_at -> confirmado en Firestore
+        self.throughput = deque(maxlen=100)  # (instante, documentos) por lote
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self):
+        while True:
+            try:
+                relayed = await self.relay_once()
+            except Exception as e:
+                self.failures += 1
+                print(f"❌ Outbox relay error: {e}")
+                await asyncio.sleep(RELAY_ERROR_BACKOFF_SEC)
+                continue
+            if relayed == 0:
+                await asyncio.sleep(RELAY_IDLE_SLEEP_SEC)
+
+    async def relay_once(self):
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(text("""
+                SELECT outbox_id, collection, document_id, payload
+                FROM firestore_outbox
+                WHERE processed_at IS NULL AND failed_at IS NULL
+                  AND (next_attempt_at IS NULL OR next_attempt_at <= clock_timestamp())
+                ORDER BY outbox_id
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            """), {"limit": self.batch_size})
+            rows = result.mappings().all()
+            if not rows:
+                await session.rollback()
+                return 0
+            done, errors = await self._commit(rows)
+            if errors:
+                await self._record_errors(session, errors)
+            lags = []
+            if done:
+                # Lag medido con el reloj de PostgreSQL (mismo reloj que created_at)
+                result = await session.execute(text("""
+                    UPDATE firestore_outbox SET processed_at = clock_timestamp(), attempts = attempts + 1
+                    WHERE outbox_id = ANY(:ids)
+                    RETURNING EXTRACT(EPOCH FROM (processed_at - created_at)) * 1000 AS lag_ms
+                """), {"ids": done})
+                lags = [float(lag) for lag in result.scalars().all()]
+            await session.commit()
+
+        self.lag_ms.extend(lags)
+        self.throughput.append((time.monotonic(), len(done)))
+        self.relayed += len(done)
+        return len(rows)
+
+    async def _commit(self, rows):
+        # -> (outbox_id confirmados, {outbox_id: error})
+        try:
+            await fs_run(commit_documents, rows)
+            return [r["outbox_id"] for r in rows], {}
+        except Exception as e:
+            self.failures += 1
+            print(f"❌ Outbox relay: lote de {len(rows)} fallido, reintento fila a fila: {e}")
+        done, errors = [], {}
+        for row in rows:
+            try:
+                await fs_run(commit_documents, [row])
+                done.append(row["outbox_id"])
+            except Exception as e:
+                errors[row["outbox_id"]] = str(e)
+        return done, errors
+
+    async def _record_errors(self, session, errors):
+        # Backoff por fila: ROW_BACKOFF_SEC * 2^intentos previos, acotado a ROW_BACKOFF_MAX_SEC
+        result = await session.execute(text("""
+            UPDATE firestore_outbox o
+            SET attempts = o.attempts + 1,
+                last_error = e.error,
+                next_attempt_at = clock_timestamp()
+                    + LEAST(:backoff * power(2, o.attempts), :backoff_max) * INTERVAL '1 second',
+                failed_at = CASE WHEN o.attempts + 1 >= :max_attempts THEN clock_timestamp() END
+            FROM unnest(CAST(:ids AS bigint[]), CAST(:errors AS text[])) AS e(outbox_id, error)
+            WHERE o.outbox_id = e.outbox_id
+            RETURNING o.outbox_id, o.collection, o.document_id, o.failed_at IS NOT NULL AS failed
+        """), {
+            "ids": list(errors),
+            "errors": list(errors.values()),
+            "backoff": ROW_BACKOFF_SEC,
+            "backoff_max": ROW_BACKOFF_MAX_SEC,
+            "max_attempts": self.max_attempts,
+        })
+        for row in result.mappings().all():
+            if row["failed"]:
+                self.failed_rows += 1
+                print(f"☠️ Outbox: fila {row['outbox_id']} ({row['collection']}/{row['document_id']}) marcada como fallida "
+                      f"tras {self.max_attempts} intentos: {errors[row['outbox_id']]}")
+
+    def stats(self):
+        lags = sorted(self.lag_ms)
+        pct = lambda p: round(lags[min(len(lags) - 1, int(len(lags) * p / 100))], 2) if lags else None
+        docs_per_sec = None
+        if len(self.throughput) > 1:
+            span = self.throughput[-1][0] - self.throughput[0][0]
+            docs_per_sec = round(sum(n for _, n in list(self.throughput)[1:]) / span, 2) if span > 0 else None
+        return {
+            "relayed": self.relayed,
+            "failures": self.failures,
+            "failed_rows": self.failed_rows,
+            "lag_ms_p50": pct(50),
+            "lag_ms_p99": pct(99),
+            "lag_ms_max": round(lags[-1], 2) if lags else None,
+            "docs_per_sec": docs_per_sec,
+        }
+
+
+relay = OutboxRelay()
+
+
+async def pending_count(session):
+    return await queries.OUTBOX_PENDING.fetchval(session)
@@ -1,11 +1,127 @@
 # db/postgres.py
+import time
+import uuid
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from backend.config import POSTGRES_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from backend import config
+from backend import metrics
+from backend.db.profiler import profiler
 
-engine = create_async_engine(POSTGRES_URL, echo=True)
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms = deque(maxlen=10000)
+
+    def record(self, wait_ms, timed_out=False):
+        self.checkouts += not timed_out
+        self.timeouts += timed_out
+        self.wait_ms.append(wait_ms)
+
+    def snapshot(self, pool):
+        waits = sorted(self.wait_ms)
+        pct = lambda p: round(waits[min(len(waits) - 1, int(len(waits) * p / 100))], 3) if waits else None
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": config.POSTGRES_MAX_OVERFLOW,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_p50": pct(50),
+            "wait_ms_p99": pct(99),
+            "wait_ms_max": round(waits[-1], 3) if waits else None,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    # Mide la espera para obtener una conexión del pool
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        pool_metrics.record((time.perf_counter() - start) * 1000)
+        return conn
+
+
+def build_engine():
+    url = make_url(config.POSTGRES_URL)
+    connect_args = {
+        "server_settings": {"application_name": config.POSTGRES_APPLICATION_NAME},
+        "statement_cache_size": config.POSTGRES_STATEMENT_CACHE_SIZE,
+    }
+    if config.POSTGRES_PGBOUNCER:
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    return create_async_engine(
+        url,
+        echo=config.POSTGRES_ECHO,
+        poolclass=InstrumentedPool,
+        pool_size=config.POSTGRES_POOL_SIZE,
+        max_overflow=config.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=config.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=config.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=config.POSTGRES_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+def instrument(sync_engine):
+    # Tiempo de cada sentencia ejecutada vía SQLAlchemy (session.execute / stream): métricas
+    # de la petición y perfil por huella. Las consultas registradas y el ingest usan asyncpg
+    # directo y se miden en su propio código
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        metrics.record_db(elapsed)
+        profiler.record(statement, parameters, elapsed * 1000, executemany=executemany)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            elapsed = time.perf_counter() - conn.info["query_start"].pop()
+            metrics.record_db(elapsed)
+            if exception_context.statement is not None:
+                profiler.record(exception_context.statement, exception_context.parameters, elapsed * 1000, error=True)
+
+
+engine = build_engine()
+instrument(engine.sync_engine)
 AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+async def get_driver_connection(session):
+    # Conexión asyncpg subyacente, dentro de la misma transacción que la sesión.
+    # El adaptador de SQLAlchemy abre la transacción de asyncpg en el primer execute: si la
+    # transacción actual aún no ejecutó nada se lanza un SELECT 1 para abrirla, de modo que
+    # las sentencias directas (COPY, VALUES, prepared statements) no se confirmen por separado
+    # y session.commit() / rollback() las cubran.
+    conn = await session.connection()
+    transaction = conn.get_transaction()
+    if conn.info.get("driver_transaction") is not transaction:
+        await conn.exec_driver_sql("SELECT 1")
+        conn.info["driver_transaction"] = transaction
+    raw = await conn.get_raw_connection()
+    return raw.driver_connection
+
 async def get_session():
     async with AsyncSessionLocal() as session:
         yield session
@@ -0,0 +1,204 @@
+# db/profiler.py
+import asyncio
+import functools
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from backend import config
+
+# Perfil de sentencias SQL por huella (fingerprint): el SQL normalizado sin literales ni
+# parámetros, de modo que `WHERE id = 1` y `WHERE id = 2` cuentan como la misma sentencia.
+# Se alimenta desde los eventos before/after_cursor_execute del engine y desde las consultas
+# registradas (asyncpg directo). Las sentencias por encima de QUERY_SLOW_MS se registran con
+# los nombres de sus parámetros y, si QUERY_EXPLAIN_SLOW, con el plan de un EXPLAIN (sin
+# ANALYZE: no ejecuta). Los valores (contraseñas, emails, tokens...) solo con QUERY_LOG_PARAMS;
+# sin él también se enmascaran las cadenas literales de los planes.
+BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+LINE_COMMENT = re.compile(r"--[^\n]*")
+STRING = re.compile(r"'(?:[^']|'')*'")
+PARAMETER = re.compile(r"\$\d+|(?<!:):\w+|%\(\w+\)s|%s")
+NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+WHITESPACE = re.compile(r"\s+")
+EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+MAX_PARAMS_CHARS = 500
+MAX_SQL_CHARS = 2000
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(sql):
+    sql = LINE_COMMENT.sub(" ", BLOCK_COMMENT.sub(" ", sql))
+    sql = STRING.sub("?", sql)
+    sql = PARAMETER.sub("?", sql)
+    sql = NUMBER.sub("?", sql)
+    sql = WHITESPACE.sub(" ", sql).strip().lower()
+    # IN (?, ?, ?) y VALUES (?), (?), ... de cualquier tamaño colapsan a una sola forma
+    return ROWS.sub("(?)", LIST.sub("(?)", sql))
+
+
+def format_params(parameters, names=None, reveal=False, executemany=False):
+    if reveal:
+        text = repr(parameters)
+        return text if len(text) <= MAX_PARAMS_CHARS else text[:MAX_PARAMS_CHARS] + "…"
+    if executemany:
+        return f"[{len(parameters or ())} filas]"
+    if isinstance(parameters, dict):
+        names = list(parameters)
+    if names:
+        return "(" + ", ".join(f"{name}=?" for name in names) + ")"
+    return f"({len(parameters or ())} parámetros)"
+
+
+def mask_literals(plan):
+    return STRING.sub("'?'", plan)
+
+
+class StatementStats:
+    def __init__(self, fingerprint, sql, window):
+        self.fingerprint = fingerprint
+        self.sql = sql[:MAX_SQL_CHARS]  # primer SQL real visto con esta huella
+        self.calls = 0
+        self.errors = 0
+        self.slow_calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent_ms = deque(maxlen=window)
+        self.plan = None
+        self.explained_at = 0.0
+
+    def record(self, elapsed_ms, error):
+        self.calls += 1
+        self.errors += error
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent_ms.append(elapsed_ms)
+
+    def snapshot(self):
+        recent = sorted(self.recent_ms)
+        pct = lambda p: round(recent[min(len(recent) - 1, int(len(recent) * p / 100))], 3) if recent else None
+        return {
+            "fingerprint": self.fingerprint,
+            "sql": self.sql,
+            "calls": self.calls,
+            "errors": self.errors,
+            "slow_calls": self.slow_calls,
+            "total_ms": round(self.total_ms, 2),
+            "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else None,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "plan": self.plan,
+        }
+
+
+class QueryProfiler:
+    def __init__(self, enabled=True, slow_ms=200.0, explain=False, explain_interval_sec=300,
+                 max_fingerprints=1000, window=1000, slow_log_size=100, log_params=False):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.log_params = log_params
+        self.explain_interval_sec = explain_interval_sec
+        self.max_fingerprints = max_fingerprints
+        self.window = window
+        self.evicted = 0
+        self.slow_log = deque(maxlen=slow_log_size)
+        self._stats = OrderedDict()
+        self._explains = set()
+
+    def record(self, statement, parameters, elapsed_ms, error=False, executemany=False, param_names=None):
+        if not self.enabled:
+            return
+        fp = fingerprint(statement)
+        stats = self._stats.get(fp)
+        if stats is None:
+            stats = self._stats[fp] = StatementStats(fp, statement, self.window)
+            # Acotado: se descarta la huella usada hace más tiempo
+            while len(self._stats) > self.max_fingerprints:
+                self._stats.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._stats.move_to_end(fp)
+        stats.record(elapsed_ms, error)
+        if elapsed_ms >= self.slow_ms:
+            self._slow(stats, statement, parameters, elapsed_ms, error, executemany, param_names)
+
+    def _slow(self, stats, statement, parameters, elapsed_ms, error, executemany, param_names):
+        stats.slow_calls += 1
+        params = format_params(parameters, param_names, self.log_params, executemany)
+        self.slow_log.append({
+            "at": datetime.utcnow().isoformat(),
+            "fingerprint": stats.fingerprint,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "error": error,
+            "sql": statement[:MAX_SQL_CHARS],
+            "params": params,
+        })
+        print(f"🐢 Slow query ({elapsed_ms:.1f} ms): {WHITESPACE.sub(' ', statement).strip()[:300]} params={params}")
+        if self.explain and not executemany and not error and self._explain_due(stats):
+            self._schedule_explain(stats, statement, parameters)
+
+    def _explain_due(self, stats):
+        now = time.monotonic()
+        if not stats.fingerprint.startswith(EXPLAINABLE) or now - stats.explained_at < self.explain_interval_sec:
+            return False
+        stats.explained_at = now
+        return True
+
+    def _schedule_explain(self, stats, statement, parameters):
+        # Los eventos de SQLAlchemy son síncronos: el EXPLAIN corre como tarea aparte en el loop
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._explain(stats, statement, parameters))
+        self._explains.add(task)
+        task.add_done_callback(self._explains.discard)
+
+    async def _explain(self, stats, statement, parameters):
+        from backend.db.postgres import engine
+        try:
+            # Conexión propia y asyncpg directo: el EXPLAIN no pasa por estos mismos hooks
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                rows = await raw.driver_connection.fetch(f"EXPLAIN {statement}", *(parameters or ()))
+            plan = "\n".join(row[0] for row in rows)
+            stats.plan = plan if self.log_params else mask_literals(plan)
+            print(f"🔎 Plan ({stats.fingerprint[:80]}):\n{stats.plan}")
+        except Exception as e:
+            stats.plan = f"EXPLAIN failed: {e}" if self.log_params else f"EXPLAIN failed: {type(e).__name__}"
+
+    def top(self, limit=20, order_by="total_ms"):
+        snapshots = [s.snapshot() for s in list(self._stats.values())]
+        snapshots.sort(key=lambda s: s[order_by] or 0, reverse=True)
+        return snapshots[:limit]
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "slow_ms": self.slow_ms,
+            "explain": self.explain,
+            "fingerprints": len(self._stats),
+            "evicted": self.evicted,
+            "calls": sum(s.calls for s in self._stats.values()),
+            "total_ms": round(sum(s.total_ms for s in self._stats.values()), 2),
+        }
+
+    def reset(self):
+        self._stats.clear()
+        self.slow_log.clear()
+        self.evicted = 0
+
+
+profiler = QueryProfiler(
+    enabled=config.QUERY_PROFILER_ENABLED,
+    slow_ms=config.QUERY_SLOW_MS,
+    explain=config.QUERY_EXPLAIN_SLOW,
+    explain_interval_sec=config.QUERY_EXPLAIN_INTERVAL_SEC,
+    max_fingerprints=config.QUERY_PROFILER_MAX_FINGERPRINTS,
+    window=config.QUERY_PROFILER_WINDOW,
+    log_params=config.QUERY_LOG_PARAMS,
+)
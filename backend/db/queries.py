@@ -0,0 +1,432 @@
+# db/queries.py
+import re
+import time
+from sqlalchemy import text
+from backend import config
+from backend import metrics
+from backend.db.profiler import profiler
+from backend.db.postgres import get_driver_connection
+
+# Registro central del SQL de las rutas: cada consulta se declara una vez, con parámetros
+# :nombre enlazados, y se ejecuta como prepared statement de asyncpg cacheado por conexión
+# (en conn.info, que vive lo mismo que la conexión física del pool).
+# Con POSTGRES_PGBOUNCER no se guardan prepared statements entre transacciones.
+# Las consultas paginadas por keyset tienen dos versiones (primera página / siguientes) elegidas
+# en Python: un `CAST(:x AS ...) IS NULL OR (...) < (...)` obliga al plan genérico que PostgreSQL
+# adopta tras cinco ejecuciones de un prepared statement a servir ambos casos, y deja de usar
+# el índice como condición de rango.
+
+QUERIES = {}
+PARAM = re.compile(r"(?<!:):(\w+)")
+
+
+class RegisteredQuery:
+    def __init__(self, name, sql):
+        self.name = name
+        self.sql = sql
+        self.param_names = []
+        self.positional_sql = PARAM.sub(self._positional, sql)
+        self.clause = text(sql)  # para APIs de SQLAlchemy como session.stream()
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _positional(self, match):
+        if match.group(1) not in self.param_names:
+            self.param_names.append(match.group(1))
+        return f"${self.param_names.index(match.group(1)) + 1}"
+
+    async def _statement(self, session):
+        raw = await get_driver_connection(session)
+        conn = await session.connection()
+        if config.POSTGRES_PGBOUNCER:
+            return await raw.prepare(self.positional_sql)
+        cache = conn.info.setdefault("prepared_statements", {})
+        stmt = cache.get(self.name)
+        if stmt is None:
+            stmt = cache[self.name] = await raw.prepare(self.positional_sql)
+        return stmt
+
+    async def fetch(self, session, **params):
+        start = time.perf_counter()
+        args = [params[p] for p in self.param_names]
+        error = False
+        try:
+            stmt = await self._statement(session)
+            return await stmt.fetch(*args)
+        except Exception:
+            error = True
+            self.errors += 1
+            (await session.connection()).info.get("prepared_statements", {}).pop(self.name, None)
+            raise
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            metrics.record_db(elapsed / 1000)
+            profiler.record(self.positional_sql, args, elapsed, error=error, param_names=self.param_names)
+            self.calls += 1
+            self.total_ms += elapsed
+            self.max_ms = max(self.max_ms, elapsed)
+
+    async def fetchrow(self, session, **params):
+        rows = await self.fetch(session, **params)
+        return rows[0] if rows else None
+
+    async def fetchval(self, session, **params):
+        row = await self.fetchrow(session, **params)
+        return row[0] if row else None
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 2),
+            "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else None,
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+def register(name, sql):
+    QUERIES[name] = RegisteredQuery(name, sql)
+    return QUERIES[name]
+
+
+def stats():
+    return {name: q.stats() for name, q in QUERIES.items() if q.calls}
+
+
+# === requirements_test.py ===
+
+REGISTER_USER = register("register_user", """
+    INSERT INTO app_user (name, last_name, username, email, password_hash, role)
+    VALUES (:name, :last_name, :username, :email, :password_hash, 'user')
+""")
+
+INSERT_VIDEO = register("insert_video", """
+    INSERT INTO video (creator_id, title, description, duration, visibility)
+    VALUES (:creator_id, :title, :description, :duration, :visibility)
+    RETURNING video_id, creator_id, title, description, duration, upload_datetime, visibility
+""")
+
+ENQUEUE_OUTBOX = register("enqueue_outbox", """
+    INSERT INTO firestore_outbox (collection, document_id, payload)
+    VALUES (:collection, :document_id, CAST(:payload AS JSONB))
+""")
+
+OUTBOX_PENDING = register("outbox_pending", """
+    SELECT COUNT(*) FROM firestore_outbox WHERE processed_at IS NULL AND failed_at IS NULL
+""")
+
+VIDEO_CREATORS = register("video_creators", """
+    SELECT video_id, creator_id FROM video WHERE video_id = ANY(:ids)
+""")
+
+FOLLOW_CREATOR = register("follow_creator", """
+    INSERT INTO follow (follower_id, followed_id)
+    VALUES (:follower_id, :followed_id)
+    ON CONFLICT (follower_id, followed_id) DO NOTHING
+    RETURNING id
+""")
+
+UNFOLLOW_CREATOR = register("unfollow_creator", """
+    DELETE FROM follow
+    WHERE follower_id = :follower_id AND followed_id = :followed_id
+    RETURNING id
+""")
+
+SOCIAL_COUNTS = register("social_counts", """
+    SELECT followers, following FROM social_counts WHERE user_id = :user_id
+""")
+
+IS_FOLLOWING = register("is_following", """
+    SELECT EXISTS (SELECT 1 FROM follow WHERE follower_id = :follower_id AND followed_id = :followed_id)
+""")
+
+FOLLOWERS_OF = register("followers_of", """
+    SELECT follower_id FROM follow WHERE followed_id = :creator_id
+""")
+
+SEARCH_FULLTEXT = register("search_fulltext", """
+    SELECT video_id, title, description, upload_datetime,
+           ts_rank_cd(search_vector, to_tsquery('english', :tsquery)) AS rank
+    FROM video
+    WHERE search_vector @@ to_tsquery('english', :tsquery)
+    ORDER BY rank DESC, video_id DESC
+    LIMIT :limit
+""")
+
+SEARCH_FULLTEXT_AFTER = register("search_fulltext_after", """
+    SELECT video_id, title, description, upload_datetime, rank
+    FROM (
+        SELECT video_id, title, description, upload_datetime,
+               ts_rank_cd(search_vector, to_tsquery('english', :tsquery)) AS rank
+        FROM video
+        WHERE search_vector @@ to_tsquery('english', :tsquery)
+    ) ranked
+    WHERE (rank, video_id) < (CAST(:after_rank AS real), :after_id)
+    ORDER BY rank DESC, video_id DESC
+    LIMIT :limit
+""")
+
+SEARCH_SUBSTRING = register("search_substring", """
+    SELECT video_id, title, description, upload_datetime
+    FROM video
+    WHERE title ILIKE :keyword OR description ILIKE :keyword
+    ORDER BY upload_datetime DESC, video_id DESC
+    LIMIT :limit
+""")
+
+SEARCH_SUBSTRING_AFTER = register("search_substring_after", """
+    SELECT video_id, title, description, upload_datetime
+    FROM video
+    WHERE (title ILIKE :keyword OR description ILIKE :keyword)
+      AND (upload_datetime, video_id) < (CAST(:after_datetime AS timestamp), :after_id)
+    ORDER BY upload_datetime DESC, video_id DESC
+    LIMIT :limit
+""")
+
+REPORT_VIDEO = register("report_video", """
+    INSERT INTO contentreport (video_id, reporter_id, reason)
+    VALUES (:video_id, :reporter_id, :reason)
+""")
+
+CREATE_CAMPAIGN = register("create_campaign", """
+    INSERT INTO campaign (advertiser_id, budget, start_date, end_date, targeting_criteria)
+    VALUES (:advertiser_id, :budget, NOW(), NOW() + INTERVAL '30 days', :targeting_criteria)
+""")
+
+# Resumen mantenido por triggers (migrations/V006): una fila por campaña
+CAMPAIGN_ANALYTICS = register("campaign_analytics", """
+    SELECT c.campaign_id, c.budget, c.start_date, c.end_date,
+           COALESCE(s.transactions, 0) AS transactions,
+           COALESCE(s.total_spent, 0) AS total_spent
+    FROM campaign c
+    LEFT JOIN campaign_stats s ON s.campaign_id = c.campaign_id
+    WHERE c.advertiser_id = :advertiser_id
+    ORDER BY c.campaign_id
+""")
+
+# fresh=true: agregado en vivo sobre las transacciones atribuidas a cada campaña
+CAMPAIGN_ANALYTICS_FRESH = register("campaign_analytics_fresh", """
+    SELECT c.campaign_id, c.budget, c.start_date, c.end_date,
+           COUNT(t.transaction_id) AS transactions,
+           COALESCE(SUM(t.amount), 0) AS total_spent
+    FROM campaign c
+    LEFT JOIN transaction t ON t.campaign_id = c.campaign_id
+    WHERE c.advertiser_id = :advertiser_id
+    GROUP BY c.campaign_id
+    ORDER BY c.campaign_id
+""")
+
+CREATOR_VIDEO_TOTALS = register("creator_video_totals", """
+    SELECT COUNT(*) AS total_videos, COALESCE(AVG(duration), 0) AS avg_duration
+    FROM video
+    WHERE creator_id = :creator_id
+""")
+
+# === feed.py ===
+
+FOLLOWER_COUNT = register("follower_count", """
+    SELECT COALESCE((SELECT followers FROM social_counts WHERE user_id = :creator_id), 0)
+""")
+
+FOLLOWERS_PAGE = register("followers_page", """
+    SELECT follower_id
+    FROM follow
+    WHERE followed_id = :creator_id AND follower_id > :after_id
+    ORDER BY follower_id
+    LIMIT :limit
+""")
+
+ENQUEUE_FANOUT = register("enqueue_fanout", """
+    INSERT INTO feed_fanout_queue (video_id, creator_id)
+    VALUES (:video_id, :creator_id)
+    ON CONFLICT (video_id) DO NOTHING
+""")
+
+# El video más antiguo sin lease vigente; SKIP LOCKED reparte la cola entre workers
+CLAIM_FANOUT = register("claim_fanout", """
+    UPDATE feed_fanout_queue
+    SET claimed_until = clock_timestamp() + make_interval(secs => :lease_sec)
+    WHERE video_id = (
+        SELECT video_id FROM feed_fanout_queue
+        WHERE claimed_until IS NULL OR claimed_until < clock_timestamp()
+        ORDER BY video_id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING video_id, creator_id, after_id
+""")
+
+FANOUT_PROGRESS = register("fanout_progress", """
+    UPDATE feed_fanout_queue
+    SET after_id = :after_id, claimed_until = clock_timestamp() + make_interval(secs => :lease_sec)
+    WHERE video_id = :video_id
+""")
+
+RELEASE_FANOUT = register("release_fanout", """
+    UPDATE feed_fanout_queue SET claimed_until = NULL WHERE video_id = :video_id
+""")
+
+FINISH_FANOUT = register("finish_fanout", """
+    DELETE FROM feed_fanout_queue WHERE video_id = :video_id
+""")
+
+FANOUT_PENDING = register("fanout_pending", """
+    SELECT COUNT(*) FROM feed_fanout_queue
+""")
+
+MARK_CELEBRITY = register("mark_celebrity", """
+    INSERT INTO feed_celebrity (creator_id, followers)
+    VALUES (:creator_id, :followers)
+    ON CONFLICT (creator_id) DO UPDATE SET followers = EXCLUDED.followers, updated_at = NOW()
+""")
+
+UNENQUEUE_FANOUT = register("enqueue_fanout", """
+    INSERT INTO feed_fanout_queue (video_id, creator_id)
+    VALUES (:video_id, :creator_id)
+    ON CONFLICT (video_id) DO NOTHING
+""")
+
+# El video más antiguo sin lease vigente; SKIP LOCKED reparte la cola entre workers
+CLAIM_FANOUT = register("claim_fanout", """
+    UPDATE feed_fanout_queue
+    SET claimed_until = clock_timestamp() + make_interval(secs => :lease_sec)
+    WHERE video_id = (
+        SELECT video_id FROM feed_fanout_queue
+        WHERE claimed_until IS NULL OR claimed_until < clock_timestamp()
+        ORDER BY video_id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING video_id, creator_id, after_id
+""")
+
+FANOUT_PROGRESS = register("fanout_progress", """
+    UPDATE feed_fanout_queue
+    SET after_id = :after_id, claimed_until = clock_timestamp() + make_interval(secs => :lease_sec)
+    WHERE video_id = :video_id
+""")
+
+RELEASE_FANOUT = register("release_fanout", """
+    UPDATE feed_fanout_queue SET claimed_until = NULL WHERE video_id = :video_id
+""")
+
+FINISH_FANOUT = register("finish_fanout", """
+    DELETE FROM feed_fanout_queue WHERE video_id = :video_id
+""")
+
+FANOUT_PENDING = register("fanout_pending", """
+    SELECT COUNT(*) FROM feed_fanout_queue
+""")
+
+MARK_CELEBRITY = register("unmark_celebrity", """
+    DELETE FROM feed_celebrity WHERE creator_id = :creator_id
+""")
+
+# Fan-out-on-read: últimos videos de los creadores célebres que sigue el usuario
+FEED_CELEBRITY_VIDEOS = register("feed_celebrity_videos", """
+    SELECT r.video_id
+    FROM follow f
+    JOIN feed_celebrity c ON c.creator_id = f.followed_id
+    CROSS JOIN LATERAL (
+        SELECT v.video_id
+        FROM video v
+        WHERE v.creator_id = f.followed_id AND v.visibility <> 'private'
+        ORDER BY v.video_id DESC
+        LIMIT :limit
+    ) r
+    WHERE f.follower_id = :user_id
+    ORDER BY r.video_id DESC
+    LIMIT :limit
+""")
+
+# === performance.py ===
+
+RESERVE_INDEX_RANGE = register("reserve_index_range", """
+    UPDATE index_allocator
+    SET next_value = next_value + :count
+    WHERE name = :name
+    RETURNING next_value - :count
+""")
+
+RETRIEVE_USERS = register("retrieve_users", """
+    SELECT user_id, username, email, role
+    FROM app_user
+    ORDER BY user_id
+    LIMIT :batch_size
+""")
+
+RETRIEVE_USERS_AFTER = register("retrieve_users_after", """
+    SELECT user_id, username, email, role
+    FROM app_user
+    WHERE user_id > :after_user_id
+    ORDER BY user_id
+    LIMIT :batch_size
+""")
+
+EXPORT_USERS = register("export_users", """
+    SELECT user_id, username, email, role
+    FROM app_user
+    ORDER BY user_id
+""")
+
+EXPORT_USERS_AFTER = register("export_users_after", """
+    SELECT user_id, username, email, role
+    FROM app_user
+    WHERE user_id > :after_user_id
+    ORDER BY user_id
+""")
+
+TRENDING_PAGE = register("trending_page", """
+    SELECT video_id, title, upload_datetime, visibility, creator_username
+    FROM trending_video
+    WHERE upload_datetime >= NOW() - INTERVAL '7 days'
+    ORDER BY upload_datetime DESC, video_id DESC
+    LIMIT :limit
+""")
+
+TRENDING_PAGE_AFTER = register("trending_page_after", """
+    SELECT video_id, title, upload_datetime, visibility, creator_username
+    FROM trending_video
+    WHERE upload_datetime >= NOW() - INTERVAL '7 days'
+      AND (upload_datetime, video_id) < (CAST(:after_datetime AS timestamp), :after_id)
+    ORDER BY upload_datetime DESC, video_id DESC
+    LIMIT :limit
+""")
+
+TRENDING_COUNT = register("trending_count", """
+    SELECT COUNT(*) FROM trending_video WHERE upload_datetime >= NOW() - INTERVAL '7 days'
+""")
+
+TRENDING_PRUNE = register("trending_prune", """
+    DELETE FROM trending_video WHERE upload_datetime < NOW() - INTERVAL '7 days'
+""")
+
+OUTBOX_LOAD_INSERT = register("outbox_load_insert", """
+    WITH v AS (
+        INSERT INTO video (creator_id, title, description, duration, visibility)
+        SELECT (SELECT user_id FROM app_user WHERE role = 'creator' LIMIT 1),
+               'outbox_load_' || g, 'replication lag test', 60, 'public'
+        FROM generate_series(1, :n) AS g
+        RETURNING video_id, creator_id, title, description, duration, upload_datetime, visibility
+    )
+    INSERT INTO firestore_outbox (collection, document_id, payload)
+    SELECT 'Videos', v.video_id::text, jsonb_build_object(
+        'creator_id', v.creator_id, 'title', v.title, 'description', v.description,
+        'duration', v.duration, 'upload_datetime', v.upload_datetime, 'visibility', v.visibility)
+    FROM v
+    RETURNING outbox_id
+""")
+
+OUTBOX_LOAD_PENDING = register("outbox_load_pending", """
+    SELECT COUNT(*) FROM firestore_outbox WHERE outbox_id = ANY(:ids) AND processed_at IS NULL AND failed_at IS NULL
+""")
+
+OUTBOX_LOAD_LAG = register("outbox_load_lag", """
+    SELECT
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM (processed_at - created_at))) * 1000 AS lag_p50,
+        percentile_cont(0.99) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM (processed_at - created_at))) * 1000 AS lag_p99
+    FROM firestore_outbox
+    WHERE outbox_id = ANY(:ids) AND processed_at IS NOT NULL
+""")
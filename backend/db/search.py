@@ -0,0 +1,68 @@
+# db/search.py
+import base64
+import binascii
+import json
+import re
+from datetime import datetime
+from backend.db import queries
+
+# Búsqueda de videos (índices en migrations/V002__video_search.sql):
+#   fulltext:  search_vector @@ tsquery con prefijos, ordenado por ts_rank_cd
+#   substring: ILIKE '%kw%' sobre título/descripción (GIN de trigramas), ordenado por fecha
+# Paginación por cursor (keyset): el cursor codifica la clave de orden de la última fila.
+SEARCH_MODES = ("fulltext", "substring")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def to_prefix_tsquery(keyword):
+    # "gam tut" -> "gam:* & tut:*" (coincide mientras se escribe)
+    words = re.findall(r"\w+", keyword)
+    return " & ".join(f"{w}:*" for w in words)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+def decode_cursor(cursor, mode):
+    # -> (clave de orden, video_id); el cursor llega del cliente: cualquier forma inesperada
+    # (base64/JSON roto, otro modo, tipos) es InvalidCursor y no un error al enlazar parámetros
+    if not cursor:
+        return None
+    try:
+        key, video_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        key = float(key) if mode == "fulltext" else datetime.fromisoformat(key).isoformat()
+        return key, int(video_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor for mode {mode!r}") from e
+
+
+async def search_videos(session, keyword, mode="fulltext", limit=20, cursor=None):
+    after = decode_cursor(cursor, mode)
+    if mode == "fulltext":
+        tsquery = to_prefix_tsquery(keyword)
+        if not tsquery:
+            return [], None
+        query = queries.SEARCH_FULLTEXT_AFTER if after else queries.SEARCH_FULLTEXT
+        rows = await query.fetch(
+            session,
+            tsquery=tsquery,
+            after_rank=after[0] if after else None,
+            after_id=after[1] if after else None,
+            limit=limit
+        )
+        next_cursor = encode_cursor([rows[-1]["rank"], rows[-1]["video_id"]]) if len(rows) == limit else None
+    else:
+        query = queries.SEARCH_SUBSTRING_AFTER if after else queries.SEARCH_SUBSTRING
+        rows = await query.fetch(
+            session,
+            keyword=f"%{keyword}%",
+            after_datetime=datetime.fromisoformat(after[0]) if after else None,
+            after_id=after[1] if after else None,
+            limit=limit
+        )
+        next_cursor = encode_cursor([rows[-1]["upload_datetime"].isoformat(), rows[-1]["video_id"]]) if len(rows) == limit else None
+    return [dict(r) for r in rows], next_cursor
@@ -0,0 +1,70 @@
+# db/social.py
+from collections import OrderedDict
+from backend.cache import LRUCache
+from backend.db import queries
+
+# Grafo social sobre follow (migrations/V008): un follow por par y contadores en social_counts
+# mantenidos por triggers en la misma transacción. Ninguna lectura recorre follow:
+#   - conteos: lectura por clave primaria de social_counts
+#   - "¿A sigue a B?": conjunto de seguidores de B en una caché LRU si B es un creador caliente,
+#     y si no una búsqueda puntual en el índice único (follower_id, followed_id)
+# La caché es por proceso; los cambios hechos en este proceso se aplican al momento
+# y los de otros workers se ven al expirar la entrada (ADJACENCY_TTL_SEC).
+ADJACENCY_CACHE_SIZE = 1000
+ADJACENCY_TTL_SEC = 60
+ADJACENCY_MAX_FOLLOWERS = 50000  # por encima, el conjunto no compensa frente a la búsqueda puntual
+HOT_CREATOR_LOOKUPS = 3  # búsquedas puntuales antes de cargar el conjunto de seguidores
+
+adjacency = LRUCache(ADJACENCY_CACHE_SIZE, ADJACENCY_TTL_SEC)
+_lookups = OrderedDict()  # creador -> búsquedas puntuales recientes (acotado como la caché)
+
+
+async def follow(session, follower_id, followed_id):
+    created = await queries.FOLLOW_CREATOR.fetchrow(session, follower_id=follower_id, followed_id=followed_id) is not None
+    await session.commit()
+    followers = adjacency.peek(followed_id)
+    if created and followers is not None:
+        followers.add(follower_id)
+    return created
+
+
+async def unfollow(session, follower_id, followed_id):
+    deleted = await queries.UNFOLLOW_CREATOR.fetchrow(session, follower_id=follower_id, followed_id=followed_id) is not None
+    await session.commit()
+    followers = adjacency.peek(followed_id)
+    if deleted and followers is not None:
+        followers.discard(follower_id)
+    return deleted
+
+
+async def counts(session, user_id):
+    row = await queries.SOCIAL_COUNTS.fetchrow(session, user_id=user_id)
+    return {"followers": row["followers"] if row else 0, "following": row["following"] if row else 0}
+
+
+def _is_hot(creator_id):
+    _lookups[creator_id] = _lookups.get(creator_id, 0) + 1
+    _lookups.move_to_end(creator_id)
+    while len(_lookups) > ADJACENCY_CACHE_SIZE * 10:
+        _lookups.popitem(last=False)
+    return _lookups[creator_id] >= HOT_CREATOR_LOOKUPS
+
+
+async def is_following(session, follower_id, followed_id):
+    # Devuelve (sigue, fuente)
+    followers = adjacency.get(followed_id)
+    if followers is not None:
+        return follower_id in followers, "cache"
+
+    if _is_hot(followed_id) and (await counts(session, followed_id))["followers"] <= ADJACENCY_MAX_FOLLOWERS:
+        rows = await queries.FOLLOWERS_OF.fetch(session, creator_id=followed_id)
+        followers = {r["follower_id"] for r in rows}
+        adjacency.put(followed_id, followers)
+        _lookups.pop(followed_id, None)
+        return follower_id in followers, "loaded"
+
+    return await queries.IS_FOLLOWING.fetchval(session, follower_id=follower_id, followed_id=followed_id), "index"
+
+
+def stats():
+    return {**adjacency.stats(), "tracked_creators": len(_lookups)}
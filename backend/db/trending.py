@@ -0,0 +1,43 @@
+# db/trending.py
+import time
+from datetime import datetime
+from backend.db import queries
+from backend.cache import TTLCache
+from backend.db.search import encode_cursor, decode_cursor
+
+# Trending servido desde trending_video (migrations/V004), mantenida por triggers sobre video,
+# con las páginas cacheadas en proceso: bajo carga casi todas las peticiones no tocan la base.
+TRENDING_TTL_SEC = 5
+PRUNE_INTERVAL_SEC = 300
+
+cache = TTLCache(TRENDING_TTL_SEC)
+_last_prune = 0.0
+
+async def prune(session):
+    # Los triggers no ven el paso del tiempo: se descartan periódicamente las filas fuera de la ventana
+    global _last_prune
+    if time.monotonic() - _last_prune < PRUNE_INTERVAL_SEC:
+        return
+    _last_prune = time.monotonic()
+    await queries.TRENDING_PRUNE.fetch(session)
+    await session.commit()
+
+
+async def load_page(session, limit, cursor):
+    await prune(session)
+    after = decode_cursor(cursor)
+    query = queries.TRENDING_PAGE_AFTER if after else queries.TRENDING_PAGE
+    rows = await query.fetch(
+        session,
+        after_datetime=datetime.fromisoformat(after[0]) if after else None,
+        after_id=after[1] if after else None,
+        limit=limit
+    )
+    rows = [dict(r) for r in rows]
+    total = await queries.TRENDING_COUNT.fetchval(session) if cursor is None else None
+    next_cursor = encode_cursor([rows[-1]["upload_datetime"].isoformat(), rows[-1]["video_id"]]) if len(rows) == limit else None
+    return {"total_results": total, "results": rows, "next_cursor": next_cursor}
+
+
+async def get_page(session, limit=10, cursor=None):
+    return await cache.get_or_load((limit, cursor), lambda: load_page(session, limit, cursor))
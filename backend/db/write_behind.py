@@ -0,0 +1,516 @@
+# db/write_behind.py
+import asyncio
+import fcntl
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from collections import OrderedDict, deque, namedtuple
+from datetime import datetime
+from google.api_core import exceptions as google_exceptions
+from backend import config
+from backend.db import counters
+from backend.db.firebase import db as firebase_db, run as fs_run
+from backend.db.postgres import AsyncSessionLocal
+
+# Buffer write-behind para interacciones de alta frecuencia (likes, vistas, comentarios):
+# los endpoints encolan el evento y responden; un flusher los agrupa en WriteBatch de hasta
+# 500 documentos cuando se llena el lote o vence el intervalo.
+#   - Backpressure: cola acotada; submit() espera hasta BACKPRESSURE_TIMEOUT y luego falla.
+#   - Contadores: el endpoint encola (None, video_id, métrica, ts) sin consultar PostgreSQL; el
+#     flusher resuelve el creador desde un LRU y, para los que faltan, con una consulta por lote.
+#   - Recuperación: cada evento se anota en un log local (segmentos JSONL) antes de aceptarlo;
+#     un checkpoint guarda el último seq confirmado y al arrancar se reencolan los posteriores.
+#     Cada proceso (uvicorn --workers N) escribe en su propio directorio worker-{pid}-{id}
+#     bajo WRITE_BEHIND_LOG_DIR, con un flock exclusivo mientras vive. Al arrancar, los
+#     directorios cuyo lock está libre (workers que ya no existen) se adoptan: sus eventos
+#     pendientes se reescriben en el log propio con seq nuevos y el directorio se borra.
+#   - Idempotencia: cada evento se escribe con create() sobre un ID fijo, en el mismo WriteBatch
+#     (atómico) que sus incrementos de contadores, así que el documento marca que el evento ya
+#     se aplicó. Si se repite un lote (commit ambiguo que sí se aplicó, caída antes del
+#     checkpoint, replay) falla entero con AlreadyExists; se prueba evento por evento y los que
+#     ya existen se omiten: ni el documento ni su Increment se aplican dos veces.
+#   - Errores transitorios (Firestore caído, deadline, cuota...): el lote se reintenta sin límite
+#     con backoff exponencial acotado y el checkpoint no avanza; una caída de Firestore solo
+#     retrasa la cola. Errores permanentes (InvalidArgument): se prueba evento por evento y los
+#     que siguen fallando pasan a dead-letter.log y el checkpoint avanza: un evento inválido no
+#     bloquea la cola. replay_dead_letter() los reencola (POST /admin/write-behind/replay-dead-letter
+#     o WRITE_BEHIND_REPLAY_DEAD_LETTER al arrancar) una vez corregida la causa; cada worker
+#     reencola el de su directorio, que incluye el de los directorios que adoptó.
+#   - Al apagar FastAPI se drena la cola antes de cerrar; si todo quedó confirmado y no hay
+#     dead-letter, el directorio del worker se borra.
+FIRESTORE_BATCH_LIMIT = 500
+SEGMENT_EVENTS = 50000
+FLUSH_ERROR_BACKOFF_SEC = 1.0
+FLUSH_ERROR_BACKOFF_MAX_SEC = 30.0
+DEAD_LETTER_FILE = "dead-letter.log"
+CHECKPOINT_FILE = "checkpoint"
+WORKER_PREFIX = "worker-"
+LOCK_FILE = "lock"
+ADOPT_LOCK_FILE = "adopt.lock"
+REPLAY_SUFFIX = ".replay"
+MAX_PATH_SEGMENT_BYTES = 1500
+CREATOR_CACHE_SIZE = 10000  # video_id -> creator_id (un video no cambia de creador)
+RESERVED_ID = re.compile(r"^__.*__$")
+
+Event = namedtuple("Event", "seq path doc_id data counter")
+# Errores que no se arreglan reintentando el mismo commit; todo lo demás se trata como transitorio
+PERMANENT_ERRORS = (google_exceptions.InvalidArgument, ValueError, TypeError)
+# El lote incluye un evento que ya estaba escrito (ver create() en commit_events)
+ALREADY_APPLIED = google_exceptions.AlreadyExists
+
+
+class BufferFull(Exception):
+    pass
+
+
+class InvalidEvent(ValueError):
+    pass
+
+
+def validate_segment(segment, what):
+    if not segment or segment in (".", "..") or "/" in segment or RESERVED_ID.match(segment):
+        raise InvalidEvent(f"Invalid Firestore {what}: {segment!r}")
+    if len(segment.encode("utf-8")) > MAX_PATH_SEGMENT_BYTES:
+        raise InvalidEvent(f"Firestore {what} longer than {MAX_PATH_SEGMENT_BYTES} bytes")
+
+
+def validate_target(path, doc_id):
+    # Ruta de colección: segmentos alternos colección/documento, en número impar
+    segments = path.split("/")
+    if len(segments) % 2 == 0:
+        raise InvalidEvent(f"Invalid Firestore collection path: {path!r}")
+    for segment in segments:
+        validate_segment(segment, "path segment")
+    validate_segment(doc_id, "document id")
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    raise TypeError(f"Not serializable: {type(value).__name__}")
+
+
+def _decode(obj):
+    return datetime.fromisoformat(obj["$dt"]) if set(obj) == {"$dt"} else obj
+
+
+def try_lock(path):
+    # flock exclusivo no bloqueante; None si otro proceso vivo lo tiene. Se libera al cerrar
+    # el archivo o al morir el proceso.
+    f = open(path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def read_checkpoint(log_dir):
+    try:
+        with open(os.path.join(log_dir, CHECKPOINT_FILE)) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def read_pending(log_dir):
+    # Eventos del log de un worker posteriores a su checkpoint, en orden
+    checkpoint = read_checkpoint(log_dir)
+    pending = []
+    for name in sorted(n for n in os.listdir(log_dir) if n.startswith("wb-")):
+        with open(os.path.join(log_dir, name)) as f:
+            for line in f:
+                try:
+                    event = Event(**json.loads(line, object_hook=_decode))
+                except ValueError:
+                    break  # línea truncada por la caída
+                if event.seq > checkpoint:
+                    pending.append(event)
+    return pending
+
+
+def plan_chunks(events):
+    # Trozos que caben en un WriteBatch: documentos + un incremento por bucket distinto
+    chunks, current, buckets = [], [], set()
+    for event in events:
+        keys = set(counters.count_events([tuple(event.counter)])) if event.counter else set()
+        if current and len(current) + 1 + len(buckets | keys) > FIRESTORE_BATCH_LIMIT:
+            chunks.append(current)
+            current, buckets = [], set()
+        current.append(event)
+        buckets |= keys
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def commit_events(events):
+    # Documentos e incrementos en un solo commit atómico (events ya viene de plan_chunks)
+    batch = firebase_db.batch()
+    for event in events:
+        batch.create(firebase_db.collection(event.path).document(event.doc_id), event.data)
+    counters.add_increments(batch, counters.count_events(tuple(e.counter) for e in events if e.counter))
+    batch.commit()
+
+
+class WriteBehindBuffer:
+    def __init__(self, base_dir, batch_size=FIRESTORE_BATCH_LIMIT, flush_interval_ms=200,
+                 max_pending=50000, backpressure_timeout_sec=2.0, replay_dead_letter=False):
+        self.base_dir = base_dir
+        self.log_dir = None  # directorio propio, se crea en start()
+        self.replay_on_start = replay_dead_letter
+        self.batch_size = min(batch_size, FIRESTORE_BATCH_LIMIT)
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.backpressure_timeout = backpressure_timeout_sec
+        self.submitted = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+        self.recovered = 0
+        self.dead_lettered = 0
+        self.replayed = 0
+        self.duplicates = 0
+        self.flush_ms = deque(maxlen=1000)
+        self._queue = None
+        self._task = None
+        self._stopping = None
+        self._lock = None
+        self._seq = 0
+        self._segment = None
+        self._segment_count = 0
+        self._closed_segments = deque()  # (ruta, último seq)
+        self._creators = OrderedDict()  # LRU video_id -> creator_id
+
+    # === log de recuperación ===
+
+    def _write_checkpoint(self, seq):
+        path = os.path.join(self.log_dir, CHECKPOINT_FILE)
+        with open(path + ".tmp", "w") as f:
+            f.write(str(seq))
+        os.replace(path + ".tmp", path)
+        while self._closed_segments and self._closed_segments[0][1] <= seq:
+            os.remove(self._closed_segments.popleft()[0])
+
+    def _dead_letter(self, event, error):
+        # Se fuerza a disco antes de avanzar el checkpoint: el evento no se pierde
+        with open(os.path.join(self.log_dir, DEAD_LETTER_FILE), "a") as f:
+            f.write(json.dumps({**event._asdict(), "error": str(error)[:500]}, default=_encode) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.dead_lettered += 1
+
+    def _read_dead_letter(self, path):
+        events = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line, object_hook=_decode)
+                except ValueError:
+                    continue  # línea truncada por una caída
+                record.pop("error", None)
+                events.append(Event(**record))
+        return events
+
+    def _open_segment(self, first_seq):
+        if self._segment:
+            self._segment.close()
+            self._closed_segments.append((self._segment.name, first_seq - 1))
+        # Line buffering: cada evento llega al sistema operativo antes de confirmar la petición
+        path = os.path.join(self.log_dir, f"wb-{first_seq:012d}.log")
+        self._segment = open(path, "a", buffering=1)
+        self._segment_count = 0
+
+    def _log(self, event):
+        if self._segment_count >= SEGMENT_EVENTS:
+            self._open_segment(event.seq)
+        self._segment.write(json.dumps(event._asdict(), default=_encode) + "\n")
+        self._segment_count += 1
+
+    def _adopt(self, log_dir):
+        # Pasa los eventos pendientes y el dead-letter de otro directorio al propio (con fsync)
+        # antes de que el llamador lo borre; una caída a medias solo repite eventos ya escritos
+        events = []
+        for event in read_pending(log_dir):
+            self._seq += 1
+            event = event._replace(seq=self._seq)
+            self._log(event)
+            events.append(event)
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        dead_letters = sorted(n for n in os.listdir(log_dir) if n.startswith(DEAD_LETTER_FILE))
+        if dead_letters:
+            with open(os.path.join(self.log_dir, DEAD_LETTER_FILE), "a") as out:
+                for name in dead_letters:
+                    with open(os.path.join(log_dir, name)) as f:
+                        shutil.copyfileobj(f, out)
+                out.flush()
+                os.fsync(out.fileno())
+        return events
+
+    def _claim_log_dir(self):
+        # Crea y bloquea el directorio propio y adopta los huérfanos. adopt.lock serializa los
+        # arranques: nadie adopta un directorio recién creado antes de que su dueño lo bloquee.
+        os.makedirs(self.base_dir, exist_ok=True)
+        recovered = []
+        with open(os.path.join(self.base_dir, ADOPT_LOCK_FILE), "a") as adopt:
+            fcntl.flock(adopt, fcntl.LOCK_EX)
+            self.log_dir = os.path.join(self.base_dir, f"{WORKER_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}")
+            os.makedirs(self.log_dir)
+            self._lock = try_lock(os.path.join(self.log_dir, LOCK_FILE))
+            self._open_segment(1)
+            for name in sorted(os.listdir(self.base_dir)):
+                path = os.path.join(self.base_dir, name)
+                if not name.startswith(WORKER_PREFIX) or path == self.log_dir or not os.path.isdir(path):
+                    continue
+                lock = try_lock(os.path.join(path, LOCK_FILE))
+                if lock is None:
+                    continue  # worker vivo
+                try:
+                    recovered += self._adopt(path)
+                    shutil.rmtree(path)
+                finally:
+                    lock.close()
+            # Log de versiones anteriores, directamente en WRITE_BEHIND_LOG_DIR
+            legacy = [n for n in os.listdir(self.base_dir)
+                      if n.startswith(("wb-", DEAD_LETTER_FILE)) or n == CHECKPOINT_FILE]
+            if legacy:
+                recovered += self._adopt(self.base_dir)
+                for name in legacy:
+                    os.remove(os.path.join(self.base_dir, name))
+        return recovered
+
+    # === ciclo de vida ===
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        recovered = self._claim_log_dir()
+        for event in recovered:
+            self._queue.put_nowait(event)
+        self.recovered = len(recovered)
+        if recovered:
+            print(f"♻️ Write-behind: {len(recovered)} eventos recuperados del log")
+        self._task = asyncio.create_task(self._loop())
+        if self.replay_on_start:
+            await self.replay_dead_letter()
+
+    async def stop(self):
+        # Drena la cola; lo que no se pueda confirmar queda en el log para el próximo arranque
+        if self._task:
+            self._stopping.set()
+            await self._task
+        if self._segment:
+            self._segment.close()
+        if self._lock:
+            # Todo confirmado y sin dead-letter: el directorio ya no hace falta. Si no, queda
+            # (sin lock) para que lo adopte el próximo worker que arranque.
+            if read_checkpoint(self.log_dir) >= self._seq and not any(
+                    n.startswith(DEAD_LETTER_FILE) for n in os.listdir(self.log_dir)):
+                shutil.rmtree(self.log_dir)
+            self._lock.close()
+            self._lock = None
+
+    # === productores ===
+
+    async def submit(self, path, doc_id, data, counter=None):
+        # Backpressure: con la cola llena se espera a que el flusher libere espacio
+        if self._queue.qsize() >= self.max_pending:
+            deadline = time.monotonic() + self.backpressure_timeout
+            while self._queue.qsize() >= self.max_pending:
+                if time.monotonic() >= deadline:
+                    self.rejected += 1
+                    raise BufferFull(f"Write-behind buffer full ({self.max_pending} pending events)")
+                await asyncio.sleep(self.flush_interval / 10)
+        doc_id = str(doc_id)
+        validate_target(path, doc_id)
+        self._seq += 1
+        event = Event(self._seq, path, doc_id, data, counter)
+        self._log(event)
+        self._queue.put_nowait(event)
+        self.submitted += 1
+        return event.seq
+
+    async def replay_dead_letter(self):
+        # Reencola dead-letter.log con seq nuevos (pasan por el log de recuperación como cualquier
+        # evento). El archivo se renombra antes: lo que falle de nuevo va a un dead-letter limpio,
+        # y un .replay que quedó de un intento interrumpido se reintenta primero.
+        path = os.path.join(self.log_dir, DEAD_LETTER_FILE)
+        replays = sorted(n for n in os.listdir(self.log_dir) if n.startswith(DEAD_LETTER_FILE + "."))
+        if os.path.exists(path):
+            name = f"{DEAD_LETTER_FILE}.{time.time_ns()}{REPLAY_SUFFIX}"
+            os.replace(path, os.path.join(self.log_dir, name))
+            replays.append(name)
+        replayed = 0
+        for name in replays:
+            replay_path = os.path.join(self.log_dir, name)
+            for event in self._read_dead_letter(replay_path):
+                try:
+                    await self.submit(event.path, event.doc_id, event.data, event.counter)
+                except InvalidEvent as e:
+                    print(f"☠️ Write-behind: evento {event.seq} descartado en el replay: {e}")
+                    continue
+                replayed += 1
+            os.remove(replay_path)
+        self.replayed += replayed
+        if replayed:
+            print(f"♻️ Write-behind: {replayed} eventos reencolados desde dead-letter")
+        return replayed
+
+    # === flusher ===
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                deadline = deadline or loop.time() + self.flush_interval
+                continue
+            if self._stopping.is_set():
+                break
+            timeout = self.flush_interval if deadline is None else deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                deadline = deadline or loop.time() + self.flush_interval
+            except asyncio.TimeoutError:
+                if batch:
+                    break
+        return batch
+
+    async def _loop(self):
+        while True:
+            batch = await self._next_batch()
+            if batch and not await self._flush(batch):
+                return
+            if self._stopping.is_set() and self._queue.empty():
+                return
+
+    async def _backoff(self, attempt):
+        # Espera interrumpible: True si hay que dejar de reintentar porque se está apagando
+        delay = min(FLUSH_ERROR_BACKOFF_SEC * 2 ** attempt, FLUSH_ERROR_BACKOFF_MAX_SEC)
+        try:
+            await asyncio.wait_for(self._stopping.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        return self._stopping.is_set()
+
+    async def _resolve_creators(self, batch):
+        # Completa el creator_id de los contadores encolados sin él; None si se está apagando
+        missing = {e.counter[1] for e in batch if e.counter and e.counter[0] is None} - self._creators.keys()
+        found, attempt = {}, 0
+        while missing:
+            try:
+                async with AsyncSessionLocal() as session:
+                    found = await counters.fetch_video_creators(session, missing)
+                break
+            except Exception as e:
+                print(f"❌ Write-behind: error resolviendo creadores (intento {attempt + 1}, se reintenta): {e}")
+                if self._stopping.is_set() or await self._backoff(attempt):
+                    return None
+                attempt += 1
+        for video_id, creator_id in found.items():
+            self._creators[video_id] = creator_id
+        resolved = []
+        for event in batch:
+            if event.counter and event.counter[0] is None:
+                video_id = event.counter[1]
+                creator_id = self._creators.get(video_id)
+                if creator_id is None:
+                    # Video desconocido: se escribe el evento sin contador, como antes
+                    event = event._replace(counter=None)
+                else:
+                    self._creators.move_to_end(video_id)
+                    event = event._replace(counter=(creator_id, *event.counter[1:]))
+            resolved.append(event)
+        while len(self._creators) > CREATOR_CACHE_SIZE:
+            self._creators.popitem(last=False)
+        return resolved
+
+    async def _commit_with_retries(self, events):
+        # None si se confirmó; la excepción si el error es permanente o el lote tiene eventos ya
+        # aplicados (AlreadyExists); False si se está apagando
+        # (lo no confirmado queda en el log para el próximo arranque). Los errores transitorios
+        # se reintentan sin límite: durante una caída de Firestore la cola espera.
+        attempt = 0
+        while True:
+            try:
+                await fs_run(commit_events, events)
+                return None
+            except ALREADY_APPLIED as e:
+                return e
+            except PERMANENT_ERRORS as e:
+                self.failures += 1
+                return e
+            except Exception as e:
+                self.failures += 1
+                print(f"❌ Write-behind flush error (intento {attempt + 1}, se reintenta): {e}")
+                if self._stopping.is_set() or await self._backoff(attempt):
+                    return False
+                attempt += 1
+
+    async def _flush(self, batch):
+        start = time.perf_counter()
+        batch = await self._resolve_creators(batch)
+        if batch is None:
+            return False
+        for chunk in plan_chunks(batch):
+            error = await self._commit_with_retries(chunk)
+            if error is False:
+                return False
+            if error is not None:
+                # Se aísla el evento culpable: los demás del trozo se confirman uno a uno
+                for event in chunk:
+                    error = await self._commit_with_retries([event])
+                    if error is False:
+                        return False
+                    if isinstance(error, ALREADY_APPLIED):
+                        self.duplicates += 1
+                    elif error is not None:
+                        self._dead_letter(event, error)
+                        print(f"☠️ Write-behind: evento {event.seq} ({event.path}/{event.doc_id}) a dead-letter: {error}")
+                    self._write_checkpoint(event.seq)
+            # La cola es FIFO y hay un solo flusher: todo seq <= chunk[-1].seq está confirmado
+            # o guardado en dead-letter; un reintento posterior no repite este trozo
+            self._write_checkpoint(chunk[-1].seq)
+            self.flushed += len(chunk)
+        self.flush_ms.append((time.perf_counter() - start) * 1000)
+        self.batches += 1
+        return True
+
+    def stats(self):
+        flushes = sorted(self.flush_ms)
+        return {
+            "submitted": self.submitted,
+            "flushed": self.flushed,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "avg_batch_size": round(self.flushed / self.batches, 1) if self.batches else None,
+            "flush_ms_p50": round(flushes[len(flushes) // 2], 2) if flushes else None,
+            "flush_ms_max": round(flushes[-1], 2) if flushes else None,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "recovered": self.recovered,
+            "dead_lettered": self.dead_lettered,
+            "replayed": self.replayed,
+            "duplicates": self.duplicates,
+            "log_dir": self.log_dir,
+        }
+
+
+buffer = WriteBehindBuffer(
+    config.WRITE_BEHIND_LOG_DIR,
+    batch_size=config.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval_ms=config.WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    max_pending=config.WRITE_BEHIND_MAX_PENDING,
+    backpressure_timeout_sec=config.WRITE_BEHIND_BACKPRESSURE_TIMEOUT_SEC,
+    replay_dead_letter=config.WRITE_BEHIND_REPLAY_DEAD_LETTER,
+)
@@ -1,11 +1,43 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from backend.routes import performance
 from backend.routes import requirements_test
+from backend.routes import admin
+from backend.db.outbox import relay
+from backend.db import write_behind
+from backend.db import feed
+from backend.db.postgres import engine
+from backend.metrics import MetricsMiddleware, request_metrics
+from backend.profiling import ProfilingMiddleware
 
 
-app = FastAPI(title="Backend PostgreSQL + Firebase")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await relay.start()
+    await write_behind.buffer.start()
+    await feed.fanout.start()
+    yield
+    await feed.fanout.stop()
+    await write_behind.buffer.stop()
+    await relay.stop()
+    await engine.dispose()
+
+
+app = FastAPI(title="Backend PostgreSQL + Firebase", lifespan=lifespan)
+# Latencia por ruta con desglose PostgreSQL / Firestore y peticiones en curso
+app.add_middleware(MetricsMiddleware)
+# Perfil de muestreo opcional por petición (X-Profile: 1, ?profile=1 o PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
+
+# Exposición para Prometheus (fuera de /api, como es habitual en los scrapers)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 app.include_router(requirements_test.router, prefix="/api")
 app.include_router(performance.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
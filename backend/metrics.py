@@ -0,0 +1,166 @@
+# metrics.py
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+# Métricas por petición en formato Prometheus:
+#   - latencia total por ruta (plantilla de la ruta, no la URL: cardinalidad acotada)
+#   - tiempo en PostgreSQL y en Firestore dentro de cada petición
+#   - peticiones en curso
+# El tiempo de base de datos y de Firestore se acumula en un RequestTiming guardado en un
+# ContextVar: lo ven el handler, sus dependencias y los greenlets de SQLAlchemy, pero no las
+# tareas de fondo (relay, write-behind, fan-out), que se crean fuera de cualquier petición.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestTiming:
+    __slots__ = ("db_sec", "db_calls", "firestore_sec", "firestore_calls")
+
+    def __init__(self):
+        self.db_sec = 0.0
+        self.db_calls = 0
+        self.firestore_sec = 0.0
+        self.firestore_calls = 0
+
+
+current_timing = ContextVar("current_timing", default=None)
+
+
+def record_db(seconds):
+    timing = current_timing.get()
+    if timing is not None:
+        timing.db_sec += seconds
+        timing.db_calls += 1
+
+
+def record_firestore(seconds):
+    timing = current_timing.get()
+    if timing is not None:
+        timing.firestore_sec += seconds
+        timing.firestore_calls += 1
+
+
+class Histogram:
+    # Buckets acumulativos a la Prometheus (le="..."), más suma y cuenta
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket{format_labels({**labels, 'le': le})} {cumulative}"
+        yield f"{name}_sum{format_labels(labels)} {self.sum}"
+        yield f"{name}_count{format_labels(labels)} {self.count}"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in labels.items()) + "}"
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = defaultdict(int)  # (method, route, status) -> n
+        self.duration = defaultdict(Histogram)  # (method, route) -> Histogram
+        self.db = defaultdict(Histogram)
+        self.firestore = defaultdict(Histogram)
+        self.db_calls = defaultdict(int)
+        self.firestore_calls = defaultdict(int)
+
+    def observe(self, method, route, status, seconds, timing):
+        key = (method, route)
+        self.requests[(method, route, status)] += 1
+        self.duration[key].observe(seconds)
+        self.db[key].observe(timing.db_sec)
+        self.firestore[key].observe(timing.firestore_sec)
+        self.db_calls[key] += timing.db_calls
+        self.firestore_calls[key] += timing.firestore_calls
+
+    def render(self):
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Completed requests by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), n in sorted(self.requests.items()):
+            lines.append(f"http_requests_total{format_labels({'method': method, 'route': route, 'status': status})} {n}")
+        for name, help_text, histograms in (
+            ("http_request_duration_seconds", "Wall-clock time per request.", self.duration),
+            ("http_request_db_seconds", "Time spent in PostgreSQL per request.", self.db),
+            ("http_request_firestore_seconds", "Time spent waiting on Firestore per request.", self.firestore),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), histogram in sorted(histograms.items()):
+                lines += histogram.samples(name, {"method": method, "route": route})
+        for name, help_text, counts in (
+            ("http_request_db_calls_total", "PostgreSQL statements issued by requests.", self.db_calls),
+            ("http_request_firestore_calls_total", "Firestore calls issued by requests.", self.firestore_calls),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (method, route), n in sorted(counts.items()):
+                lines.append(f"{name}{format_labels({'method': method, 'route': route})} {n}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def route_template(scope):
+    # FastAPI deja la ruta resuelta en el scope; las 404 se agrupan en una sola serie
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    # Middleware ASGI puro (no BaseHTTPMiddleware): no bufferiza las respuestas en streaming
+    # y mide hasta que se envía el último fragmento del cuerpo.
+    def __init__(self, app, metrics=request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Server-Timing: desglose visible en el navegador / cliente sin tocar los handlers
+                elapsed = (time.perf_counter() - start) * 1000
+                header = f"app;dur={elapsed:.2f}, db;dur={timing.db_sec * 1000:.2f}, firestore;dur={timing.firestore_sec * 1000:.2f}"
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode())]}
+            await send(message)
+
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_flight -= 1
+            current_timing.reset(token)
+            self.metrics.observe(scope["method"], route_template(scope), str(status), time.perf_counter() - start, timing)
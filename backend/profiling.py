@@ -0,0 +1,251 @@
+# profiling.py
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from urllib.parse import parse_qs
+from backend import config
+
+# Profiler de muestreo por petición, opcional:
+#   - cabecera `X-Profile: 1` o parámetro `?profile=1` (con PROFILE_OPT_IN=true, desactivado por defecto), o
+#   - una fracción PROFILE_SAMPLE_RATE de todas las peticiones.
+# Un hilo muestrea cada PROFILE_INTERVAL_MS la tarea asyncio de la petición:
+#   - si está ejecutándose, la pila real del hilo del event loop desde este middleware
+#   - si está suspendida, la cadena de awaits (cr_await) hasta el punto de espera
+# y, bajo ese punto de espera, los hilos del executor de Firestore que trabajan para ella.
+# El resultado se guarda en formato "collapsed stacks" (flamegraph.pl, speedscope, inferno).
+# Sin perfil activo el coste por petición es una lectura de cabecera y un random().
+HEADER = b"x-profile"
+QUERY_FLAG = b"profile="
+MAX_STACK_DEPTH = 128
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+current_session = ContextVar("current_profile_session", default=None)
+
+
+def frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(ROOT):
+        filename = os.path.relpath(filename, ROOT)
+    else:
+        # Librerías: a partir de site-packages / lib/pythonX.Y
+        for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+            if marker in filename:
+                filename = filename.split(marker, 1)[1]
+                break
+        else:
+            filename = os.path.basename(filename)
+    name = getattr(code, "co_qualname", code.co_name)
+    # ';' separa marcos en el formato collapsed
+    return f"{name} ({filename}:{frame.f_lineno})".replace(";", ",")
+
+
+def thread_stack(frame, stop=None):
+    # Pila de un hilo de la raíz a la hoja; si `stop` aparece, empieza en él
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        frames.append(frame)
+        if frame is stop:
+            break
+        frame = frame.f_back
+    return [frame_label(f) for f in reversed(frames)]
+
+
+def await_chain(coro, start):
+    # Tarea suspendida: corrutinas encadenadas por cr_await hasta lo que se está esperando,
+    # empezando en el marco `start` (el middleware) para omitir el servidor ASGI
+    labels = []
+    started = False
+    while coro is not None and len(labels) < MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            # Hoja: el objeto esperado (Future de asyncpg, del executor, un sleep...)
+            labels.append(f"[await {type(coro).__name__}]")
+            break
+        started = started or frame is start
+        if started:
+            labels.append(frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return labels if started else []
+
+
+class ProfileSession:
+    def __init__(self, task, root_frame, loop_thread_id, interval_sec):
+        self.id = uuid.uuid4().hex[:12]
+        self.task = task
+        self.root_frame = root_frame
+        self.loop_thread_id = loop_thread_id
+        self.interval_sec = interval_sec
+        self.samples = Counter()
+        self.threads = {}  # hilo del executor -> marco raíz del trabajo de esta petición
+        self.started_at = datetime.utcnow()
+        self.duration_sec = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self.duration_sec = time.perf_counter() - self._start
+        self._stop.set()
+        self._thread.join()
+
+    def track_thread(self, fn):
+        # Envuelve trabajo enviado a un executor para muestrear también ese hilo
+        def tracked():
+            ident = threading.get_ident()
+            self.threads[ident] = sys._getframe()
+            try:
+                return fn()
+            finally:
+                self.threads.pop(ident, None)
+        return tracked
+
+    def _run(self):
+        while not self._stop.wait(self.interval_sec):
+            try:
+                self._sample()
+            except Exception:
+                # Lectura concurrente de pilas ajenas: una muestra incoherente se descarta
+                pass
+
+    def _sample(self):
+        frames = sys._current_frames()
+        loop_frame = frames.get(self.loop_thread_id)
+
+        # ¿La petición está en CPU? El marco del middleware aparece en la pila del hilo del loop
+        on_cpu = False
+        frame = loop_frame
+        while frame is not None:
+            if frame is self.root_frame:
+                on_cpu = True
+                break
+            frame = frame.f_back
+        if on_cpu:
+            self.samples[("[running]", *thread_stack(loop_frame, stop=self.root_frame))] += 1
+            return
+        if self.task.done():
+            return
+        chain = await_chain(self.task.get_coro(), self.root_frame)
+        # Mientras espera al executor, la pila del hilo que hace el trabajo cuelga del punto de espera
+        workers = [(frames[ident], root) for ident, root in list(self.threads.items()) if ident in frames]
+        for frame, root in workers:
+            self.samples[("[awaiting]", *chain, "[executor]", *thread_stack(frame, stop=root))] += 1
+        if chain and not workers:
+            self.samples[("[awaiting]", *chain)] += 1
+
+    def collapsed(self, root):
+        root = root.replace(";", ",")
+        return "".join(f"{root};{';'.join(stack)} {n}\n" for stack, n in self.samples.most_common())
+
+
+class ProfileStore:
+    # Archivos .folded en PROFILE_DIR; solo se conservan los PROFILE_MAX_STORED más recientes.
+    # save() corre en el executor por defecto: el índice se protege con un lock
+    def __init__(self, directory, max_stored):
+        self.directory = directory
+        self.max_stored = max_stored
+        self.index = deque()
+        self._lock = threading.Lock()
+
+    def save(self, session, method, route, status):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        path = os.path.join(self.directory, f"{session.started_at:%Y%m%dT%H%M%S}_{slug}_{session.id}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(session.collapsed(f"{method} {route}"))
+        with self._lock:
+            self.index.append({
+                "id": session.id,
+                "method": method,
+                "route": route,
+                "status": status,
+                "started_at": session.started_at.isoformat(),
+                "duration_ms": round(session.duration_sec * 1000, 2),
+                "samples": sum(session.samples.values()),
+                "path": path,
+            })
+            stale = [self.index.popleft() for _ in range(len(self.index) - self.max_stored)]
+        for old in stale:
+            try:
+                os.remove(old["path"])
+            except OSError:
+                pass
+
+    def list(self):
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != "path"} for p in reversed(self.index)]
+
+    def path(self, profile_id):
+        with self._lock:
+            return next((p["path"] for p in self.index if p["id"] == profile_id), None)
+
+
+store = ProfileStore(config.PROFILE_DIR, config.PROFILE_MAX_STORED)
+
+
+def requested(scope):
+    if not config.PROFILE_OPT_IN:
+        return False
+    for name, value in scope["headers"]:
+        if name == HEADER:
+            return value.strip().lower() in (b"1", b"true", b"yes", b"on")
+    qs = scope.get("query_string", b"")
+    if QUERY_FLAG in qs:
+        return parse_qs(qs.decode("latin-1")).get("profile", [""])[0].lower() in ("1", "true", "yes", "on")
+    return False
+
+
+def finish_session(session, method, route, status):
+    session.stop()
+    store.save(session, method, route, status)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, sample_rate=config.PROFILE_SAMPLE_RATE, interval_ms=config.PROFILE_INTERVAL_MS,
+                 max_concurrent=config.PROFILE_MAX_CONCURRENT):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.interval_sec = interval_ms / 1000
+        self.max_concurrent = max_concurrent
+        self.active = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (
+            requested(scope) or (self.sample_rate and random.random() < self.sample_rate)
+        ) or self.active >= self.max_concurrent:
+            return await self.app(scope, receive, send)
+
+        session = ProfileSession(asyncio.current_task(), sys._getframe(), threading.get_ident(), self.interval_sec)
+        token = current_session.set(session)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", session.id.encode())]}
+            await send(message)
+
+        self.active += 1
+        session.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.active -= 1
+            current_session.reset(token)
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            # join del hilo de muestreo y escritura del perfil fuera del event loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, finish_session, session, scope["method"], route, status
+            )
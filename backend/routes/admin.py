@@ -0,0 +1,89 @@
+# routes/admin.py
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.db.postgres import engine, get_session, pool_metrics
+from backend.db import queries
+from backend.db.profiler import profiler
+from backend import profiling
+from backend.db import write_behind
+from backend.db import feed
+from backend.db import social
+
+router = APIRouter()
+
+
+# Estado del pool de conexiones de PostgreSQL
+@router.get("/admin/pool-metrics")
+async def pool_metrics_endpoint():
+    return pool_metrics.snapshot(engine.sync_engine.pool)
+
+
+# Llamadas y tiempos por consulta registrada en backend/db/queries.py
+@router.get("/admin/query-stats")
+async def query_stats():
+    return queries.stats()
+
+
+# Sentencias SQL por huella, ordenadas por tiempo total (o calls, avg_ms, max_ms, p99_ms)
+@router.get("/admin/query-profile")
+async def query_profile(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: str = Query("total_ms", pattern="^(total_ms|calls|avg_ms|max_ms|p95_ms|p99_ms|slow_calls)$")
+):
+    return {**profiler.stats(), "top": profiler.top(limit, order_by)}
+
+
+# Últimas sentencias por encima de QUERY_SLOW_MS, con parámetros
+@router.get("/admin/slow-queries")
+async def slow_queries():
+    return {"slow_ms": profiler.slow_ms, "queries": list(reversed(profiler.slow_log))}
+
+
+@router.post("/admin/query-profile/reset")
+async def reset_query_profile():
+    profiler.reset()
+    return {"message": "Query profile reset"}
+
+
+# Estado del buffer write-behind de interacciones hacia Firestore
+@router.get("/admin/write-behind")
+async def write_behind_stats():
+    return write_behind.buffer.stats()
+
+
+# Reencola los eventos de dead-letter.log del buffer write-behind
+@router.post("/admin/write-behind/replay-dead-letter")
+async def replay_write_behind_dead_letter():
+    try:
+        replayed = await write_behind.buffer.replay_dead_letter()
+    except write_behind.BufferFull as e:
+        return {"error": str(e)}
+    return {"replayed": replayed, **write_behind.buffer.stats()}
+
+
+# Estado del worker de fan-out de FeedCache
+@router.get("/admin/feed-fanout")
+async def feed_fanout_stats(session: AsyncSession = Depends(get_session)):
+    return {**feed.fanout.stats(), "pending": await queries.FANOUT_PENDING.fetchval(session)}
+
+
+# Caché de adyacencias del grafo social
+@router.get("/admin/social-cache")
+async def social_cache_stats():
+    return social.stats()
+
+
+# Perfiles de muestreo guardados (más recientes primero)
+@router.get("/admin/profiles")
+async def list_profiles():
+    return {"profiles": profiling.store.list()}
+
+
+# Perfil en formato collapsed stacks: flamegraph.pl, speedscope.app o inferno-flamegraph
+@router.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    path = profiling.store.path(profile_id)
+    if path is None:
+        return {"error": f"Profile {profile_id} not found"}
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
@@ -1,50 +1,52 @@
 # backend/routes/performance.py
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
-from backend.db.postgres import get_session
-from backend.db.firebase import db as firebase_db
+from backend.db.postgres import get_session, get_driver_connection, AsyncSessionLocal
+from backend.db.firebase import db as firebase_db, run as fs_run
+from backend.db import queries
+from backend.db import firestore_queries as fsq
+from backend.db import trending
+from backend.db import write_behind
+from backend.db.allocator import reserve_range
+from backend.db.ingest import APP_USER_COLUMNS, INGEST_MODES, build_user_rows, ingest_rows
+import json
 import time
 import random
+import uuid
 
 router = APIRouter()
 
 # 1️ PostgreSQL - Ingestión masiva de 1000 usuarios
+# mode: copy (COPY binario), values (INSERT multi-fila), executemany o all (compara las tres)
 @router.post("/test-bigdata/postgres-bulk-insert")
 async def postgres_bulk_insert(
     batch_size: int = Query(1000, ge=10, le=5000),
+    mode: str = Query("copy", pattern="^(copy|values|executemany|all)$"),
     session: AsyncSession = Depends(get_session)
 ):
     import time
     start = time.time()
     try:
-        # 1️⃣ Obtener el último índice generado en username de pruebas anteriores
-        result = await session.execute(text("""
-            SELECT MAX(CAST(SUBSTRING(username FROM 'bigdata_user_(\\d+)') AS INTEGER)) AS last_index
-            FROM app_user
-            WHERE username LIKE 'bigdata_user_%';
-        """))
-        last_index = result.scalar()
-        start_index = last_index + 1 if last_index is not None else 0
-
-        # 2️⃣ Insertar batch_size usuarios a partir de start_index
-        for i in range(start_index, start_index + batch_size):
-            await session.execute(text("""
-                INSERT INTO app_user (name, last_name, username, email, password_hash, role)
-                VALUES (:name, :last_name, :username, :email, :password_hash, :role)
-            """), {
-                "name": f"Name{i}",
-                "last_name": f"Last{i}",
-                "username": f"bigdata_user_{i}",
-                "email": f"bigdata_user_{i}@example.com",
-                "password_hash": "hash",
-                "role": "user"
-            })
+        # 1️⃣ Reservar un rango contiguo de índices para esta petición
+        modes = INGEST_MODES if mode == "all" else (mode,)
+        start_index = await reserve_range("bigdata_user", batch_size * len(modes))
+
+        # 2️⃣ Insertar batch_size usuarios por estrategia a partir de start_index
+        # (en la transacción de la sesión: con mode=all se confirman o se deshacen juntas)
+        pg_conn = await get_driver_connection(session)
+        strategies = {}
+        next_index = start_index
+        for m in modes:
+            rows = build_user_rows(next_index, batch_size)
+            strategies[m] = await ingest_rows(pg_conn, m, "app_user", APP_USER_COLUMNS, rows)
+            next_index += batch_size
 
         await session.commit()
         end = time.time()
         return {
-            "message": f"Inserted {batch_size} users starting from index {start_index}",
+            "message": f"Inserted {next_index - start_index} users starting from index {start_index}",
+            "strategies": strategies,
             "time_ms": round((end - start) * 1000, 2)
         }
 
@@ -56,20 +58,43 @@ async def postgres_bulk_insert(
 
 
 # 2️ PostgreSQL - retrieving 1000 users
+# Paginación keyset con after_user_id; stream=true exporta toda la tabla como NDJSON
+# con un cursor del lado del servidor (memoria constante)
+STREAM_FETCH_ROWS = 1000
+
+
+async def stream_users_ndjson(after_user_id):
+    # Sesión propia: la de Depends(get_session) se cierra antes de que termine el streaming
+    async with AsyncSessionLocal() as session:
+        query = queries.EXPORT_USERS if after_user_id is None else queries.EXPORT_USERS_AFTER
+        result = await session.stream(
+            query.clause,
+            {"after_user_id": after_user_id},
+            execution_options={"yield_per": STREAM_FETCH_ROWS}
+        )
+        async for row in result.mappings():
+            yield json.dumps(dict(row), default=str) + "\n"
+
+
 @router.get("/test-bigdata/postgres-retrieve-users")
-async def postgres_retrieve_users(batch_size: int = Query(1000, ge=100, le=10000), session: AsyncSession = Depends(get_session)):
+async def postgres_retrieve_users(
+    batch_size: int = Query(1000, ge=100, le=10000),
+    after_user_id: int = Query(None),
+    stream: bool = Query(False),
+    session: AsyncSession = Depends(get_session)
+):
+    if stream:
+        return StreamingResponse(stream_users_ndjson(after_user_id), media_type="application/x-ndjson")
+
     import time
     start = time.time()
-    result = await session.execute(text(f"""
-        SELECT user_id, username, email, role
-        FROM app_user
-        LIMIT {batch_size};
-    """))
-    rows = result.mappings().all()
+    query = queries.RETRIEVE_USERS if after_user_id is None else queries.RETRIEVE_USERS_AFTER
+    rows = [dict(r) for r in await query.fetch(session, after_user_id=after_user_id, batch_size=batch_size)]
     end = time.time()
     return {
         "execution_time_ms": round((end - start) * 1000, 2),
         "users_retrieved": len(rows),
+        "next_after_user_id": rows[-1]["user_id"] if len(rows) == batch_size else None,
         "sample": rows[:10]
     }
 
@@ -79,93 +104,118 @@ async def postgres_retrieve_users(batch_size: int = Query(1000, ge=100, le=10000
 from faker import Faker
 faker = Faker()
 
+# Las vistas se encolan en el buffer write-behind; el flusher las escribe en lotes de 500
 @router.post("/test-bigdata/firebase-insert-views")
-async def firebase_insert_views(batch_size: int = Query(1000, ge=1, le=5000)):
-    from datetime import datetime
+async def firebase_insert_views(
+    batch_size: int = Query(1000, ge=1, le=5000)
+):
     import time
     video_id = "150002"  # Video fijo para la prueba
 
-    batch = firebase_db.batch()
-
-    for i in range(batch_size):
-        doc_ref = firebase_db.collection("Views").document()
-        view_data = {
-            "video_id": video_id,
-            "user_id": str(faker.random_int(min=1, max=10000)),
-            "watch_time_sec": faker.random_int(min=5, max=600),
-            "timestamp": faker.date_time_this_year()
-        }
-        batch.set(doc_ref, view_data)
-
-        # For large inserts, commit every 500
-        if (i + 1) % 500 == 0:
-            commit_start = time.time()
-            batch.commit()
-            commit_end = time.time()
-            print(f"✅ Inserted {i+1} views in {round((commit_end - commit_start)*1000, 2)} ms")
-            batch = firebase_db.batch()
-
-    # Final commit measurement
-    commit_start = time.time()
-    batch.commit()
-    commit_end = time.time()
+    start = time.perf_counter()
+    try:
+        for i in range(batch_size):
+            view_data = {
+                "video_id": video_id,
+                "user_id": str(faker.random_int(min=1, max=10000)),
+                "watch_time_sec": faker.random_int(min=5, max=600),
+                "timestamp": faker.date_time_this_year()
+            }
+            counter = (None, video_id, "views", view_data["timestamp"])
+            await write_behind.buffer.submit("Views", uuid.uuid4(), view_data, counter)
+    except (write_behind.BufferFull, write_behind.InvalidEvent) as e:
+        return {"error": str(e), "queued": i}
+    end = time.perf_counter()
 
     return {
-        "message": f"Inserted {batch_size} views into Firestore for video_id '{video_id}'",
+        "message": f"Queued {batch_size} views for Firestore for video_id '{video_id}'",
         "video_id": video_id,
-        "commit_time_ms": round((commit_end - commit_start) * 1000, 2)
+        "enqueue_time_ms": round((end - start) * 1000, 2)
     }
 
 
 
 # 4️ Firebase - retrieval of x views
+# mode: full (documentos completos), projection (solo `fields`) o count (agregación en servidor)
 @router.get("/test-bigdata/firestore-retrieve-views")
 async def firestore_retrieve_views(
     video_id: str = Query(...),
-    batch_size: int = Query(1000, ge=100, le=5000)
+    batch_size: int = Query(1000, ge=100, le=5000),
+    mode: str = Query("full", pattern="^(full|projection|count)$"),
+    fields: str = Query("user_id,watch_time_sec,timestamp")
 ):
     import time
     start = time.time()
-    docs = firebase_db.collection("Views").where("video_id", "==", video_id).limit(batch_size).stream()
-    retrieved_docs = []
-    count = 0
-    for doc in docs:
-        retrieved_docs.append(doc.to_dict())
-        count += 1
+    query = firebase_db.collection("Views").where("video_id", "==", video_id).limit(batch_size)
+    if mode == "count":
+        result = await fs_run(fsq.aggregate, query, count=True, avgs=["watch_time_sec"])
+        count = result["values"]["count"]
+        retrieved_docs = []
+    else:
+        result = await fs_run(fsq.fetch, query, fields=fsq.parse_fields(fields) if mode == "projection" else None)
+        retrieved_docs = result["documents"]
+        count = len(retrieved_docs)
     end = time.time()
     return {
         "video_id": video_id,
+        "mode": mode,
         "execution_time_ms": round((end - start) * 1000, 2),
         "documents_retrieved": count,
+        "aggregates": result.get("values"),
+        "bytes_transferred_approx": result["bytes_transferred_approx"],
         "sample": retrieved_docs[:3]
     }
 
 
 # 6️ PostgreSQL - Videos recientes (stress test)
+# Servido desde trending_video + caché TTL en proceso; paginación con `cursor`
 @router.get("/test-bigdata/performance/trending-videos-sql")
-async def trending_videos_sql(session: AsyncSession = Depends(get_session)):
+async def trending_videos_sql(
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str = Query(None),
+    session: AsyncSession = Depends(get_session)
+):
     start = time.time()
-    result = await session.execute(text("""
-        SELECT
-            v.video_id,
-            v.title,
-            v.upload_datetime,
-            v.visibility,
-            au.username AS creator_username
-        FROM video v
-        JOIN app_user au ON v.creator_id = au.user_id
-        WHERE v.upload_datetime >= NOW() - INTERVAL '7 days'
-        ORDER BY v.upload_datetime DESC
-    """))
-    rows = result.fetchall()
+    page, cached = await trending.get_page(session, limit=limit, cursor=cursor)
     end = time.time()
     return {
         "execution_time_ms": round((end - start) * 1000, 2),
-        "total_results": len(rows),
-        "sample": [dict(zip([col for col in result.keys()], row)) for row in rows[:10]]
+        "cached": cached,
+        **page
     }
 
 
 
+# 7️ PostgreSQL -> Firestore - Lag y throughput de replicación vía outbox
+@router.post("/test-bigdata/outbox-replication")
+async def outbox_replication(
+    videos: int = Query(1000, ge=1, le=20000),
+    timeout_sec: int = Query(120, ge=1, le=600),
+    session: AsyncSession = Depends(get_session)
+):
+    import asyncio
+    start = time.time()
+    # Inserta `videos` videos y sus entradas de outbox en una sola transacción
+    rows = await queries.OUTBOX_LOAD_INSERT.fetch(session, n=videos)
+    ids = [r["outbox_id"] for r in rows]
+    await session.commit()
+    committed = time.time()
+
+    # Esperar a que el relay confirme todos los documentos en Firestore
+    pending = len(ids)
+    while pending and time.time() - committed < timeout_sec:
+        await asyncio.sleep(0.1)
+        pending = await queries.OUTBOX_LOAD_PENDING.fetchval(session, ids=ids)
+        await session.commit()
+    replicated = time.time()
 
-
+    lag = await queries.OUTBOX_LOAD_LAG.fetchrow(session, ids=ids)
+    return {
+        "videos": len(ids),
+        "pending_after_timeout": pending,
+        "sql_commit_ms": round((committed - start) * 1000, 2),
+        "end_to_end_ms": round((replicated - start) * 1000, 2),
+        "replication_docs_per_sec": round((len(ids) - pending) / (replicated - committed), 2) if replicated > committed else None,
+        "lag_ms_p50": round(lag["lag_p50"], 2) if lag["lag_p50"] is not None else None,
+        "lag_ms_p99": round(lag["lag_p99"], 2) if lag["lag_p99"] is not None else None
+    }
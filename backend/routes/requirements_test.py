@@ -1,10 +1,17 @@
 # backend/routes/requirements_test.py
 
-from fastapi import APIRouter, Depends, Form
+from fastapi import APIRouter, Depends, Form, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 from backend.db.postgres import get_session
-from backend.db.firebase import db as firebase_db
+from backend.db.firebase import db as firebase_db, run as fs_run
+from backend.db import queries
+from backend.db import counters
+from backend.db import outbox
+from backend.db import write_behind
+from backend.db import feed
+from backend.db import social
+from backend.db import search
+from backend.db import firestore_queries as fsq
 from pydantic import BaseModel
 import time
 import uuid
@@ -25,16 +32,14 @@ class UserRegister(BaseModel):
 async def register_user(user: UserRegister, session: AsyncSession = Depends(get_session)):
     start = time.time()
     try:
-        await session.execute(text("""
-            INSERT INTO app_user (name, last_name, username, email, password_hash, role)
-            VALUES (:name, :last_name, :username, :email, :password_hash, 'user')
-        """), {
-            "name": user.name,
-            "last_name": user.last_name,
-            "username": user.username,
-            "email": user.email,
-            "password_hash": user.password
-        })
+        await queries.REGISTER_USER.fetch(
+            session,
+            name=user.name,
+            last_name=user.last_name,
+            username=user.username,
+            email=user.email,
+            password_hash=user.password
+        )
         await session.commit()
         end = time.time()
         return {"message": "User registered successfully", "time_ms": round((end - start) * 1000, 2)}
@@ -55,20 +60,14 @@ async def upload_video(
     start = time.time()
     try:
         # Insertar en PostgreSQL
-        result = await session.execute(text("""
-            INSERT INTO video (creator_id, title, description, duration, visibility)
-            VALUES (:creator_id, :title, :description, :duration, :visibility)
-            RETURNING video_id, creator_id, title, description, duration, upload_datetime, visibility
-        """), {
-            "creator_id": creator_id,
-            "title": title,
-            "description": description,
-            "duration": duration,
-            "visibility": visibility
-        })
-        await session.commit()
-
-        video_row = result.fetchone()
+        video_row = await queries.INSERT_VIDEO.fetchrow(
+            session,
+            creator_id=creator_id,
+            title=title,
+            description=description,
+            duration=duration,
+            visibility=visibility
+        )
         if video_row is None:
             raise Exception("Error retrieving inserted video.")
 
@@ -83,12 +82,17 @@ async def upload_video(
             "visibility": visibility_db,
         }
 
-        # Insertar en Firestore
-        firebase_db.collection("Videos").document(str(video_id)).set(video_doc)
+        # Encolar para Firestore y para el fan-out al FeedCache de los seguidores en la misma
+        # transacción (el relay y el worker de feed los procesan en segundo plano)
+        await outbox.enqueue(session, "Videos", video_id, video_doc)
+        if visibility_db != "private":
+            await feed.enqueue(session, video_id, creator_id_db)
+        await session.commit()
+        feed.fanout.wake()
 
         end = time.time()
         return {
-            "message": "Video uploaded successfully to PostgreSQL and Firestore.",
+            "message": "Video uploaded to PostgreSQL and queued for Firestore replication.",
             "video_id": video_id,
             "time_ms": round((end - start) * 1000, 2)
         }
@@ -97,18 +101,30 @@ async def upload_video(
         await session.rollback()
         return {"error": str(e)}
 
+# Estado de la replicación PostgreSQL -> Firestore
+@router.get("/requirements/outbox-stats")
+async def outbox_stats(session: AsyncSession = Depends(get_session)):
+    return {"pending": await outbox.pending_count(session), **outbox.relay.stats()}
+
 # 3️⃣ Functional Requirement #3: Like, Comment, Follow
+# Likes y comentarios pasan por el buffer write-behind: se responde al quedar en el log local
+# y el flusher los escribe en Firestore en lotes (junto con los contadores)
 @router.post("/requirements/like-video")
 async def like_video(video_id: str = Form(...),
     user_id: int = Form(...)
     ):
-    doc_id = str(uuid.uuid4())
-    firebase_db.collection("Reactions").document(doc_id).set({
-        "video_id": video_id,
-        "user_id": user_id,
-        "type": "like",
-        "timestamp": faker.date_time_this_year()
-    })
+    timestamp = faker.date_time_this_year()
+    # El flusher resuelve el creador del video en bloque
+    counter = (None, video_id, "reactions", timestamp)
+    try:
+        await write_behind.buffer.submit("Reactions", uuid.uuid4(), {
+            "video_id": video_id,
+            "user_id": user_id,
+            "type": "like",
+            "timestamp": timestamp
+        }, counter)
+    except (write_behind.BufferFull, write_behind.InvalidEvent) as e:
+        return {"error": str(e)}
     return {"message": f"User {user_id} liked video {video_id}."}
 
 @router.post("/requirements/comment-video")
@@ -116,11 +132,14 @@ async def comment_video(video_id: str = Form(...),
     user_id: str = Form(...),
     comment: str = Form(...)
     ):
-    firebase_db.collection("Videos").document(video_id).collection("Comments").add({
-        "user_id": user_id,
-        "text": comment,
-        "timestamp": faker.date_time_this_year()
-    })
+    try:
+        await write_behind.buffer.submit(f"Videos/{video_id}/Comments", uuid.uuid4(), {
+            "user_id": user_id,
+            "text": comment,
+            "timestamp": faker.date_time_this_year()
+        })
+    except (write_behind.BufferFull, write_behind.InvalidEvent) as e:
+        return {"error": str(e)}
     return {"message": f"Comment added to video {video_id}."}
 
 @router.post("/requirements/follow-creator")
@@ -129,30 +148,70 @@ async def follow_creator(
     followed_id: int = Form(...),
     session: AsyncSession = Depends(get_session)
 ):
-    await session.execute(text("""
-        INSERT INTO follow (follower_id, followed_id)
-        VALUES (:follower_id, :followed_id)
-    """), {
-        "follower_id": follower_id,
-        "followed_id": followed_id
-    })
-    await session.commit()
+    if not await social.follow(session, follower_id, followed_id):
+        return {"message": f"User {follower_id} already follows user {followed_id}."}
     return {"message": f"User {follower_id} is now following user {followed_id}."}
 
+@router.post("/requirements/unfollow-creator")
+async def unfollow_creator(
+    follower_id: int = Form(...),
+    followed_id: int = Form(...),
+    session: AsyncSession = Depends(get_session)
+):
+    if not await social.unfollow(session, follower_id, followed_id):
+        return {"message": f"User {follower_id} does not follow user {followed_id}."}
+    return {"message": f"User {follower_id} unfollowed user {followed_id}."}
+
+# Conteos desde social_counts y comprobación de follow sin recorrer la tabla follow
+@router.get("/requirements/follower-count")
+async def follower_count(user_id: int, session: AsyncSession = Depends(get_session)):
+    start = time.time()
+    result = await social.counts(session, user_id)
+    end = time.time()
+    return {"user_id": user_id, **result, "time_ms": round((end - start) * 1000, 2)}
+
+@router.get("/requirements/is-following")
+async def is_following(follower_id: int, followed_id: int, session: AsyncSession = Depends(get_session)):
+    start = time.time()
+    following, source = await social.is_following(session, follower_id, followed_id)
+    end = time.time()
+    return {
+        "follower_id": follower_id,
+        "followed_id": followed_id,
+        "following": following,
+        "source": source,
+        "time_ms": round((end - start) * 1000, 2)
+    }
+
+# Feed del usuario: un get de FeedCache/{user_id} + videos de creadores célebres que sigue
+@router.get("/requirements/feed")
+async def user_feed(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=feed.FEED_SIZE),
+    session: AsyncSession = Depends(get_session)
+):
+    start = time.time()
+    result = await feed.get_feed(session, user_id, limit=limit)
+    end = time.time()
+    return {**result, "time_ms": round((end - start) * 1000, 2)}
+
 # 4️⃣ Functional Requirement #4: Search videos with filters
+# mode: fulltext (ranking por relevancia, prefijos) o substring (ILIKE con índice de trigramas)
 @router.get("/requirements/search-videos")
-async def search_videos(keyword: str, session: AsyncSession = Depends(get_session)):
+async def search_videos(
+    keyword: str,
+    mode: str = Query("fulltext", pattern="^(fulltext|substring)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = Query(None),
+    session: AsyncSession = Depends(get_session)
+):
     start = time.time()
-    result = await session.execute(text("""
-        SELECT video_id, title, description, upload_datetime
-        FROM video
-        WHERE title ILIKE :keyword OR description ILIKE :keyword
-        ORDER BY upload_datetime DESC
-        LIMIT 20
-    """), {"keyword": f"%{keyword}%"})
-    videos = result.mappings().all()  # ✅ devuelve una lista de diccionarios directamente
+    try:
+        videos, next_cursor = await search.search_videos(session, keyword, mode=mode, limit=limit, cursor=cursor)
+    except search.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     end = time.time()
-    return {"results": videos, "time_ms": round((end - start) * 1000, 2)}
+    return {"results": videos, "next_cursor": next_cursor, "time_ms": round((end - start) * 1000, 2)}
 
 # 5️⃣ Functional Requirement #5: Report inappropriate content
 @router.post("/requirements/report-video")
@@ -162,14 +221,7 @@ async def report_video(
     reason: str = Form(...),
     session: AsyncSession = Depends(get_session)
 ):
-    await session.execute(text("""
-        INSERT INTO contentreport (video_id, reporter_id, reason)
-        VALUES (:video_id, :reporter_id, :reason)
-    """), {
-        "video_id": video_id,
-        "reporter_id": reporter_id,
-        "reason": reason
-    })
+    await queries.REPORT_VIDEO.fetch(session, video_id=video_id, reporter_id=reporter_id, reason=reason)
     await session.commit()
     return {"message": f"Video {video_id} reported by user {reporter_id} for reason: {reason}"}
 
@@ -182,63 +234,70 @@ async def create_campaign(
     targeting: str = Form(...),
     session: AsyncSession = Depends(get_session)
 ):
-    await session.execute(text("""
-        INSERT INTO campaign (advertiser_id, budget, start_date, end_date, targeting_criteria)
-        VALUES (:advertiser_id, :budget, NOW(), NOW() + INTERVAL '30 days', :targeting_criteria)
-    """), {
-        "advertiser_id": advertiser_id,
-        "budget": budget,
-        "targeting_criteria": targeting
-    })
+    await queries.CREATE_CAMPAIGN.fetch(
+        session,
+        advertiser_id=advertiser_id,
+        budget=budget,
+        targeting_criteria=targeting
+    )
     await session.commit()
     return {"message": f"Campaign created for advertiser {advertiser_id}."}
 
 
 # 7️⃣ Functional Requirement #6: Advertiser - View campaign analytics
+# Lee el resumen campaign_stats; fresh=true recalcula desde transaction
 @router.get("/requirements/campaign-analytics")
-async def campaign_analytics(advertiser_id: int, session: AsyncSession = Depends(get_session)):
+async def campaign_analytics(
+    advertiser_id: int,
+    fresh: bool = False,
+    session: AsyncSession = Depends(get_session)
+):
     start = time.time()
-    result = await session.execute(text("""
-        SELECT c.campaign_id, c.budget, c.start_date, c.end_date,
-               COUNT(t.transaction_id) AS transactions,
-               SUM(t.amount) AS total_spent
-        FROM campaign c
-        LEFT JOIN transaction t ON t.advertiser_id = c.advertiser_id
-        WHERE c.advertiser_id = :advertiser_id
-        GROUP BY c.campaign_id
-    """), {"advertiser_id": advertiser_id})
-    
-    campaigns = result.mappings().all()  # ✅ forma correcta
+    query = queries.CAMPAIGN_ANALYTICS_FRESH if fresh else queries.CAMPAIGN_ANALYTICS
+    rows = await query.fetch(session, advertiser_id=advertiser_id)
+    campaigns = [dict(r) for r in rows]
     end = time.time()
-    return {"results": campaigns, "time_ms": round((end - start) * 1000, 2)}
+    return {"results": campaigns, "fresh": fresh, "time_ms": round((end - start) * 1000, 2)}
 
 # 8️⃣ Functional Requirement #7: Creator - Access video statistics
 from datetime import datetime, timedelta
 
 @router.get("/requirements/creator-video-analytics")
-async def creator_video_analytics(creator_id: int, session: AsyncSession = Depends(get_session)):
+async def creator_video_analytics(
+    creator_id: int,
+    source: str = Query("counters", pattern="^(counters|aggregate|scan)$"),
+    session: AsyncSession = Depends(get_session)
+):
     start = time.time()
 
     # 1️⃣ Total de videos y duración promedio
-    result = await session.execute(text("""
-        SELECT COUNT(*) AS total_videos, COALESCE(AVG(duration), 0) AS avg_duration
-        FROM video
-        WHERE creator_id = :creator_id
-    """), {"creator_id": creator_id})
-    row = result.mappings().first()
+    row = await queries.CREATOR_VIDEO_TOTALS.fetchrow(session, creator_id=creator_id)
     total_videos = row["total_videos"]
     avg_duration = round(row["avg_duration"], 2)
 
     # 2️⃣ Vistas y reacciones en la última semana desde Firestore
     one_week_ago = datetime.utcnow() - timedelta(days=7)
 
-    # Vistas
-    views_query = firebase_db.collection("Views").where("timestamp", ">=", one_week_ago).stream()
-    total_views = sum(1 for _ in views_query)
-
-    # Reacciones
-    reactions_query = firebase_db.collection("Reactions").where("timestamp", ">=", one_week_ago).stream()
-    total_reactions = sum(1 for _ in reactions_query)
+    firestore_bytes = None
+    if source == "counters":
+        # Contadores pre-agregados del creador: O(buckets) documentos
+        totals = await fs_run(counters.window_totals, "CreatorStats", creator_id, one_week_ago)
+        total_views = totals["views"]
+        total_reactions = totals["reactions"]
+    elif source == "aggregate":
+        # count() en el servidor: mismo resultado que scan sin descargar documentos
+        views = await fs_run(fsq.aggregate, firebase_db.collection("Views").where("timestamp", ">=", one_week_ago))
+        reactions = await fs_run(fsq.aggregate, firebase_db.collection("Reactions").where("timestamp", ">=", one_week_ago))
+        total_views = views["values"]["count"]
+        total_reactions = reactions["values"]["count"]
+        firestore_bytes = views["bytes_transferred_approx"] + reactions["bytes_transferred_approx"]
+    else:
+        # Escaneo completo (global, sin filtrar por creador) como referencia
+        views = await fs_run(fsq.fetch, firebase_db.collection("Views").where("timestamp", ">=", one_week_ago), collect=False)
+        reactions = await fs_run(fsq.fetch, firebase_db.collection("Reactions").where("timestamp", ">=", one_week_ago), collect=False)
+        total_views = views["count"]
+        total_reactions = reactions["count"]
+        firestore_bytes = views["bytes_transferred_approx"] + reactions["bytes_transferred_approx"]
 
     end = time.time()
 
@@ -248,6 +307,21 @@ async def creator_video_analytics(creator_id: int, session: AsyncSession = Depen
         "average_video_duration_sec": avg_duration,
         "total_views_last_7_days": total_views,
         "total_reactions_last_7_days": total_reactions,
+        "source": source,
+        "firestore_bytes_approx": firestore_bytes,
         "time_ms": round((end - start) * 1000, 2)
     }
 
+# 9️⃣ Reconciliación de contadores a partir de Views y Reactions
+@router.post("/requirements/creator-video-analytics/reconcile")
+async def reconcile_video_counters(
+    days: int = Query(7, ge=1, le=90),
+    session: AsyncSession = Depends(get_session)
+):
+    start = time.time()
+    since = (datetime.utcnow() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    events = await fs_run(counters.load_events, since)
+    creators = await counters.fetch_video_creators(session, {video_id for video_id, _, _ in events})
+    summary = await fs_run(counters.reconcile, since, events, creators)
+    end = time.time()
+    return {**summary, "since": since, "time_ms": round((end - start) * 1000, 2)}
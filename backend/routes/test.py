@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends
 from backend.db.postgres import get_session
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.db.firebase import db as firebase_db
+from backend.db.firebase import db as firebase_db, run as fs_run
 from sqlalchemy import text # Import text for raw SQL queries
 
 router = APIRouter()
@@ -16,5 +16,5 @@ async def get_users(session: AsyncSession = Depends(get_session)):
 @router.get("/videos-from-firebase")
 async def get_videos():
     videos_ref = firebase_db.collection("Videos").limit(10)
-    docs = videos_ref.stream()
+    docs = await fs_run(lambda: list(videos_ref.stream()))
     return [doc.to_dict() for doc in docs]
@@ -0,0 +1,157 @@
+import numpy as np
+from datetime import datetime, date, timedelta
+from faker import Faker
+
+# Generación de columnas completas con NumPy: una llamada por columna en vez de
+# una llamada a Faker por fila. Mismo seed -> mismo dataset.
+
+POOL_SIZE = 2000
+# Fecha de referencia de las ventanas temporales: hoy por defecto, para que los datos caigan en
+# las ventanas que consultan las rutas (últimos 7 días, trending...). Con --seed explícito se
+# fija PINNED_ANCHOR_DATE y el mismo seed da el mismo dataset cualquier día; --anchor-date
+# manda sobre ambas. Las ventanas tienen longitud fija: con otra fecha los datos son los
+# mismos desplazados en el tiempo.
+PINNED_ANCHOR_DATE = date(2025, 6, 30)
+YEAR_DAYS = 365
+
+
+def make_rng(seed, stream=0):
+    # Un stream por tabla/colección: el resultado no depende del orden de ejecución
+    return np.random.default_rng([seed, stream])
+
+
+def build_pools(seed, size=POOL_SIZE):
+    # Vocabularios pre-construidos con Faker una sola vez (determinista con el seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    return {
+        "words": np.array(fake.words(nb=size, unique=False)),
+        "first_names": np.array([fake.first_name() for _ in range(size)]),
+        "last_names": np.array([fake.last_name() for _ in range(size)]),
+        "user_names": np.array([fake.user_name() for _ in range(size)]),
+        "companies": np.array([fake.company() for _ in range(size)]),
+        "addresses": np.array([fake.address() for _ in range(size)]),
+        "domains": np.array([fake.free_email_domain() for _ in range(50)]),
+    }
+
+
+def parse_anchor(value):
+    # Tipo de argparse para --anchor-date: YYYY-MM-DD o "today"
+    return date.today() if value == "today" else date.fromisoformat(value)
+
+
+def resolve_anchor(anchor=None, seeded=False):
+    # --anchor-date explícito; si no, la fecha fija cuando se pidió un seed; si no, hoy
+    if anchor is not None:
+        return anchor
+    return PINNED_ANCHOR_DATE if seeded else date.today()
+
+
+def year_range(anchor=None):
+    # Equivalente determinista de date_time_this_year(): el último año hasta el inicio de `anchor`
+    end = datetime.combine(anchor or date.today(), datetime.min.time())
+    return end - timedelta(days=YEAR_DAYS), end
+
+
+def choice(rng, values, n, p=None):
+    return rng.choice(np.asarray(values), size=n, p=p)
+
+
+def integers(rng, low, high, n):
+    # Intervalo cerrado [low, high], como random.randint
+    return rng.integers(low, high + 1, size=n)
+
+
+def uniform(rng, low, high, n, decimals=2):
+    return np.round(rng.uniform(low, high, size=n), decimals)
+
+
+def booleans(rng, n, p_true=0.5):
+    return rng.random(n) < p_true
+
+
+def timestamps(rng, start, end, n):
+    lo = np.datetime64(start, "us").astype(np.int64)
+    hi = np.datetime64(end, "us").astype(np.int64)
+    return rng.integers(lo, max(hi, lo + 1), size=n).astype("datetime64[us]")
+
+
+def timestamps_within(rng, starts, ends):
+    # Un instante por fila dentro de [starts[i], ends[i]] (fechas inclusivas)
+    lo = np.asarray(starts, dtype="datetime64[D]").astype("datetime64[us]").astype(np.int64)
+    hi = (np.asarray(ends, dtype="datetime64[D]") + np.timedelta64(1, "D")).astype("datetime64[us]").astype(np.int64)
+    return (lo + (rng.random(len(lo)) * (hi - lo)).astype(np.int64)).astype("datetime64[us]")
+
+
+def dates(rng, start, end, n):
+    lo = np.datetime64(start, "D").astype(np.int64)
+    hi = np.datetime64(end, "D").astype(np.int64)
+    return rng.integers(lo, hi + 1, size=n).astype("datetime64[D]")
+
+
+def birth_dates(rng, n, minimum_age=16, maximum_age=40, today=None):
+    today = today or date.today()
+    return dates(rng, today - timedelta(days=365 * (maximum_age + 1)), today - timedelta(days=365 * minimum_age), n)
+
+
+def add_days(values, days):
+    return values + days.astype("timedelta64[D]")
+
+
+def hex_digests(rng, n, nbytes=32):
+    raw = rng.integers(0, 256, size=(n, nbytes), dtype=np.uint8).tobytes().hex()
+    width = nbytes * 2
+    return np.array([raw[i * width:(i + 1) * width] for i in range(n)])
+
+
+def sentences(rng, pools, n, nb_words=6):
+    words = pools["words"][rng.integers(0, len(pools["words"]), size=(n, nb_words))]
+    return np.array([" ".join(row).capitalize() + "." for row in words])
+
+
+def texts(rng, pools, n, max_nb_chars=200):
+    # ~6 caracteres por palabra; se recorta al último espacio antes del límite
+    nb_words = max(2, max_nb_chars // 6)
+    out = []
+    for row in pools["words"][rng.integers(0, len(pools["words"]), size=(n, nb_words))]:
+        s = " ".join(row).capitalize()
+        if len(s) >= max_nb_chars:
+            s = s[:s.rfind(" ", 0, max_nb_chars - 1)]
+        out.append(s + ".")
+    return np.array(out)
+
+
+def usernames(rng, pools, start, n):
+    idx = np.arange(start, start + n).astype(str)
+    return np.char.add(np.char.add(np.char.add("user", idx), "_"), choice(rng, pools["user_names"], n))
+
+
+def emails(rng, pools, start, n):
+    # El índice garantiza unicidad sin el registro de fake.unique
+    idx = np.arange(start, start + n).astype(str)
+    local = np.char.add(choice(rng, pools["user_names"], n), idx)
+    return np.char.add(np.char.add(local, "@"), choice(rng, pools["domains"], n))
+
+
+def distinct_pairs(rng, ids, n):
+    # (a, b) con a != b en O(1) por fila: b = a desplazado 1..len-1 posiciones
+    ids = np.asarray(ids)
+    a = rng.integers(0, len(ids), size=n)
+    b = (a + rng.integers(1, len(ids), size=n)) % len(ids)
+    return ids[a], ids[b]
+
+
+def nullable(rng, values, p_null):
+    out = values.astype(object)
+    out[rng.random(len(values)) < p_null] = None
+    return out
+
+
+def rows(*columns):
+    return list(zip(*columns))
+
+
+def records(**columns):
+    # Columnas -> lista de dicts con tipos nativos de Python (para Firestore)
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(np.asarray(c).tolist() for c in columns.values()))]
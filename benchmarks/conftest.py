@@ -0,0 +1,237 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmarks en proceso de los handlers de FastAPI (httpx + ASGITransport, sin red ni uvicorn).
+# Cada sesión crea una base PostgreSQL desechable desde SQL-Script.sql + migraciones, la puebla
+# con Data_generator a una escala fija (seed 42) y usa el emulador de Firestore si
+# FIRESTORE_EMULATOR_HOST está definido o el Firestore en memoria de firestore_fake.py si no.
+# Ejecutar desde la raíz del proyecto:
+#   pytest benchmarks               -> guarda benchmarks/.benchmarks/<máquina>/NNNN_<commit>_*.json
+#   pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:15%
+#   pytest benchmarks --bench-scale 0.1 --bench-keep-db
+SCALES = {"small": 0.01, "medium": 0.05, "large": 0.2}
+BENCH_DB = "bd2_bench"
+SEED = 42
+FOLLOWS_PER_USER = 20
+FIRESTORE_VIDEOS = 200
+FIRESTORE_EVENTS_PER_VIDEO = 20
+ADMIN_PARAMS = {
+    "dbname": "postgres",
+    "user": os.getenv("BENCH_PGUSER", "postgres"),
+    "password": os.getenv("BENCH_PGPASSWORD", "root"),
+    "host": os.getenv("BENCH_PGHOST", "localhost"),
+    "port": os.getenv("BENCH_PGPORT", "5432"),
+}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "Datos de los benchmarks de rutas")
+    group.addoption("--bench-scale", default="small",
+                    help=f"Escala de Data_generator: {', '.join(SCALES)} o un multiplicador")
+    group.addoption("--bench-db", default=BENCH_DB, help="Base desechable (se recrea en cada sesión)")
+    group.addoption("--bench-keep-db", action="store_true", help="No borra la base al terminar")
+    # Por defecto hoy: trending y las ventanas de 7 días necesitan datos recientes. Las ventanas de
+    # Data_generator tienen longitud fija, así que solo se desplazan las fechas, no el dataset.
+    group.addoption("--bench-anchor", default="today", help="--anchor-date de Data_generator (YYYY-MM-DD o today)")
+
+
+def bench_scale(config):
+    value = config.getoption("--bench-scale")
+    return SCALES[value] if value in SCALES else float(value)
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    # La escala forma parte del contexto: resultados de escalas distintas no son comparables
+    machine_info["bench_scale"] = bench_scale(config)
+
+
+def create_database(params, dbname):
+    import psycopg2
+    try:
+        conn = psycopg2.connect(**params, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL no disponible para benchmarks: {e}")
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{dbname}" WITH (FORCE)')
+        cur.execute(f'CREATE DATABASE "{dbname}"')
+    conn.close()
+
+
+def drop_database(params, dbname):
+    import psycopg2
+    conn = psycopg2.connect(**params)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{dbname}" WITH (FORCE)')
+    conn.close()
+
+
+def seed_follows(conn):
+    # Data_generator no genera follow: cada usuario sigue a FOLLOWS_PER_USER creadores al azar
+    with conn.cursor() as cur:
+        cur.execute("SELECT setseed(0.42)")
+        cur.execute("""
+            INSERT INTO follow (follower_id, followed_id)
+            SELECT u.user_id, c.user_id
+            FROM app_user u
+            CROSS JOIN LATERAL (
+                SELECT user_id FROM app_user
+                WHERE role = 'creator' AND user_id <> u.user_id
+                ORDER BY random() LIMIT %s
+            ) c
+            ON CONFLICT DO NOTHING
+        """, (FOLLOWS_PER_USER,))
+    conn.commit()
+
+
+def build_database(params, scale, anchor):
+    import psycopg2
+    from psycopg2.pool import ThreadedConnectionPool
+    import batch_generator as bg
+    import Data_generator
+    from migrations.migrate import migrate
+
+    conn = psycopg2.connect(**params)
+    with open(os.path.join(ROOT, "SQL-Script.sql"), encoding="utf-8") as f:
+        with conn.cursor() as cur:
+            cur.execute(f.read())
+    conn.commit()
+    migrate(conn)
+
+    Data_generator.set_anchor(bg.parse_anchor(anchor))
+    volumes = {table: max(1, int(n * scale)) for table, n in Data_generator.BASE_VOLUMES.items()}
+    pool = ThreadedConnectionPool(1, 4, **params)
+    try:
+        stats = Data_generator.run_pipeline(pool, volumes, 4, SEED, bg.build_pools(SEED))
+    finally:
+        pool.closeall()
+    if len(stats) != len(Data_generator.TABLES):
+        pytest.exit("Data_generator no pudo poblar todas las tablas de benchmark", returncode=1)
+    seed_follows(conn)
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def sample_ids(params):
+    import psycopg2
+    conn = psycopg2.connect(**params)
+    queries = {
+        "users": "SELECT user_id FROM app_user WHERE role = 'user' ORDER BY user_id LIMIT 50",
+        "creators": """
+            SELECT creator_id FROM video GROUP BY creator_id ORDER BY count(*) DESC, creator_id LIMIT 20
+        """,
+        "videos": "SELECT video_id FROM video ORDER BY video_id LIMIT %s" % FIRESTORE_VIDEOS,
+        "advertisers": """
+            SELECT advertiser_id FROM campaign GROUP BY advertiser_id ORDER BY count(*) DESC, advertiser_id LIMIT 20
+        """,
+    }
+    ids = {}
+    with conn.cursor() as cur:
+        for name, sql in queries.items():
+            cur.execute(sql)
+            ids[name] = [row[0] for row in cur.fetchall()]
+        cur.execute("SELECT video_id, creator_id FROM video ORDER BY video_id LIMIT %s", (FIRESTORE_VIDEOS,))
+        ids["video_creators"] = dict(cur.fetchall())
+        # Palabra frecuente de los títulos generados, para que la búsqueda devuelva resultados
+        cur.execute("""
+            SELECT lower(word) FROM (SELECT regexp_split_to_table(title, '\\W+') AS word FROM video LIMIT 5000) w
+            WHERE length(word) >= 5 GROUP BY lower(word) ORDER BY count(*) DESC, 1 LIMIT 1
+        """)
+        ids["keyword"] = cur.fetchone()[0]
+    conn.close()
+    return ids
+
+
+def seed_firestore(firebase_db, ids):
+    # Vistas y reacciones recientes para los primeros videos + sus contadores pre-agregados
+    from backend.db import counters
+    now = datetime.utcnow()
+    users = ids["users"]
+    events = []
+    for index, (video_id, creator_id) in enumerate(ids["video_creators"].items()):
+        batch = firebase_db.batch()
+        for n in range(FIRESTORE_EVENTS_PER_VIDEO):
+            ts = now - timedelta(hours=(index * FIRESTORE_EVENTS_PER_VIDEO + n) % (7 * 24))
+            user_id = users[(index + n) % len(users)]
+            batch.set(firebase_db.collection("Views").document(), {
+                "video_id": str(video_id), "user_id": user_id, "watch_time_sec": 10 + n, "timestamp": ts,
+            })
+            events.append((creator_id, video_id, "views", ts))
+            if n % 4 == 0:
+                batch.set(firebase_db.collection("Reactions").document(), {
+                    "video_id": str(video_id), "user_id": user_id, "type": "like", "timestamp": ts,
+                })
+                events.append((creator_id, video_id, "reactions", ts))
+        batch.commit()
+    counters.apply_increments(counters.count_events(events))
+
+
+@pytest.fixture(scope="session")
+def bench_db(request):
+    config = request.config
+    dbname = config.getoption("--bench-db")
+    create_database(ADMIN_PARAMS, dbname)
+    params = {**ADMIN_PARAMS, "dbname": dbname}
+    build_database(params, bench_scale(config), config.getoption("--bench-anchor"))
+    yield params
+    if not config.getoption("--bench-keep-db"):
+        drop_database(ADMIN_PARAMS, dbname)
+
+
+@pytest.fixture(scope="session")
+def ids(bench_db):
+    return sample_ids(bench_db)
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def app(bench_db, ids, loop, tmp_path_factory):
+    p = bench_db
+    os.environ["POSTGRES_URL"] = f"postgresql+asyncpg://{p['user']}:{p['password']}@{p['host']}:{p['port']}/{p['dbname']}"
+    os.environ["WRITE_BEHIND_LOG_DIR"] = str(tmp_path_factory.mktemp("write_behind_log"))
+    if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        # backend/db/firebase.py real (executor, métricas, profiling) sobre el cliente en memoria
+        os.environ.setdefault("FIRESTORE_CLIENT_FACTORY", "firestore_fake:FakeFirestore")
+    from backend.db.firebase import db as firebase_db
+    from backend.main import app
+
+    seed_firestore(firebase_db, ids)
+    lifespan = app.router.lifespan_context(app)
+    loop.run_until_complete(lifespan.__aenter__())
+    yield app
+    loop.run_until_complete(lifespan.__aexit__(None, None, None))
+
+
+@pytest.fixture(scope="session")
+def client(app, loop):
+    import httpx
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench/api", timeout=300)
+    yield client
+    loop.run_until_complete(client.aclose())
+
+
+@pytest.fixture(scope="session")
+def call(client, loop):
+    # Petición síncrona para pytest-benchmark; falla si el handler devolvió {"error": ...}
+    def request(method, path, **kwargs):
+        response = loop.run_until_complete(client.request(method, path, **kwargs))
+        assert response.status_code < 400, f"{response.status_code}: {response.text[:300]}"
+        assert not response.content.startswith(b'{"error"'), response.text[:300]
+        return response
+    return request
@@ -0,0 +1,274 @@
+import threading
+import uuid
+from datetime import datetime
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore_v1 import transforms
+
+# Firestore en memoria con la parte del SDK que usa backend/: colecciones y subcolecciones,
+# WriteBatch (set/create/update/delete), transformaciones (Increment, ArrayUnion, ArrayRemove, SERVER_TIMESTAMP),
+# consultas where/select/order_by/limit, collection_group y agregaciones count/sum/avg.
+# backend/db/firebase.py lo usa como cliente con FIRESTORE_CLIENT_FACTORY=firestore_fake:FakeFirestore.
+OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+class NotFound(Exception):
+    pass
+
+
+def apply_value(current, value):
+    if isinstance(value, transforms.Increment):
+        return (current or 0) + value.value
+    if isinstance(value, transforms.ArrayUnion):
+        items = list(current or [])
+        return items + [v for v in value.values if v not in items]
+    if isinstance(value, transforms.ArrayRemove):
+        return [v for v in (current or []) if v not in value.values]
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.utcnow()
+    return value
+
+
+class Snapshot:
+    def __init__(self, reference, data, fields=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        if data is not None and fields is not None:
+            data = {k: v for k, v in data.items() if k in fields}
+        self._data = dict(data) if data is not None else None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class AggregationResult:
+    def __init__(self, alias, value):
+        self.alias = alias
+        self.value = value
+
+
+class AggregationQuery:
+    def __init__(self, query):
+        self.query = query
+        self.aggregations = []
+
+    def _add(self, kind, field, alias):
+        self.aggregations.append((kind, field, alias))
+        return self
+
+    def count(self, alias=None):
+        return self._add("count", None, alias or "count")
+
+    def sum(self, field, alias=None):
+        return self._add("sum", field, alias or "sum")
+
+    def avg(self, field, alias=None):
+        return self._add("avg", field, alias or "avg")
+
+    def get(self):
+        docs = [snap.to_dict() for snap in self.query.stream()]
+        results = []
+        for kind, field, alias in self.aggregations:
+            values = [d[field] for d in docs if isinstance(d.get(field), (int, float))] if field else []
+            if kind == "count":
+                value = len(docs)
+            elif kind == "sum":
+                value = sum(values)
+            else:
+                value = sum(values) / len(values) if values else None
+            results.append(AggregationResult(alias, value))
+        return [results]
+
+
+class Query:
+    def __init__(self, client, paths, filters=(), fields=None, order=(), limit=None, start_after=None):
+        self._client = client
+        self._paths = paths  # función -> rutas de colección a recorrer
+        self._filters = list(filters)
+        self._fields = fields
+        self._order = list(order)
+        self._limit = limit
+        self._start_after = start_after
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, fields=self._fields, order=self._order,
+                     limit=self._limit, start_after=self._start_after)
+        state.update(changes)
+        return Query(self._client, self._paths, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self._filters + [(field, op, value)])
+
+    def select(self, fields):
+        return self._copy(fields=list(fields))
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._copy(order=self._order + [(str(field), direction)])
+
+    def limit(self, n):
+        return self._copy(limit=n)
+
+    def start_after(self, snapshot):
+        return self._copy(start_after=snapshot)
+
+    def count(self, alias=None):
+        return AggregationQuery(self).count(alias)
+
+    def sum(self, field, alias=None):
+        return AggregationQuery(self).sum(field, alias)
+
+    def avg(self, field, alias=None):
+        return AggregationQuery(self).avg(field, alias)
+
+    def stream(self):
+        with self._client.lock:
+            docs = [
+                (DocumentRef(self._client, f"{path}/{doc_id}"), dict(data))
+                for path in self._paths()
+                for doc_id, data in self._client.store.get(path, {}).items()
+            ]
+        docs = [
+            (ref, data) for ref, data in docs
+            if all(field in data and OPERATORS[op](data[field], value) for field, op, value in self._filters)
+        ]
+        for field, direction in reversed(self._order or [("__name__", "ASCENDING")]):
+            key = (lambda d: d[0].path) if field == "__name__" else (lambda d, f=field: d[1].get(f))
+            docs.sort(key=key, reverse=str(direction).upper().startswith("DESC"))
+        if self._start_after is not None:
+            ids = [ref.path for ref, _ in docs]
+            if self._start_after.reference.path in ids:
+                docs = docs[ids.index(self._start_after.reference.path) + 1:]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        for ref, data in docs:
+            yield Snapshot(ref, data, self._fields)
+
+    def get(self):
+        return list(self.stream())
+
+
+class CollectionRef(Query):
+    def __init__(self, client, path):
+        super().__init__(client, lambda: [path])
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        return DocumentRef(self._client, self.path.rsplit("/", 1)[0]) if "/" in self.path else None
+
+    def document(self, document_id=None):
+        return DocumentRef(self._client, f"{self.path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return datetime.utcnow(), ref
+
+
+class DocumentRef:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+        self._collection = path.rsplit("/", 1)[0]
+
+    @property
+    def parent(self):
+        return CollectionRef(self._client, self._collection)
+
+    def collection(self, name):
+        return CollectionRef(self._client, f"{self.path}/{name}")
+
+    def get(self):
+        with self._client.lock:
+            data = self._client.store.get(self._collection, {}).get(self.id)
+            return Snapshot(self, data)
+
+    def set(self, data, merge=False):
+        with self._client.lock:
+            docs = self._client.store.setdefault(self._collection, {})
+            current = dict(docs.get(self.id) or {}) if merge else {}
+            for key, value in data.items():
+                current[key] = apply_value(current.get(key), value)
+            docs[self.id] = current
+
+    def create(self, data):
+        with self._client.lock:
+            if self.id in self._client.store.get(self._collection, {}):
+                raise AlreadyExists(self.path)
+            self.set(data)
+
+    def update(self, data):
+        with self._client.lock:
+            if self.id not in self._client.store.get(self._collection, {}):
+                raise NotFound(self.path)
+        self.set(data, merge=True)
+
+    def delete(self):
+        with self._client.lock:
+            self._client.store.get(self._collection, {}).pop(self.id, None)
+
+
+class WriteBatch:
+    def __init__(self):
+        self._writes = []
+        self._creates = []
+
+    def set(self, ref, data, merge=False):
+        self._writes.append(lambda: ref.set(data, merge=merge))
+
+    def create(self, ref, data):
+        self._creates.append(ref)
+        self._writes.append(lambda: ref.create(data))
+
+    def update(self, ref, data):
+        self._writes.append(lambda: ref.update(data))
+
+    def delete(self, ref):
+        self._writes.append(ref.delete)
+
+    def commit(self):
+        if len(self._writes) > 500:
+            raise ValueError("A write batch can have at most 500 operations")
+        # Como en Firestore, si un create encuentra el documento no se aplica nada del lote
+        for ref in self._creates:
+            if ref.get().exists:
+                raise AlreadyExists(ref.path)
+        for write in self._writes:
+            write()
+        return []
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.store = {}  # ruta de colección -> {id: datos}
+        self.lock = threading.RLock()
+
+    def collection(self, path):
+        return CollectionRef(self, path)
+
+    def collection_group(self, name):
+        return Query(self, lambda: [p for p in list(self.store) if p.rsplit("/", 1)[-1] == name])
+
+    def batch(self):
+        return WriteBatch()
+
+    def get_all(self, references, field_paths=None):
+        for ref in references:
+            with self.lock:
+                data = self.store.get(ref._collection, {}).get(ref.id)
+            yield Snapshot(ref, data, field_paths)
+
+    def clear(self):
+        with self.lock:
+            self.store.clear()
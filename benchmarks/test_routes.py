@@ -0,0 +1,190 @@
+import itertools
+import uuid
+import pytest
+
+# Un benchmark por ruta (y por variante relevante: modo, fuente, fresh). Los grupos separan
+# lecturas, escrituras y pruebas de volumen; las rutas pesadas usan pedantic con pocas rondas.
+# Regresiones vigiladas en especial: search_videos, trending_videos_sql, creator_video_analytics.
+HEAVY_ROUNDS = 5
+
+
+def rotate(values):
+    return itertools.cycle(values).__next__
+
+
+# ---------- Lecturas ----------
+
+@pytest.mark.parametrize("mode", ["fulltext", "substring"])
+def test_search_videos(benchmark, call, ids, mode):
+    benchmark.group = "search_videos"
+    benchmark(call, "GET", "/requirements/search-videos", params={"keyword": ids["keyword"], "mode": mode})
+
+
+def test_search_videos_next_page(benchmark, call, ids):
+    benchmark.group = "search_videos"
+    cursor = call("GET", "/requirements/search-videos", params={"keyword": ids["keyword"]}).json()["next_cursor"]
+    if cursor is None:
+        pytest.skip("La primera página no tiene continuación a esta escala")
+    benchmark(call, "GET", "/requirements/search-videos", params={"keyword": ids["keyword"], "cursor": cursor})
+
+
+@pytest.mark.parametrize("limit", [10, 100])
+def test_trending_videos_sql(benchmark, call, limit):
+    benchmark.group = "trending_videos_sql"
+    benchmark(call, "GET", "/test-bigdata/performance/trending-videos-sql", params={"limit": limit})
+
+
+@pytest.mark.parametrize("source", ["counters", "aggregate", "scan"])
+def test_creator_video_analytics(benchmark, call, ids, source):
+    benchmark.group = "creator_video_analytics"
+    creator = rotate(ids["creators"])
+    benchmark(lambda: call("GET", "/requirements/creator-video-analytics",
+                           params={"creator_id": creator(), "source": source}))
+
+
+@pytest.mark.parametrize("fresh", [False, True])
+def test_campaign_analytics(benchmark, call, ids, fresh):
+    benchmark.group = "campaign_analytics"
+    advertiser = rotate(ids["advertisers"])
+    benchmark(lambda: call("GET", "/requirements/campaign-analytics",
+                           params={"advertiser_id": advertiser(), "fresh": fresh}))
+
+
+def test_feed(benchmark, call, ids):
+    benchmark.group = "social"
+    user = rotate(ids["users"])
+    benchmark(lambda: call("GET", "/requirements/feed", params={"user_id": user()}))
+
+
+def test_follower_count(benchmark, call, ids):
+    benchmark.group = "social"
+    creator = rotate(ids["creators"])
+    benchmark(lambda: call("GET", "/requirements/follower-count", params={"user_id": creator()}))
+
+
+def test_is_following(benchmark, call, ids):
+    benchmark.group = "social"
+    pairs = rotate(list(itertools.product(ids["users"][:10], ids["creators"][:5])))
+
+    def run():
+        follower_id, followed_id = pairs()
+        call("GET", "/requirements/is-following", params={"follower_id": follower_id, "followed_id": followed_id})
+    benchmark(run)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_postgres_retrieve_users(benchmark, call, stream):
+    benchmark.group = "postgres_retrieve_users"
+    benchmark(call, "GET", "/test-bigdata/postgres-retrieve-users", params={"batch_size": 1000, "stream": stream})
+
+
+@pytest.mark.parametrize("mode", ["full", "projection", "count"])
+def test_firestore_retrieve_views(benchmark, call, ids, mode):
+    benchmark.group = "firestore_retrieve_views"
+    video = rotate(ids["videos"])
+    benchmark(lambda: call("GET", "/test-bigdata/firestore-retrieve-views",
+                           params={"video_id": str(video()), "mode": mode}))
+
+
+@pytest.mark.parametrize("path", [
+    "/requirements/outbox-stats",
+    "/admin/pool-metrics",
+    "/admin/query-stats",
+    "/admin/write-behind",
+    "/admin/feed-fanout",
+    "/admin/social-cache",
+])
+def test_stats_endpoints(benchmark, call, path):
+    benchmark.group = "stats"
+    benchmark(call, "GET", path)
+
+
+# ---------- Escrituras ----------
+
+def test_register(benchmark, call):
+    benchmark.group = "writes"
+    run_id = uuid.uuid4().hex[:8]
+    counter = itertools.count()
+
+    def run():
+        n = next(counter)
+        call("POST", "/requirements/register", json={
+            "name": "Bench", "last_name": "User", "username": f"bench_{run_id}_{n}",
+            "email": f"bench_{run_id}_{n}@example.com", "password": "x" * 64,
+        })
+    benchmark(run)
+
+
+def test_upload_video(benchmark, call, ids):
+    benchmark.group = "writes"
+    creator = rotate(ids["creators"])
+    benchmark(lambda: call("POST", "/requirements/upload-video", data={
+        "creator_id": creator(), "title": "Benchmark upload", "description": "Video de benchmark",
+        "duration": 60, "visibility": "public",
+    }))
+
+
+def test_like_video(benchmark, call, ids):
+    benchmark.group = "writes"
+    video, user = rotate(ids["videos"]), rotate(ids["users"])
+    benchmark(lambda: call("POST", "/requirements/like-video", data={"video_id": str(video()), "user_id": user()}))
+
+
+def test_comment_video(benchmark, call, ids):
+    benchmark.group = "writes"
+    video, user = rotate(ids["videos"]), rotate(ids["users"])
+    benchmark(lambda: call("POST", "/requirements/comment-video",
+                           data={"video_id": str(video()), "user_id": str(user()), "comment": "Buen video"}))
+
+
+def test_follow_creator(benchmark, call, ids):
+    # Cada ronda sigue a un creador que el usuario no sigue (unfollow en el setup, fuera de la medida)
+    benchmark.group = "writes"
+    follower_id, followed_id = ids["users"][-1], ids["creators"][-1]
+    pair = {"follower_id": follower_id, "followed_id": followed_id}
+
+    def unfollow():
+        call("POST", "/requirements/unfollow-creator", data=pair)
+    benchmark.pedantic(call, args=("POST", "/requirements/follow-creator"), kwargs={"data": pair},
+                       setup=unfollow, rounds=50)
+
+
+def test_report_video(benchmark, call, ids):
+    benchmark.group = "writes"
+    video, user = rotate(ids["videos"]), rotate(ids["users"])
+    benchmark(lambda: call("POST", "/requirements/report-video",
+                           data={"video_id": video(), "reporter_id": user(), "reason": "spam"}))
+
+
+def test_create_campaign(benchmark, call, ids):
+    benchmark.group = "writes"
+    advertiser = rotate(ids["advertisers"])
+    benchmark(lambda: call("POST", "/requirements/create-campaign",
+                           data={"advertiser_id": advertiser(), "budget": 1000.0, "targeting": "18-25"}))
+
+
+# ---------- Volumen ----------
+
+@pytest.mark.parametrize("mode", ["copy", "values", "executemany"])
+def test_postgres_bulk_insert(benchmark, call, mode):
+    benchmark.group = "postgres_bulk_insert"
+    benchmark.pedantic(call, args=("POST", "/test-bigdata/postgres-bulk-insert"),
+                       kwargs={"params": {"batch_size": 1000, "mode": mode}}, rounds=HEAVY_ROUNDS)
+
+
+def test_firebase_insert_views(benchmark, call):
+    benchmark.group = "firestore_writes"
+    benchmark.pedantic(call, args=("POST", "/test-bigdata/firebase-insert-views"),
+                       kwargs={"params": {"batch_size": 1000}}, rounds=HEAVY_ROUNDS)
+
+
+def test_outbox_replication(benchmark, call):
+    benchmark.group = "firestore_writes"
+    benchmark.pedantic(call, args=("POST", "/test-bigdata/outbox-replication"),
+                       kwargs={"params": {"videos": 200, "timeout_sec": 60}}, rounds=HEAVY_ROUNDS)
+
+
+def test_reconcile_counters(benchmark, call):
+    benchmark.group = "creator_video_analytics"
+    benchmark.pedantic(call, args=("POST", "/requirements/creator-video-analytics/reconcile"),
+                       kwargs={"params": {"days": 7}}, rounds=HEAVY_ROUNDS)
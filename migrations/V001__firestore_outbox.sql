@@ -0,0 +1,15 @@
+-- Transactional outbox: documentos pendientes de replicar a Firestore,
+-- escritos en la misma transacción que la fila de PostgreSQL.
+CREATE TABLE firestore_outbox (
+    outbox_id BIGSERIAL PRIMARY KEY,
+    collection VARCHAR(100) NOT NULL,
+    document_id VARCHAR(255) NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP,
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT
+);
+
+-- Solo las filas pendientes: el relay las lee en orden de outbox_id
+CREATE INDEX idx_firestore_outbox_pending ON firestore_outbox (outbox_id) WHERE processed_at IS NULL;
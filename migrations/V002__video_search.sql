@@ -0,0 +1,12 @@
+-- Búsqueda de videos: tsvector generado + GIN (ranking) y trigramas (ILIKE '%kw%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE video ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX idx_video_search_vector ON video USING GIN (search_vector);
+CREATE INDEX idx_video_title_trgm ON video USING GIN (title gin_trgm_ops);
+CREATE INDEX idx_video_description_trgm ON video USING GIN (description gin_trgm_ops);
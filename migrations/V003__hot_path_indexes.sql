@@ -0,0 +1,24 @@
+-- Índices para las consultas de backend/routes/
+
+-- trending-videos-sql: rango sobre upload_datetime ordenado DESC (cubre el JOIN por creator_id)
+CREATE INDEX idx_video_upload_datetime ON video (upload_datetime DESC)
+    INCLUDE (video_id, title, visibility, creator_id);
+
+-- creator-video-analytics: COUNT(*) y AVG(duration) por creador con index-only scan
+CREATE INDEX idx_video_creator ON video (creator_id) INCLUDE (duration);
+
+-- follow: seguidores de un creador y seguidos de un usuario
+CREATE INDEX idx_follow_followed ON follow (followed_id, follower_id);
+CREATE INDEX idx_follow_follower ON follow (follower_id, followed_id);
+
+-- campaign-analytics: campañas y transacciones por anunciante
+CREATE INDEX idx_campaign_advertiser ON campaign (advertiser_id);
+CREATE INDEX idx_transaction_advertiser ON transaction (advertiser_id) INCLUDE (amount)
+    WHERE advertiser_id IS NOT NULL;
+
+-- postgres-bulk-insert: búsqueda por prefijo de los usuarios sintéticos
+CREATE INDEX idx_app_user_bigdata_username ON app_user (username text_pattern_ops)
+    WHERE username LIKE 'bigdata_user_%';
+
+-- FKs con ON DELETE CASCADE desde video
+CREATE INDEX idx_contentreport_video ON contentreport (video_id);
@@ -0,0 +1,50 @@
+-- Resumen de videos de los últimos 7 días para trending-videos-sql,
+-- mantenido incrementalmente por triggers de sentencia sobre video (eficientes también con COPY).
+CREATE TABLE trending_video (
+    video_id INTEGER PRIMARY KEY REFERENCES video(video_id) ON DELETE CASCADE,
+    creator_id INTEGER NOT NULL,
+    title VARCHAR(255),
+    upload_datetime TIMESTAMP NOT NULL,
+    visibility video_visibility,
+    creator_username VARCHAR(50)
+);
+
+CREATE INDEX idx_trending_video_recent ON trending_video (upload_datetime DESC, video_id DESC);
+
+CREATE FUNCTION sync_trending_video() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO trending_video (video_id, creator_id, title, upload_datetime, visibility, creator_username)
+    SELECT n.video_id, n.creator_id, n.title, n.upload_datetime, n.visibility, au.username
+    FROM new_rows n
+    JOIN app_user au ON au.user_id = n.creator_id
+    WHERE n.upload_datetime >= NOW() - INTERVAL '7 days'
+    ON CONFLICT (video_id) DO UPDATE SET
+        creator_id = EXCLUDED.creator_id,
+        title = EXCLUDED.title,
+        upload_datetime = EXCLUDED.upload_datetime,
+        visibility = EXCLUDED.visibility,
+        creator_username = EXCLUDED.creator_username;
+
+    DELETE FROM trending_video t
+    USING new_rows n
+    WHERE t.video_id = n.video_id AND n.upload_datetime < NOW() - INTERVAL '7 days';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_video_trending_insert
+    AFTER INSERT ON video
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_trending_video();
+
+CREATE TRIGGER trg_video_trending_update
+    AFTER UPDATE ON video
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_trending_video();
+
+-- Carga inicial
+INSERT INTO trending_video (video_id, creator_id, title, upload_datetime, visibility, creator_username)
+SELECT v.video_id, v.creator_id, v.title, v.upload_datetime, v.visibility, au.username
+FROM video v
+JOIN app_user au ON au.user_id = v.creator_id
+WHERE v.upload_datetime >= NOW() - INTERVAL '7 days';
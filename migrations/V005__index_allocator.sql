@@ -0,0 +1,13 @@
+-- Reserva atómica de rangos de índices (p. ej. bigdata_user_N en postgres-bulk-insert)
+CREATE TABLE index_allocator (
+    name VARCHAR(100) PRIMARY KEY,
+    next_value BIGINT NOT NULL
+);
+
+INSERT INTO index_allocator (name, next_value)
+SELECT 'bigdata_user', COALESCE(MAX(CAST(SUBSTRING(username FROM 'bigdata_user_(\d+)') AS BIGINT)), -1) + 1
+FROM app_user
+WHERE username LIKE 'bigdata_user_%';
+
+-- Ya no se busca el último índice por prefijo de username
+DROP INDEX IF EXISTS idx_app_user_bigdata_username;
@@ -0,0 +1,79 @@
+-- Atribución de transacciones a campañas y resumen campaign_stats para campaign-analytics,
+-- mantenido por triggers de sentencia sobre transaction (eficientes también con COPY).
+ALTER TABLE transaction ADD COLUMN campaign_id INTEGER REFERENCES campaign(campaign_id);
+
+-- Pagos de anuncios existentes: campaña del anunciante activa en la fecha de la transacción
+UPDATE transaction t
+SET campaign_id = (
+    SELECT c.campaign_id
+    FROM campaign c
+    WHERE c.advertiser_id = t.advertiser_id
+      AND t.transaction_datetime::date BETWEEN c.start_date AND c.end_date
+    ORDER BY c.start_date DESC, c.campaign_id DESC
+    LIMIT 1
+)
+WHERE t.type = 'ad_payment' AND t.advertiser_id IS NOT NULL;
+
+-- campaign-analytics?fresh=true: agregado en vivo por campaña con index-only scan
+CREATE INDEX idx_transaction_campaign ON transaction (campaign_id) INCLUDE (amount)
+    WHERE campaign_id IS NOT NULL;
+
+CREATE TABLE campaign_stats (
+    campaign_id INTEGER PRIMARY KEY REFERENCES campaign(campaign_id) ON DELETE CASCADE,
+    transactions BIGINT NOT NULL DEFAULT 0,
+    total_spent DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Aplica los deltas de la sentencia agrupados por campaña: una fila de campaign_stats
+-- por campaña afectada, no por transacción
+CREATE FUNCTION sync_campaign_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO campaign_stats (campaign_id, transactions, total_spent)
+        SELECT o.campaign_id, -COUNT(*), -SUM(o.amount)
+        FROM old_rows o
+        WHERE o.campaign_id IS NOT NULL
+        GROUP BY o.campaign_id
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            transactions = campaign_stats.transactions + EXCLUDED.transactions,
+            total_spent = campaign_stats.total_spent + EXCLUDED.total_spent,
+            updated_at = NOW();
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO campaign_stats (campaign_id, transactions, total_spent)
+        SELECT n.campaign_id, COUNT(*), SUM(n.amount)
+        FROM new_rows n
+        WHERE n.campaign_id IS NOT NULL
+        GROUP BY n.campaign_id
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            transactions = campaign_stats.transactions + EXCLUDED.transactions,
+            total_spent = campaign_stats.total_spent + EXCLUDED.total_spent,
+            updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_transaction_campaign_stats_insert
+    AFTER INSERT ON transaction
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_campaign_stats();
+
+CREATE TRIGGER trg_transaction_campaign_stats_update
+    AFTER UPDATE ON transaction
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_campaign_stats();
+
+CREATE TRIGGER trg_transaction_campaign_stats_delete
+    AFTER DELETE ON transaction
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_campaign_stats();
+
+-- Carga inicial
+INSERT INTO campaign_stats (campaign_id, transactions, total_spent)
+SELECT campaign_id, COUNT(*), SUM(amount)
+FROM transaction
+WHERE campaign_id IS NOT NULL
+GROUP BY campaign_id;
@@ -0,0 +1,11 @@
+-- Feed: creadores con demasiados seguidores para fan-out-on-write.
+-- Sus videos no se copian a FeedCache; se mezclan al leer el feed (fan-out-on-read).
+-- La mantiene backend/db/feed.py al procesar cada video nuevo.
+CREATE TABLE feed_celebrity (
+    creator_id INTEGER PRIMARY KEY REFERENCES app_user(user_id) ON DELETE CASCADE,
+    followers BIGINT NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Últimos videos de cada creador (fan-out-on-read y backfill de FeedCache)
+CREATE INDEX idx_video_creator_recent ON video (creator_id, video_id DESC) INCLUDE (visibility);
@@ -0,0 +1,81 @@
+-- Grafo social: un solo follow por par (follower_id, followed_id) y contadores
+-- desnormalizados de seguidores/seguidos mantenidos por triggers de sentencia sobre follow.
+
+-- Duplicados existentes: se conserva el follow más antiguo
+DELETE FROM follow f
+USING follow d
+WHERE f.follower_id = d.follower_id AND f.followed_id = d.followed_id AND f.id > d.id;
+
+-- El índice único cubre también las búsquedas por follower_id
+DROP INDEX IF EXISTS idx_follow_follower;
+ALTER TABLE follow ADD CONSTRAINT uq_follow_pair UNIQUE (follower_id, followed_id);
+
+CREATE TABLE social_counts (
+    user_id INTEGER PRIMARY KEY REFERENCES app_user(user_id) ON DELETE CASCADE,
+    followers BIGINT NOT NULL DEFAULT 0,
+    following BIGINT NOT NULL DEFAULT 0
+);
+
+-- Deltas agrupados por usuario y aplicados en orden de user_id (orden de bloqueo estable)
+CREATE FUNCTION sync_social_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO social_counts (user_id, followers, following)
+        SELECT user_id, SUM(followers), SUM(following)
+        FROM (
+            SELECT followed_id AS user_id, -1 AS followers, 0 AS following FROM old_rows
+            UNION ALL
+            SELECT follower_id, 0, -1 FROM old_rows
+        ) d
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+        ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            followers = social_counts.followers + EXCLUDED.followers,
+            following = social_counts.following + EXCLUDED.following;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO social_counts (user_id, followers, following)
+        SELECT user_id, SUM(followers), SUM(following)
+        FROM (
+            SELECT followed_id AS user_id, 1 AS followers, 0 AS following FROM new_rows
+            UNION ALL
+            SELECT follower_id, 0, 1 FROM new_rows
+        ) d
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+        ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            followers = social_counts.followers + EXCLUDED.followers,
+            following = social_counts.following + EXCLUDED.following;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_follow_social_counts_insert
+    AFTER INSERT ON follow
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_social_counts();
+
+CREATE TRIGGER trg_follow_social_counts_update
+    AFTER UPDATE ON follow
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_social_counts();
+
+CREATE TRIGGER trg_follow_social_counts_delete
+    AFTER DELETE ON follow
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_social_counts();
+
+-- Carga inicial
+INSERT INTO social_counts (user_id, followers, following)
+SELECT user_id, SUM(followers), SUM(following)
+FROM (
+    SELECT followed_id AS user_id, 1 AS followers, 0 AS following FROM follow
+    UNION ALL
+    SELECT follower_id, 0, 1 FROM follow
+) d
+WHERE user_id IS NOT NULL
+GROUP BY user_id;
@@ -0,0 +1,34 @@
+-- sync_campaign_stats (V006) con los deltas aplicados en orden de campaign_id, como
+-- sync_social_counts (V008): dos sentencias concurrentes sobre las mismas campañas bloquean
+-- sus filas de campaign_stats en el mismo orden y no se producen interbloqueos.
+-- Migración aparte para no alterar el checksum de V006 en bases ya migradas.
+CREATE OR REPLACE FUNCTION sync_campaign_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO campaign_stats (campaign_id, transactions, total_spent)
+        SELECT o.campaign_id, -COUNT(*), -SUM(o.amount)
+        FROM old_rows o
+        WHERE o.campaign_id IS NOT NULL
+        GROUP BY o.campaign_id
+        ORDER BY o.campaign_id
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            transactions = campaign_stats.transactions + EXCLUDED.transactions,
+            total_spent = campaign_stats.total_spent + EXCLUDED.total_spent,
+            updated_at = NOW();
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO campaign_stats (campaign_id, transactions, total_spent)
+        SELECT n.campaign_id, COUNT(*), SUM(n.amount)
+        FROM new_rows n
+        WHERE n.campaign_id IS NOT NULL
+        GROUP BY n.campaign_id
+        ORDER BY n.campaign_id
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            transactions = campaign_stats.transactions + EXCLUDED.transactions,
+            total_spent = campaign_stats.total_spent + EXCLUDED.total_spent,
+            updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
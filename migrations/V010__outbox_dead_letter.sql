@@ -0,0 +1,10 @@
+-- Reintentos del relay del outbox: backoff por fila (next_attempt_at) y filas agotadas
+-- (failed_at) fuera de la cola de pendientes. Para reintentar una fila fallida:
+--   UPDATE firestore_outbox SET failed_at = NULL, next_attempt_at = NULL, attempts = 0 WHERE outbox_id = ...;
+ALTER TABLE firestore_outbox
+    ADD COLUMN next_attempt_at TIMESTAMP,
+    ADD COLUMN failed_at TIMESTAMP;
+
+DROP INDEX idx_firestore_outbox_pending;
+CREATE INDEX idx_firestore_outbox_pending ON firestore_outbox (outbox_id)
+    WHERE processed_at IS NULL AND failed_at IS NULL;
@@ -0,0 +1,11 @@
+-- Cola durable del fan-out de FeedCache: upload-video inserta la fila en la misma transacción
+-- que el video y backend/db/feed.py la borra al terminar de repartirlo. after_id guarda el
+-- último seguidor entregado (un reinicio retoma el fan-out ahí) y claimed_until es el lease
+-- del worker que la procesa: si muere, la fila vuelve a estar disponible al vencer.
+CREATE TABLE feed_fanout_queue (
+    video_id INTEGER PRIMARY KEY REFERENCES video(video_id) ON DELETE CASCADE,
+    creator_id INTEGER NOT NULL,
+    after_id INTEGER NOT NULL DEFAULT 0,
+    claimed_until TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,118 @@
+import re
+import sys
+import psycopg2
+
+sys.path.append(".")
+from backend.db import queries
+
+# Ejecuta EXPLAIN (ANALYZE, BUFFERS) sobre cada consulta de backend/db/queries.py y falla si
+# aparece un Seq Scan sobre una tabla grande. Las sentencias de escritura también se ejecutan
+# (ANALYZE las ejecuta) dentro de una transacción que se deshace siempre; solo avanzan las
+# secuencias. Todo parámetro necesita un valor real o fijo: un parámetro sin valor cuenta como
+# fallo (con NULL, `col = NULL` es falso y el plan no dice nada).
+# Ejecutar desde la raíz del proyecto: python migrations/explain_check.py
+DB_PARAMS = {
+    "dbname": "BD2-Project",
+    "user": "postgres",
+    "password": "root",
+    "host": "localhost",
+    "port": "5432"
+}
+LARGE_TABLE_ROWS = 10000
+
+# Valores reales para los parámetros de las consultas: cada columna del resultado es un parámetro
+SAMPLE_PARAMS_SQL = [
+    "SELECT creator_id, video_id FROM video LIMIT 1",
+    "SELECT advertiser_id FROM campaign LIMIT 1",
+    "SELECT follower_id, followed_id, follower_id AS user_id FROM follow LIMIT 1",
+    "SELECT user_id AS reporter_id FROM app_user LIMIT 1",
+    "SELECT name FROM index_allocator LIMIT 1",
+]
+FIXED_PARAMS = {"tsquery": "music:*", "keyword": "%music%", "limit": 20, "batch_size": 1000}
+# Valores de las escrituras (únicos donde hay restricción UNIQUE)
+FIXED_PARAMS.update({
+    "last_name": "Check", "username": "explain_check_user", "email": "explain_check@example.com",
+    "password_hash": "x", "title": "explain check", "description": "explain check", "duration": 60,
+    "visibility": "public", "budget": 1000, "targeting_criteria": "explain check", "reason": "explain check",
+    "collection": "Videos", "document_id": "0", "payload": "{}", "followers": 0, "count": 1, "n": 1,
+})
+# Cursores de las variantes *_after: a partir del inicio / final del orden de cada consulta
+FIXED_PARAMS.update({"after_user_id": 0, "after_id": 2**31 - 1, "after_rank": 1e9, "after_datetime": "infinity"})
+FIXED_PARAMS["lease_sec"] = 300.0
+
+# consulta -> tablas donde un Seq Scan es aceptable
+ALLOWED_SEQ_SCANS = {}
+
+
+def sample_value(name, samples):
+    if name in FIXED_PARAMS:
+        return FIXED_PARAMS[name]
+    if name == "ids":
+        return [samples["video_id"]] if samples.get("video_id") is not None else None
+    return samples.get(name)
+
+
+def to_psycopg(sql):
+    # :nombre -> %(nombre)s (sin tocar los casts ::tipo) y escapar % literales
+    sql = sql.replace("%", "%%")
+    return re.sub(r"(?<!:):(\w+)", r"%(\1)s", sql)
+
+
+def seq_scans(plan, found=None):
+    found = [] if found is None else found
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        seq_scans(child, found)
+    return found
+
+
+def main():
+    conn = psycopg2.connect(**DB_PARAMS)
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples >= %s", (LARGE_TABLE_ROWS,))
+        large_tables = {r[0] for r in cur.fetchall()}
+        samples = {}
+        for sql in SAMPLE_PARAMS_SQL:
+            cur.execute(sql)
+            row = cur.fetchone()
+            if row:
+                samples.update(zip([c.name for c in cur.description], row))
+
+        failures = 0
+        for name, query in queries.QUERIES.items():
+            params = {p: sample_value(p, samples) for p in query.param_names}
+            missing = sorted(p for p, value in params.items() if value is None)
+            if missing:
+                print(f"{name:<28} ❌ sin valor de muestra para {', '.join(missing)}")
+                failures += 1
+                continue
+            # EXPLAIN ANALYZE ejecuta la sentencia: las escrituras se deshacen con el rollback
+            try:
+                cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + to_psycopg(query.sql), params)
+                plan = cur.fetchone()[0][0]
+            except psycopg2.Error as e:
+                print(f"{name:<28} ❌ {str(e).strip().splitlines()[0]}")
+                failures += 1
+                continue
+            finally:
+                conn.rollback()
+            allowed = ALLOWED_SEQ_SCANS.get(name, [])
+            bad = [t for t in seq_scans(plan["Plan"]) if t in large_tables and t not in allowed]
+            status = f"❌ Seq Scan en {', '.join(sorted(set(bad)))}" if bad else "✅"
+            buffers = plan["Plan"].get("Shared Hit Blocks", 0) + plan["Plan"].get("Shared Read Blocks", 0)
+            print(f"{name:<28} {plan['Execution Time']:>10.2f} ms  buffers={buffers:<8} {status}")
+            failures += bool(bad)
+    finally:
+        cur.close()
+        conn.close()
+
+    if failures:
+        print(f"❌ {failures} consultas con Seq Scan sobre tablas grandes o sin poder analizar.")
+        sys.exit(1)
+    print("✅ Ninguna consulta hace Seq Scan sobre tablas grandes.")
+
+
+if __name__ == "__main__":
+    main()
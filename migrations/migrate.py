@@ -0,0 +1,81 @@
+import argparse
+import hashlib
+import os
+import re
+import psycopg2
+
+# Migraciones versionadas sobre el esquema base de SQL-Script.sql.
+# Archivos: migrations/V###__descripcion.sql, aplicados en orden, cada uno en su propia transacción.
+# Ejecutar desde la raíz del proyecto: python migrations/migrate.py [--status]
+DB_PARAMS = {
+    "dbname": "BD2-Project",
+    "user": "postgres",
+    "password": "root",
+    "host": "localhost",
+    "port": "5432"
+}
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE = re.compile(r"^V(\d+)__(\w+)\.sql$")
+
+
+def discover():
+    migrations = []
+    for name in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(name)
+        if match:
+            with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as f:
+                sql = f.read()
+            migrations.append((int(match.group(1)), match.group(2), sql, hashlib.sha256(sql.encode()).hexdigest()))
+    return sorted(migrations)
+
+
+def applied_versions(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cur.fetchall())
+
+
+def migrate(conn, status_only=False):
+    cur = conn.cursor()
+    applied = applied_versions(cur)
+    conn.commit()
+    for version, name, sql, checksum in discover():
+        if version in applied:
+            state = "✅ aplicada" if applied[version] == checksum else "⚠️ modificada tras aplicarse"
+            print(f"V{version:03d} {name}: {state}")
+            continue
+        if status_only:
+            print(f"V{version:03d} {name}: pendiente")
+            continue
+        try:
+            cur.execute(sql)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (version, name, checksum)
+            )
+            conn.commit()
+            print(f"V{version:03d} {name}: 🚀 aplicada")
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Error en V{version:03d} {name}:", e)
+            raise
+    cur.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplica las migraciones pendientes.")
+    parser.add_argument("--status", action="store_true", help="Solo muestra el estado de cada migración")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_PARAMS)
+    try:
+        migrate(conn, status_only=args.status)
+    finally:
+        conn.close()
@@ -1,9 +1,11 @@
+import argparse
+import threading
+import time
 import psycopg2
-import firebase_admin
-from firebase_admin import credentials, firestore
-from faker import Faker
-import random
-from datetime import datetime
+from google.cloud import firestore as gc_firestore
+from concurrent.futures import ThreadPoolExecutor
+import batch_generator as bg
+from datetime import datetime, timedelta
 
 # === CONFIGURACIÓN ===
 DB_PARAMS = {
@@ -13,39 +15,72 @@ DB_PARAMS = {
     "host": "localhost",
     "port": "5432"
 }
-BLOCK_SIZE = 100  # SOLO 100 VIDEOS
-FIREBASE_CRED_PATH = "./backend/firebase_credentials.json"
+BLOCK_SIZE = 100  # videos por página (keyset sobre video_id)
+WRITE_BATCH_LIMIT = 500  # máximo de escrituras por WriteBatch en Firestore
+SEED = 42  # mismo seed -> mismas interacciones
+FEED_SIZE = 100  # videos por documento de FeedCache (igual que backend/db/feed.py)
+COUNTER_DAYS = 7  # días de contadores CreatorStats/VideoStats (la ventana de analytics)
 
 # === INICIALIZACIÓN ===
 print("⚙️ Conectando a Firebase y PostgreSQL...")
-cred = credentials.Certificate(FIREBASE_CRED_PATH)
-firebase_admin.initialize_app(cred)
-fs_db = firestore.client()
+# Mismo cliente que el backend (credenciales, emulador o FIRESTORE_CLIENT_FACTORY)
+from backend.db import counters
+from backend.db.firebase import db as fs_db
 
 conn = psycopg2.connect(**DB_PARAMS)
 cur = conn.cursor()
 
-faker = Faker()
+rng = bg.make_rng(SEED)
+pools = bg.build_pools(SEED)
+YEAR_START, TODAY = bg.year_range()
 
 # === FUNCIONES FIRESTORE ===
 
-def clean_firestore():
+def iter_ref_pages(query, page_size=WRITE_BATCH_LIMIT):
+    # Páginas de referencias por ID de documento, sin descargar campos
+    query = query.select([]).order_by(gc_firestore.FieldPath.document_id()).limit(page_size)
+    last = None
+    while True:
+        docs = list((query.start_after(last) if last else query).stream())
+        if not docs:
+            return
+        yield [d.reference for d in docs]
+        last = docs[-1]
+
+def delete_refs(refs):
+    batch = fs_db.batch()
+    for ref in refs:
+        batch.delete(ref)
+    batch.commit()
+    return len(refs)
+
+def clean_firestore(workers=8):
     print("🧹 Limpiando Firestore...")
+    start = time.perf_counter()
+    deleted = 0
 
-    collections = ["Videos", "Reactions", "Views", "FeedCache"]
-    for col in collections:
-        docs = fs_db.collection(col).stream()
-        for doc in docs:
-            fs_db.collection(col).document(doc.id).delete()
+    # Primero las subcolecciones (collection group: Comments y los buckets Daily/Hourly de
+    # CreatorStats/VideoStats), luego las colecciones raíz
+    targets = [(group, fs_db.collection_group(group)) for group in ["Comments", *counters.GRANULARITIES]]
+    targets += [(col, fs_db.collection(col))
+                for col in ["Videos", "Reactions", "Views", "FeedCache", *counters.ROOTS]]
 
-    # Borrar subcolecciones Comments por video
-    video_docs = fs_db.collection("Videos").stream()
-    for doc in video_docs:
-        comments = fs_db.collection("Videos").document(doc.id).collection("Comments").stream()
-        for c in comments:
-            fs_db.collection("Videos").document(doc.id).collection("Comments").document(c.id).delete()
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for name, query in targets:
+            futures = []
+            for refs in iter_ref_pages(query):
+                in_flight.acquire()
+                future = executor.submit(delete_refs, refs)
+                future.add_done_callback(lambda _: in_flight.release())
+                futures.append(future)
+            col_deleted = sum(f.result() for f in futures)
+            deleted += col_deleted
+            elapsed = time.perf_counter() - start
+            print(f" - {name}: {col_deleted} documentos borrados ({deleted / elapsed if elapsed > 0 else 0:.0f} docs/s acumulado)")
 
-    print("✅ Firestore limpio.")
+    elapsed = time.perf_counter() - start
+    print(f"✅ Firestore limpio: {deleted} documentos en {elapsed:.2f} s.")
 
 def fetch_video_block(offset, limit):
     cur.execute("""
@@ -56,6 +91,17 @@ def fetch_video_block(offset, limit):
     """, (limit, offset))
     return cur.fetchall()
 
+def fetch_video_page(after_id, limit):
+    # Paginación keyset: cada página arranca después del último video_id leído
+    cur.execute("""
+        SELECT video_id, creator_id, title, description, duration, upload_datetime, visibility
+        FROM video
+        WHERE video_id > %s
+        ORDER BY video_id
+        LIMIT %s;
+    """, (after_id, limit))
+    return cur.fetchall()
+
 def get_all_users_and_videos():
     cur.execute("SELECT user_id FROM app_user WHERE role IN ('user', 'creator');")
     user_ids = [r[0] for r in cur.fetchall()]
@@ -64,95 +110,224 @@ def get_all_users_and_videos():
     return user_ids, video_ids
 
 def generate_comments(user_ids, count):
-    return [{
-        "user_id": random.choice(user_ids),
-        "text": faker.sentence(nb_words=12),
-        "timestamp": faker.date_time_this_year()
-    } for _ in range(count)]
+    return bg.records(
+        user_id=bg.choice(rng, user_ids, count),
+        text=bg.sentences(rng, pools, count, nb_words=12),
+        timestamp=bg.timestamps(rng, YEAR_START, TODAY, count)
+    )
 
 def generate_views(user_ids, video_id, count):
-    return [{
-        "user_id": random.choice(user_ids),
-        "video_id": str(video_id),
-        "watch_time_sec": random.randint(5, 300),
-        "timestamp": faker.date_time_this_year()
-    } for _ in range(count)]
+    return bg.records(
+        user_id=bg.choice(rng, user_ids, count),
+        video_id=[str(video_id)] * count,
+        watch_time_sec=bg.integers(rng, 5, 300, count),
+        timestamp=bg.timestamps(rng, YEAR_START, TODAY, count)
+    )
 
 def generate_reactions(user_ids, video_id, count):
     types = ["like", "love", "laugh", "angry"]
-    return [{
-        "user_id": random.choice(user_ids),
-        "video_id": str(video_id),
-        "type": random.choice(types),
-        "timestamp": faker.date_time_this_year()
-    } for _ in range(count)]
-
-def populate_feed_cache(user_ids, video_ids):
-    print("🌀 Generando FeedCache por usuario...")
-    for uid in user_ids:
-        rec = random.sample(video_ids, k=min(20, len(video_ids)))
-        fs_db.collection("FeedCache").document(str(uid)).set({
-            "videos": [str(v) for v in rec],
+    return bg.records(
+        user_id=bg.choice(rng, user_ids, count),
+        video_id=[str(video_id)] * count,
+        type=bg.choice(rng, types, count),
+        timestamp=bg.timestamps(rng, YEAR_START, TODAY, count)
+    )
+
+def populate_feed_cache(workers):
+    # Backfill de FeedCache desde follow: últimos FEED_SIZE videos visibles de los creadores seguidos.
+    # Los creadores de feed_celebrity se omiten (el backend mezcla sus videos al leer el feed).
+    print("🌀 Generando FeedCache desde follow...")
+    feed_cur = conn.cursor(name="feed_backfill")
+    feed_cur.itersize = 10000
+    feed_cur.execute("""
+        SELECT f.follower_id, r.video_id
+        FROM follow f
+        CROSS JOIN LATERAL (
+            SELECT v.video_id
+            FROM video v
+            WHERE v.creator_id = f.followed_id AND v.visibility <> 'private'
+            ORDER BY v.video_id DESC
+            LIMIT %s
+        ) r
+        WHERE f.followed_id NOT IN (SELECT creator_id FROM feed_celebrity)
+        ORDER BY f.follower_id, r.video_id DESC
+    """, (FEED_SIZE,))
+
+    feeds = 0
+    writes = []
+    futures = []
+    in_flight = threading.BoundedSemaphore(workers * 2)
+
+    def add_feed(user_id, videos):
+        writes.append((fs_db.collection("FeedCache").document(str(user_id)), {
+            "videos": [str(v) for v in videos],
             "updated_at": datetime.now()
-        })
+        }))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit():
+            in_flight.acquire()
+            future = executor.submit(commit_writes, writes[:])
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+            writes.clear()
+
+        current, videos = None, []
+        for follower_id, video_id in feed_cur:
+            if follower_id != current:
+                if videos:
+                    add_feed(current, videos)
+                    feeds += 1
+                    if len(writes) >= WRITE_BATCH_LIMIT:
+                        submit()
+                current, videos = follower_id, []
+            if len(videos) < FEED_SIZE:
+                videos.append(video_id)
+        if videos:
+            add_feed(current, videos)
+            feeds += 1
+        if writes:
+            submit()
+        sum(f.result() for f in futures)
+    feed_cur.close()
+    print(f"✅ FeedCache: {feeds} feeds escritos.")
+
+def video_to_doc(v):
+    return {
+        "creator_id": v[1],
+        "title": v[2],
+        "description": v[3],
+        "duration": v[4],
+        "upload_datetime": v[5],
+        "visibility": v[6],
+    }
+
+def build_video_writes(user_ids, v):
+    # Documento del video + sus interacciones como (doc_ref, data) con IDs generados localmente
+    video_id = str(v[0])
+    video_ref = fs_db.collection("Videos").document(video_id)
+    writes = [(video_ref, video_to_doc(v))]
+    writes += [(video_ref.collection("Comments").document(), c)
+               for c in generate_comments(user_ids, int(rng.integers(0, 151)))]
+    reactions = generate_reactions(user_ids, video_id, int(rng.integers(0, 151)))
+    views = generate_views(user_ids, video_id, int(rng.integers(0, 151)))
+    writes += [(fs_db.collection("Reactions").document(), r) for r in reactions]
+    writes += [(fs_db.collection("Views").document(), vw) for vw in views]
+    return writes
+
+def commit_writes(writes):
+    batch = fs_db.batch()
+    for ref, data in writes:
+        batch.set(ref, data)
+    batch.commit()
+    return len(writes)
+
+def populate_sequential(user_ids, limit):
+    # Modo original: una RPC por documento (referencia para comparar)
+    written = 0
+    for idx, v in enumerate(fetch_video_block(0, limit), 1):
+        for ref, data in build_video_writes(user_ids, v):
+            ref.set(data)
+            written += 1
+        print(f"✅ {idx}/{limit} Video {v[0]} poblado.")
+    return written
+
+def populate_batched(user_ids, max_videos, page_size, workers):
+    # Lotes de hasta 500 escrituras; varios lotes en vuelo a la vez en el pool
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    futures = []
+    pending = []
+    last_id, videos_done = 0, 0
+
+    def submit(writes):
+        in_flight.acquire()
+        future = executor.submit(commit_writes, writes)
+        future.add_done_callback(lambda _: in_flight.release())
+        futures.append(future)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while max_videos is None or videos_done < max_videos:
+            limit = page_size if max_videos is None else min(page_size, max_videos - videos_done)
+            page = fetch_video_page(last_id, limit)
+            if not page:
+                break
+            for v in page:
+                pending += build_video_writes(user_ids, v)
+                while len(pending) >= WRITE_BATCH_LIMIT:
+                    submit(pending[:WRITE_BATCH_LIMIT])
+                    pending = pending[WRITE_BATCH_LIMIT:]
+            last_id = page[-1][0]
+            videos_done += len(page)
+            print(f"> {videos_done} videos encolados (último video_id {last_id})...")
+        if pending:
+            submit(pending)
+    return sum(f.result() for f in futures)
+
+def fetch_video_creators(video_ids):
+    cur.execute("SELECT video_id, creator_id FROM video WHERE video_id = ANY(%s);",
+                ([int(v) for v in video_ids if v.isdigit()],))
+    return {str(video_id): creator_id for video_id, creator_id in cur.fetchall()}
+
+def populate_counters(days):
+    # Contadores de los últimos `days` días con counters.reconcile, a partir de lo que ya está en
+    # Views/Reactions: mismos buckets que el backend, solo la ventana consultada, y corrige los
+    # shards existentes en lugar de pisarlos cuando se pobla sin --clean
+    since = TODAY - timedelta(days=days)
+    print(f"🌀 Reconciliando contadores CreatorStats/VideoStats desde {since:%Y-%m-%d}...")
+    events = counters.load_events(since)
+    creators = fetch_video_creators({video_id for video_id, _, _ in events})
+    summary = counters.reconcile(since, events, creators)
+    print(f"✅ Contadores: {summary['events']} eventos, {summary['buckets_corrected']} buckets escritos.")
 
 # === EJECUCIÓN PRINCIPAL ===
 
-try:
-    #clean_firestore()
-    user_ids, all_video_ids = get_all_users_and_videos()
-    offset = 0
-
-    print(f"🚀 Poblando Firestore por bloques de {BLOCK_SIZE} videos...")
-    videos = fetch_video_block(offset, BLOCK_SIZE)
-    if not videos:
-        print("⚠️ No se encontraron videos en la base de datos para poblar.")
-    else:
-        for idx, v in enumerate(videos, 1):
-            video_id = str(v[0])
-            video_doc = {
-                "creator_id": v[1],
-                "title": v[2],
-                "description": v[3],
-                "duration": v[4],
-                "upload_datetime": v[5],
-                "visibility": v[6],
-            }
-
-            # Video document
-            fs_db.collection("Videos").document(video_id).set(video_doc)
-
-            # Número aleatorio controlado entre 100 y 200 por tipo
-            comment_count = random.randint(0, 150)
-            view_count = random.randint(0, 150)
-            reaction_count = random.randint(0, 150)
-
-            # Subcolección de comentarios
-            comments = generate_comments(user_ids, comment_count)
-            for c in comments:
-                fs_db.collection("Videos").document(video_id).collection("Comments").add(c)
-
-            # Reactions
-            reactions = generate_reactions(user_ids, video_id, reaction_count)
-            for r in reactions:
-                fs_db.collection("Reactions").add(r)
-
-            # Views
-            views = generate_views(user_ids, video_id, view_count)
-            for vw in views:
-                fs_db.collection("Views").add(vw)
-
-            print(f"✅ {idx}/{BLOCK_SIZE} Video {video_id} poblado con {comment_count} comentarios, {reaction_count} reacciones y {view_count} vistas.")
-
-    # FeedCache por usuario
-    #populate_feed_cache(user_ids, all_video_ids)
-
-    print("✅ Firestore completamente poblado con 100 videos y carga controlada de interacciones.")
-
-except Exception as e:
-    print("❌ Error durante la ejecución:", e)
-    print("🛑 Operación abortada. Firestore puede quedar parcialmente poblado.")
-finally:
-    cur.close()
-    conn.close()
-    print("🔒 Conexión cerrada.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pobla Firestore a partir de los videos de PostgreSQL.")
+    parser.add_argument("--mode", choices=["batched", "sequential"], default="batched")
+    parser.add_argument("--videos", type=int, default=None, help="Máximo de videos (por defecto todos en modo batched)")
+    parser.add_argument("--page-size", type=int, default=BLOCK_SIZE)
+    parser.add_argument("--workers", type=int, default=8, help="Lotes confirmados en paralelo")
+    parser.add_argument("--clean", action="store_true", help="Borra Firestore antes de poblar")
+    parser.add_argument("--clean-only", action="store_true", help="Solo borra Firestore")
+    parser.add_argument("--counter-days", type=int, default=COUNTER_DAYS,
+                        help="Días de contadores CreatorStats/VideoStats a reconstruir")
+    parser.add_argument("--feeds", action="store_true", help="Reconstruye FeedCache a partir de follow")
+    parser.add_argument("--seed", type=int, default=None,
+                        help=f"Semilla de las interacciones (por defecto {SEED}); con seed explícito la fecha de "
+                             "referencia queda fija")
+    parser.add_argument("--anchor-date", type=bg.parse_anchor, default=None,
+                        help="Fin de la ventana de timestamps, YYYY-MM-DD o 'today' (por defecto hoy, fija con --seed)")
+    args = parser.parse_args()
+    YEAR_START, TODAY = bg.year_range(bg.resolve_anchor(args.anchor_date, seeded=args.seed is not None))
+    if args.seed is not None:
+        rng = bg.make_rng(args.seed)
+        pools = bg.build_pools(args.seed)
+
+    try:
+        if args.clean or args.clean_only:
+            clean_firestore(args.workers)
+        if not args.clean_only:
+            user_ids, all_video_ids = get_all_users_and_videos()
+            if not all_video_ids:
+                print("⚠️ No se encontraron videos en la base de datos para poblar.")
+            else:
+                print(f"🚀 Poblando Firestore (modo {args.mode})...")
+                start = time.perf_counter()
+                if args.mode == "sequential":
+                    written = populate_sequential(user_ids, args.videos or BLOCK_SIZE)
+                else:
+                    written = populate_batched(user_ids, args.videos, args.page_size, args.workers)
+                elapsed = time.perf_counter() - start
+                print(f"✅ {written} documentos escritos en {elapsed:.2f} s ({written / elapsed if elapsed > 0 else 0:.0f} docs/s).")
+                populate_counters(args.counter_days)
+
+            if args.feeds:
+                populate_feed_cache(args.workers)
+
+    except Exception as e:
+        print("❌ Error durante la ejecución:", e)
+        print("🛑 Operación abortada. Firestore puede quedar parcialmente poblado.")
+    finally:
+        cur.close()
+        conn.close()
+        print("🔒 Conexión cerrada.")
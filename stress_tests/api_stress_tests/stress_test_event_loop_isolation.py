@@ -0,0 +1,106 @@
+import asyncio
+import sys
+import time
+import httpx
+
+# Comprueba que la latencia de un endpoint solo-PostgreSQL no se degrada
+# mientras se satura un endpoint pesado en Firestore (event loop no bloqueado).
+# firebase-insert-views solo encola en el buffer write-behind: la escritura real la hace el
+# flusher en segundo plano. La medición con carga empieza cuando el buffer tiene cola y se
+# comprueba en /admin/write-behind que el flusher escribió en Firestore durante la medición;
+# al final se espera a que el buffer se vacíe.
+BASE_URL = "http://localhost:8000/api"
+PG_ENDPOINT = ("GET", "/requirements/search-videos", {"keyword": "music"})
+FIRESTORE_ENDPOINT = ("POST", "/test-bigdata/firebase-insert-views", {"batch_size": 1000})
+WRITE_BEHIND_STATS = "/admin/write-behind"
+BACKLOG_TIMEOUT_SEC = 30
+DRAIN_TIMEOUT_SEC = 300
+
+PG_REQUESTS = 300
+PG_CONCURRENCY = 10
+FIRESTORE_CONCURRENCY = 20
+MAX_P99_RATIO = 2.0  # p99 bajo carga / p99 base
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def measure_pg(client):
+    method, path, params = PG_ENDPOINT
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(PG_REQUESTS):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            await client.request(method, path, params=params)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(PG_CONCURRENCY)))
+    return latencies
+
+
+async def hammer_firestore(client, stop):
+    method, path, params = FIRESTORE_ENDPOINT
+    while not stop.is_set():
+        try:
+            await client.request(method, path, params=params)
+        except httpx.HTTPError:
+            pass
+
+
+async def write_behind_stats(client):
+    return (await client.get(WRITE_BEHIND_STATS)).json()
+
+
+async def wait_for(client, condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = await write_behind_stats(client)
+        if condition(stats):
+            return stats
+        await asyncio.sleep(0.5)
+    return None
+
+
+async def main():
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=120) as client:
+        baseline = await measure_pg(client)
+
+        stop = asyncio.Event()
+        hammers = [asyncio.create_task(hammer_firestore(client, stop)) for _ in range(FIRESTORE_CONCURRENCY)]
+        # Medir solo con el flusher ocupado escribiendo en Firestore
+        if await wait_for(client, lambda s: s["pending"] > 0, BACKLOG_TIMEOUT_SEC) is None:
+            print("⚠️ El buffer write-behind no acumuló cola: la carga de Firestore no llega a saturarlo.")
+        before = await write_behind_stats(client)
+        loaded = await measure_pg(client)
+        after = await write_behind_stats(client)
+        stop.set()
+        await asyncio.gather(*hammers)
+        drained = await wait_for(client, lambda s: s["pending"] == 0, DRAIN_TIMEOUT_SEC)
+
+    for label, values in (("baseline", baseline), ("firestore load", loaded)):
+        print(f"{label:<16} p50={percentile(values, 50):8.2f} ms  p99={percentile(values, 99):8.2f} ms")
+    written = after["flushed"] - before["flushed"]
+    print(f"Firestore: {written} documentos escritos durante la medición ({after['batches'] - before['batches']} lotes)")
+    if drained is None:
+        print(f"⚠️ El buffer write-behind no se vació en {DRAIN_TIMEOUT_SEC} s.")
+    if written == 0:
+        print("❌ No hubo escrituras en Firestore durante la medición: la prueba no es válida.")
+        sys.exit(1)
+
+    ratio = percentile(loaded, 99) / percentile(baseline, 99)
+    print(f"p99 ratio: {ratio:.2f} (max {MAX_P99_RATIO})")
+    if ratio > MAX_P99_RATIO:
+        print("❌ La latencia de PostgreSQL se degrada bajo carga de Firestore.")
+        sys.exit(1)
+    print("✅ Latencia de PostgreSQL estable bajo carga de Firestore.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(".")
+from backend.db.firebase import db
+from backend.db import firestore_queries as fsq
+
+# Compara streaming de documentos completos vs proyección vs agregación en servidor
+# Ejecutar desde la raíz del proyecto: python stress_tests/firebase_stress_tests/stress_test_firebase_aggregation.py <video_id>
+RUNS = 5
+
+
+def run(label, fn):
+    times, transferred, count = [], 0, 0
+    for _ in range(RUNS):
+        result = fn()
+        times.append(result["time_ms"])
+        transferred = result["bytes_transferred_approx"]
+        count = result.get("count", result.get("values", {}).get("count"))
+    times.sort()
+    print(f"{label:<28} n={count:<8} median={times[len(times) // 2]:>9.2f} ms  max={times[-1]:>9.2f} ms  bytes≈{transferred}")
+
+
+def compare(video_id):
+    by_video = db.collection("Views").where("video_id", "==", video_id)
+    last_week = db.collection("Views").where("timestamp", ">=", datetime.utcnow() - timedelta(days=7))
+
+    print(f"📊 Views del video {video_id}")
+    run("full documents", lambda: fsq.fetch(by_video, collect=False))
+    run("projection (user_id)", lambda: fsq.fetch(by_video, fields=["user_id"], collect=False))
+    run("count() + avg()", lambda: fsq.aggregate(by_video, avgs=["watch_time_sec"]))
+
+    print("📊 Views de los últimos 7 días")
+    run("full documents", lambda: fsq.fetch(last_week, collect=False))
+    run("count()", lambda: fsq.aggregate(last_week))
+
+
+if __name__ == "__main__":
+    start = time.time()
+    compare(sys.argv[1] if len(sys.argv) > 1 else "150002")
+    print(f"✅ Comparación completada en {round(time.time() - start, 2)} seconds.")
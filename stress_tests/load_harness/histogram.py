@@ -0,0 +1,89 @@
+import math
+
+# Histograma HDR (High Dynamic Range) de latencias en microsegundos: buckets log-lineales
+# con SUB_BUCKET_BITS bits de precisión (error relativo < 2^-SUB_BUCKET_BITS, ~0.05%),
+# memoria acotada sin importar cuántas muestras se registren, y fusionable entre corridas.
+SUB_BUCKET_BITS = 11
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+
+def bucket_of(value):
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+    return shift, value >> shift
+
+
+def bucket_value(shift, sub):
+    # Valor representativo del bucket: su punto medio
+    return (sub << shift) + ((1 << shift) >> 1)
+
+
+class HdrHistogram:
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.sum = 0
+
+    def record(self, value_us, count=1):
+        value = max(0, int(value_us))
+        key = bucket_of(value)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.total += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        if other.total:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, p):
+        if not self.total:
+            return None
+        rank = max(1, math.ceil(self.total * p / 100))
+        seen = 0
+        for shift, sub in sorted(self.counts, key=lambda k: k[1] << k[0]):
+            seen += self.counts[(shift, sub)]
+            if seen >= rank:
+                return min(bucket_value(shift, sub), self.max)
+        return self.max
+
+    def mean(self):
+        return self.sum / self.total if self.total else None
+
+    def summary_ms(self):
+        ms = lambda v: round(v / 1000, 3) if v is not None else None
+        return {
+            "count": self.total,
+            "min_ms": ms(self.min),
+            "mean_ms": ms(self.mean()),
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+            "p999_ms": ms(self.percentile(99.9)),
+            "max_ms": ms(self.max),
+        }
+
+    def to_dict(self):
+        return {
+            "sub_bucket_bits": SUB_BUCKET_BITS,
+            "buckets": [[shift, sub, count] for (shift, sub), count in sorted(self.counts.items())],
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls()
+        hist.counts = {(shift, sub): count for shift, sub, count in data["buckets"]}
+        hist.total, hist.sum, hist.min, hist.max = data["total"], data["sum"], data["min"], data["max"]
+        return hist
@@ -0,0 +1,77 @@
+import csv
+import json
+
+# Exportación de resultados (JSON completo con histogramas, CSV resumido) y comparación
+# entre dos corridas del mismo escenario para detectar regresiones.
+CSV_FIELDS = ["stage", "target", "count", "errors", "dropped", "error_rate", "throughput_rps",
+              "mean_ms", "p50_ms", "p95_ms", "p99_ms", "p999_ms", "max_ms"]
+
+# Tolerancias por defecto: latencia +10%, throughput -10%, tasa de error +1 punto porcentual
+DEFAULT_TOLERANCES = {"latency": 0.10, "throughput": 0.10, "error_rate": 0.01}
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms", "p999_ms")
+
+
+def write_json(run, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2, default=str)
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def rows(run):
+    for stage in run["stages"]:
+        yield {"stage": stage["name"], "target": "*", **stage["total"]}
+        for target, summary in stage["targets"].items():
+            yield {"stage": stage["name"], "target": target, **summary}
+
+
+def write_csv(run, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows(run))
+
+
+def compare(baseline, current, tolerances=DEFAULT_TOLERANCES):
+    # Devuelve una fila por (etapa, objetivo, métrica) presente en ambas corridas
+    base = {(r["stage"], r["target"]): r for r in rows(baseline)}
+    findings = []
+    for row in rows(current):
+        key = (row["stage"], row["target"])
+        if key not in base:
+            continue
+        old = base[key]
+        checks = [(m, old.get(m), row.get(m), "higher", tolerances["latency"]) for m in LATENCY_METRICS]
+        checks.append(("throughput_rps", old.get("throughput_rps"), row.get("throughput_rps"), "lower", tolerances["throughput"]))
+        checks.append(("error_rate", old.get("error_rate"), row.get("error_rate"), "abs", tolerances["error_rate"]))
+        for metric, before, after, direction, tolerance in checks:
+            if before is None or after is None:
+                continue
+            if direction == "abs":
+                change = after - before
+                regressed = change > tolerance
+            else:
+                change = (after - before) / before if before else 0.0
+                regressed = change > tolerance if direction == "higher" else change < -tolerance
+            findings.append({
+                "stage": key[0], "target": key[1], "metric": metric,
+                "baseline": before, "current": after, "change": round(change, 4), "regression": regressed,
+            })
+    return findings
+
+
+def print_comparison(findings):
+    print(f"{'stage':<16}{'target':<24}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}")
+    for f in findings:
+        change = f"{f['change']:+.2%}" if f["metric"] != "error_rate" else f"{f['change']:+.4f}"
+        flag = "  ❌" if f["regression"] else ""
+        print(f"{f['stage']:<16}{f['target']:<24}{f['metric']:<16}{f['baseline']:>12}{f['current']:>12}{change:>10}{flag}")
+    regressions = [f for f in findings if f["regression"]]
+    if regressions:
+        print(f"❌ {len(regressions)} regresiones respecto a la corrida base.")
+    else:
+        print("✅ Sin regresiones respecto a la corrida base.")
+    return regressions
@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+sys.path.append(".")
+from stress_tests.load_harness import report
+from stress_tests.load_harness.runner import DEFAULT_MAX_IN_FLIGHT, Mix, run_stages
+from stress_tests.load_harness.targets import Resources, build_target
+
+# Arnés de carga por etapas contra los endpoints de FastAPI y las bases de datos.
+# Ejecutar desde la raíz del proyecto:
+#   python -m stress_tests.load_harness.run run stress_tests/load_harness/scenarios/api_mix.json
+#   python -m stress_tests.load_harness.run compare results/base.json results/new.json
+DEFAULT_BASE_URL = "http://localhost:8000/api"
+DEFAULT_POOL_SIZE = 20
+RESULTS_DIR = "stress_tests/load_harness/results"
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def max_concurrency(stages):
+    # Peticiones simultáneas posibles: usuarios en closed loop, tope en vuelo en open loop
+    return max(s["concurrency"] if "concurrency" in s else s.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT) for s in stages)
+
+
+async def run_scenario(scenario, base_url):
+    stages = scenario["stages"]
+    resources = Resources(
+        scenario.get("base_url", base_url),
+        max_concurrency(stages),
+        scenario.get("pool_size", DEFAULT_POOL_SIZE),
+    )
+    await resources.open({t["kind"] for t in scenario["targets"]})
+    try:
+        targets = [build_target(spec, resources) for spec in scenario["targets"]]
+        mix = Mix(targets, [spec.get("weight", 1) for spec in scenario["targets"]])
+        started_at = datetime.now()
+        results = await run_stages(stages, mix)
+    finally:
+        await resources.close()
+    return {
+        "scenario": scenario["name"],
+        "commit": git_commit(),
+        "started_at": started_at.isoformat(),
+        "stages": results,
+    }
+
+
+def cmd_run(args):
+    with open(args.scenario, encoding="utf-8") as f:
+        scenario = json.load(f)
+    run = asyncio.run(run_scenario(scenario, args.base_url))
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    stem = os.path.join(args.out_dir, f"{scenario['name']}_{run['started_at'][:19].replace(':', '')}_{run['commit'] or 'nogit'}")
+    report.write_json(run, stem + ".json")
+    report.write_csv(run, stem + ".csv")
+    print(f"💾 Resultados en {stem}.json / .csv")
+
+    if args.baseline:
+        regressions = report.print_comparison(report.compare(report.load_json(args.baseline), run, tolerances(args)))
+        sys.exit(1 if regressions else 0)
+
+
+def cmd_compare(args):
+    findings = report.compare(report.load_json(args.baseline), report.load_json(args.current), tolerances(args))
+    sys.exit(1 if report.print_comparison(findings) else 0)
+
+
+def tolerances(args):
+    return {"latency": args.latency_tolerance, "throughput": args.throughput_tolerance, "error_rate": args.error_tolerance}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arnés de carga por etapas con histogramas HDR.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_tolerances(p):
+        p.add_argument("--latency-tolerance", type=float, default=report.DEFAULT_TOLERANCES["latency"])
+        p.add_argument("--throughput-tolerance", type=float, default=report.DEFAULT_TOLERANCES["throughput"])
+        p.add_argument("--error-tolerance", type=float, default=report.DEFAULT_TOLERANCES["error_rate"])
+
+    run_parser = sub.add_parser("run", help="Ejecuta un escenario")
+    run_parser.add_argument("scenario", help="Archivo JSON del escenario")
+    run_parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    run_parser.add_argument("--out-dir", default=RESULTS_DIR)
+    run_parser.add_argument("--baseline", help="Corrida previa (JSON) con la que comparar al terminar")
+    add_tolerances(run_parser)
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = sub.add_parser("compare", help="Compara dos corridas y marca regresiones")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    add_tolerances(compare_parser)
+    compare_parser.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import asyncio
+import random
+import time
+from stress_tests.load_harness.histogram import HdrHistogram
+
+# Ejecución por etapas de un escenario:
+#   - closed loop ("concurrency"): N usuarios virtuales encadenan peticiones sin pausa
+#   - open loop ("rate"): llegadas a ritmo fijo en peticiones/s, terminen o no las anteriores;
+#     la latencia se mide desde el instante programado (sin coordinated omission)
+# Con "ramp": true el nivel sube linealmente desde el de la etapa anterior durante la etapa.
+CONTROL_INTERVAL_SEC = 0.1
+DEFAULT_MAX_IN_FLIGHT = 1000
+MAX_ERROR_SAMPLES = 5
+
+
+class TargetStats:
+    def __init__(self):
+        self.histogram = HdrHistogram()
+        self.errors = 0
+        self.dropped = 0
+        self.error_samples = []
+
+    def record(self, latency_us, error=None):
+        self.histogram.record(latency_us)
+        if error is not None:
+            self.errors += 1
+            if len(self.error_samples) < MAX_ERROR_SAMPLES:
+                self.error_samples.append(f"{type(error).__name__}: {error}"[:300])
+
+    def summary(self, elapsed):
+        completed = self.histogram.total
+        return {
+            **self.histogram.summary_ms(),
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "error_rate": round(self.errors / completed, 5) if completed else None,
+            "throughput_rps": round((completed - self.errors) / elapsed, 2) if elapsed > 0 else None,
+            "error_samples": self.error_samples,
+            "histogram": self.histogram.to_dict(),
+        }
+
+
+class Mix:
+    # Elige el objetivo de cada petición según su peso
+    def __init__(self, targets, weights):
+        self.targets = targets
+        self.weights = weights
+
+    def pick(self):
+        return random.choices(self.targets, weights=self.weights)[0]
+
+
+async def timed_call(target, stats, intended_start):
+    error = None
+    try:
+        await target.call()
+    except Exception as e:
+        error = e
+    stats[target.name].record((time.perf_counter() - intended_start) * 1_000_000, error)
+
+
+def level_at(stage, previous, elapsed):
+    # La primera etapa con rampa arranca desde 1 (usuario o petición/s)
+    target = stage.get("rate", stage.get("concurrency"))
+    if not stage.get("ramp"):
+        return target
+    origin = previous if previous is not None else 1
+    return origin + (target - origin) * min(1.0, elapsed / stage["duration_sec"])
+
+
+async def run_closed(stage, previous, mix, stats):
+    start = time.perf_counter()
+    deadline = start + stage["duration_sec"]
+    active = 0
+    workers = []
+
+    async def user(index):
+        # Cada usuario virtual termina si la rampa baja de su índice
+        while time.perf_counter() < deadline and index < active:
+            await timed_call(mix.pick(), stats, time.perf_counter())
+
+    while time.perf_counter() < deadline:
+        active = max(1, round(level_at(stage, previous, time.perf_counter() - start)))
+        while len(workers) < active:
+            workers.append(asyncio.create_task(user(len(workers))))
+        await asyncio.sleep(CONTROL_INTERVAL_SEC)
+    await asyncio.gather(*workers)
+    return time.perf_counter() - start
+
+
+async def run_open(stage, previous, mix, stats):
+    start = time.perf_counter()
+    deadline = start + stage["duration_sec"]
+    max_in_flight = stage.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT)
+    in_flight = set()
+    next_at = start
+    while next_at < deadline:
+        now = time.perf_counter()
+        while next_at <= now and next_at < deadline:
+            target = mix.pick()
+            if len(in_flight) >= max_in_flight:
+                # Sistema saturado: la llegada se descarta y se cuenta aparte
+                stats[target.name].dropped += 1
+            else:
+                task = asyncio.create_task(timed_call(target, stats, next_at))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            next_at += 1.0 / max(level_at(stage, previous, next_at - start), 0.001)
+        await asyncio.sleep(max(0.0, min(next_at, deadline) - time.perf_counter()))
+    await asyncio.gather(*in_flight)
+    return time.perf_counter() - start
+
+
+async def run_stages(stages, mix):
+    results = []
+    previous = {"rate": None, "concurrency": None}
+    for index, stage in enumerate(stages):
+        mode = "open" if "rate" in stage else "closed"
+        key = "rate" if mode == "open" else "concurrency"
+        name = stage.get("name", f"stage_{index + 1}")
+        print(f"▶️ {name}: {mode} loop, {key}={stage[key]}{' (ramp)' if stage.get('ramp') else ''}, {stage['duration_sec']} s")
+
+        stats = {t.name: TargetStats() for t in mix.targets}
+        runner = run_open if mode == "open" else run_closed
+        elapsed = await runner(stage, previous[key], mix, stats)
+        previous[key] = stage[key]
+
+        total = HdrHistogram()
+        for s in stats.values():
+            total.merge(s.histogram)
+        errors = sum(s.errors for s in stats.values())
+        result = {
+            "name": name,
+            "mode": mode,
+            key: stage[key],
+            "ramp": bool(stage.get("ramp")),
+            "elapsed_sec": round(elapsed, 3),
+            "total": {
+                **total.summary_ms(),
+                "errors": errors,
+                "dropped": sum(s.dropped for s in stats.values()),
+                "error_rate": round(errors / total.total, 5) if total.total else None,
+                "throughput_rps": round((total.total - errors) / elapsed, 2) if elapsed > 0 else None,
+            },
+            "targets": {name: s.summary(elapsed) for name, s in stats.items()},
+        }
+        t = result["total"]
+        print(f"   {t['count']} peticiones, {t['throughput_rps']} req/s, errores {t['error_rate']}, "
+              f"p50={t['p50_ms']} p99={t['p99_ms']} p999={t['p999_ms']} ms")
+        results.append(result)
+    return results
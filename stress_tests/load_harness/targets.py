@@ -0,0 +1,172 @@
+import asyncio
+import os
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import asyncpg
+import httpx
+
+# Objetivos de carga: endpoints de FastAPI (httpx), PostgreSQL directo (pool de asyncpg)
+# y Firestore directo (SDK bloqueante en un pool de hilos). Cada objetivo expone
+# `async call()` que lanza una excepción si la petición falla.
+DB_CONFIG = {
+    'user': 'postgres',
+    'password': 'root',
+    'database': 'BD2-Project',
+    'host': 'localhost',
+    'port': '5432'
+}
+FIREBASE_CRED_PATH = "./backend/firebase_credentials.json"
+FIRESTORE_MAX_WORKERS = 64
+
+
+class RequestFailed(Exception):
+    pass
+
+
+def render(value):
+    # Valores dinámicos por petición: lista -> uno al azar; "$now", "$uuid", "$int:lo:hi"
+    if isinstance(value, list):
+        return render(random.choice(value))
+    if isinstance(value, dict):
+        return {k: render(v) for k, v in value.items()}
+    if isinstance(value, str) and value.startswith("$"):
+        if value == "$now":
+            return datetime.utcnow()
+        if value == "$uuid":
+            return uuid.uuid4().hex
+        if value.startswith("$int:"):
+            lo, hi = value.split(":")[1:]
+            return random.randint(int(lo), int(hi))
+    return value
+
+
+class HttpTarget:
+    def __init__(self, name, client, method, path, params=None, data=None):
+        self.name = name
+        self.client = client
+        self.method = method
+        self.path = path
+        self.params = params or {}
+        self.data = data
+
+    async def call(self):
+        response = await self.client.request(
+            self.method, self.path, params=render(self.params), data=render(self.data) if self.data else None
+        )
+        # Los handlers devuelven 200 con {"error": ...} ante fallos: también cuenta como error
+        if response.status_code >= 400 or response.content.startswith(b'{"error"'):
+            raise RequestFailed(f"{response.status_code}: {response.text[:200]}")
+
+
+class PostgresTarget:
+    def __init__(self, name, pool, sql, args=None):
+        self.name = name
+        self.pool = pool
+        self.sql = sql
+        self.args = args or []
+
+    async def call(self):
+        async with self.pool.acquire() as conn:
+            await conn.fetch(self.sql, *(render(a) for a in self.args))
+
+
+class FirestoreTarget:
+    # op: query (collection + where/limit, consume el stream), get (documento) o batch_write
+    def __init__(self, name, resources, op, collection, where=None, limit=None, document=None,
+                 data=None, count=1):
+        self.name = name
+        self.resources = resources
+        self.op = op
+        self.collection = collection
+        self.where = where or []
+        self.limit = limit
+        self.document = document
+        self.data = data or {}
+        self.count = count
+
+    def _run(self):
+        db = self.resources.firestore()
+        col = db.collection(self.collection)
+        if self.op == "get":
+            col.document(str(render(self.document))).get()
+        elif self.op == "query":
+            query = col
+            for field, op, value in self.where:
+                query = query.where(field, op, render(value))
+            if self.limit:
+                query = query.limit(self.limit)
+            for _ in query.stream():
+                pass
+        elif self.op == "batch_write":
+            for offset in range(0, self.count, 500):
+                batch = db.batch()
+                for _ in range(min(500, self.count - offset)):
+                    batch.set(col.document(), render(self.data))
+                batch.commit()
+        else:
+            raise ValueError(f"Unknown Firestore op: {self.op}")
+
+    async def call(self):
+        await asyncio.get_running_loop().run_in_executor(self.resources.executor, self._run)
+
+
+class Resources:
+    # Clientes compartidos por todos los objetivos de un escenario, creados solo si se usan
+    def __init__(self, base_url, max_concurrency, pool_size):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.http = None
+        self.pg_pool = None
+        self.executor = None
+        self._firestore = None
+        self._firestore_lock = threading.Lock()
+
+    async def open(self, kinds):
+        if "http" in kinds:
+            limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+            self.http = httpx.AsyncClient(base_url=self.base_url, timeout=120, limits=limits)
+        if "postgres" in kinds:
+            self.pg_pool = await asyncpg.create_pool(**DB_CONFIG, min_size=1, max_size=self.pool_size)
+        if "firestore" in kinds:
+            self.executor = ThreadPoolExecutor(
+                max_workers=min(self.max_concurrency, FIRESTORE_MAX_WORKERS), thread_name_prefix="firestore"
+            )
+
+    def firestore(self):
+        with self._firestore_lock:
+            if self._firestore is None:
+                if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+                    from google.cloud import firestore as gc_firestore
+                    self._firestore = gc_firestore.Client(project=os.environ.get("GCLOUD_PROJECT", "demo-bd2"))
+                else:
+                    import firebase_admin
+                    from firebase_admin import credentials, firestore
+                    firebase_admin.initialize_app(credentials.Certificate(FIREBASE_CRED_PATH))
+                    self._firestore = firestore.client()
+            return self._firestore
+
+    async def close(self):
+        if self.http:
+            await self.http.aclose()
+        if self.pg_pool:
+            await self.pg_pool.close()
+        if self.executor:
+            self.executor.shutdown(wait=True)
+
+
+def build_target(spec, resources):
+    kind = spec["kind"]
+    name = spec["name"]
+    if kind == "http":
+        return HttpTarget(name, resources.http, spec.get("method", "GET"), spec["path"],
+                          params=spec.get("params"), data=spec.get("data"))
+    if kind == "postgres":
+        return PostgresTarget(name, resources.pg_pool, spec["sql"], args=spec.get("args"))
+    if kind == "firestore":
+        options = {k: spec[k] for k in ("where", "limit", "document", "data", "count") if k in spec}
+        return FirestoreTarget(name, resources, spec["op"], spec["collection"], **options)
+    raise ValueError(f"Unknown target kind: {kind}")
@@ -0,0 +1,138 @@
+import asyncpg
+import asyncio
+import random
+import time
+
+# Compara campaign-analytics original (JOIN por advertiser_id: campañas × transacciones),
+# el agregado en vivo por campaign_id (fresh=true) y el resumen campaign_stats,
+# sobre tablas sintéticas de 2k campañas / 50k transacciones y 100x ese volumen.
+DB_CONFIG = {
+    'user': 'postgres',
+    'password': 'root',
+    'database': 'BD2-Project',
+    'host': 'localhost',
+    'port': '5432'
+}
+
+ADVERTISERS = 500
+SCALES = [(2_000, 50_000), (200_000, 5_000_000)]
+QUERIES_PER_PATH = 20
+
+FANOUT_SQL = """
+    SELECT c.campaign_id, c.budget, c.start_date, c.end_date,
+           COUNT(t.transaction_id) AS transactions,
+           SUM(t.amount) AS total_spent
+    FROM {campaign} c
+    LEFT JOIN {transaction} t ON t.advertiser_id = c.advertiser_id
+    WHERE c.advertiser_id = $1
+    GROUP BY c.campaign_id, c.budget, c.start_date, c.end_date
+"""
+
+FRESH_SQL = """
+    SELECT c.campaign_id, c.budget, c.start_date, c.end_date,
+           COUNT(t.transaction_id) AS transactions,
+           COALESCE(SUM(t.amount), 0) AS total_spent
+    FROM {campaign} c
+    LEFT JOIN {transaction} t ON t.campaign_id = c.campaign_id
+    WHERE c.advertiser_id = $1
+    GROUP BY c.campaign_id, c.budget, c.start_date, c.end_date
+    ORDER BY c.campaign_id
+"""
+
+ROLLUP_SQL = """
+    SELECT c.campaign_id, c.budget, c.start_date, c.end_date,
+           COALESCE(s.transactions, 0) AS transactions,
+           COALESCE(s.total_spent, 0) AS total_spent
+    FROM {campaign} c
+    LEFT JOIN {stats} s ON s.campaign_id = c.campaign_id
+    WHERE c.advertiser_id = $1
+    ORDER BY c.campaign_id
+"""
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def build_tables(conn, campaign, transaction, stats, campaigns, transactions):
+    # Mismas columnas e índices que campaign/transaction/campaign_stats (migrations/V003 y V006)
+    for table in (stats, transaction, campaign):
+        await conn.execute(f"DROP TABLE IF EXISTS {table}")
+    await conn.execute("SELECT setseed(0.42)")
+    await conn.execute(f"""
+        CREATE TABLE {campaign} AS
+        SELECT g AS campaign_id, 1 + g % {ADVERTISERS} AS advertiser_id,
+               round((100 + random() * 4900)::numeric, 2)::float AS budget,
+               CURRENT_DATE - (g % 365) AS start_date,
+               CURRENT_DATE - (g % 365) + 30 AS end_date
+        FROM generate_series(1, $1) AS g
+    """, campaigns)
+    await conn.execute(f"""
+        CREATE TABLE {transaction} AS
+        SELECT transaction_id, campaign_id, 1 + campaign_id % {ADVERTISERS} AS advertiser_id, amount
+        FROM (
+            SELECT g AS transaction_id, 1 + floor(random() * $2)::int AS campaign_id,
+                   round((0.99 + random() * 99)::numeric, 2)::float AS amount
+            FROM generate_series(1, $1) AS g
+        ) t
+    """, transactions, campaigns)
+
+    await conn.execute(f"CREATE INDEX ON {campaign} (advertiser_id)")
+    await conn.execute(f"CREATE INDEX ON {transaction} (advertiser_id) INCLUDE (amount)")
+    await conn.execute(f"CREATE INDEX ON {transaction} (campaign_id) INCLUDE (amount)")
+
+    start = time.perf_counter()
+    await conn.execute(f"""
+        CREATE TABLE {stats} AS
+        SELECT campaign_id, COUNT(*) AS transactions, SUM(amount) AS total_spent
+        FROM {transaction}
+        GROUP BY campaign_id
+    """)
+    await conn.execute(f"ALTER TABLE {stats} ADD PRIMARY KEY (campaign_id)")
+    rollup_ms = (time.perf_counter() - start) * 1000
+
+    for table in (campaign, transaction, stats):
+        await conn.execute(f"VACUUM ANALYZE {table}")
+    return rollup_ms
+
+
+async def time_path(conn, sql):
+    latencies = []
+    for i in range(QUERIES_PER_PATH):
+        advertiser_id = random.randint(1, ADVERTISERS)
+        start = time.perf_counter()
+        await conn.fetch(sql, advertiser_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentile(latencies, 50), percentile(latencies, 99)
+
+
+async def main():
+    conn = await asyncpg.connect(**DB_CONFIG)
+    try:
+        print(f"{'campaigns':>10}{'transactions':>14}  {'path':<22}{'p50 ms':>10}{'p99 ms':>10}")
+        for campaigns, transactions in SCALES:
+            tables = {
+                "campaign": f"bench_campaign_{campaigns}",
+                "transaction": f"bench_transaction_{transactions}",
+                "stats": f"bench_campaign_stats_{campaigns}",
+            }
+            print(f"⚙️ Construyendo {campaigns} campañas / {transactions} transacciones...")
+            rollup_ms = await build_tables(conn, *tables.values(), campaigns, transactions)
+            print(f"   campaign_stats reconstruida desde cero en {rollup_ms:.2f} ms")
+
+            results = [
+                ("advertiser join", await time_path(conn, FANOUT_SQL.format(**tables))),
+                ("fresh (campaign_id)", await time_path(conn, FRESH_SQL.format(**tables))),
+                ("campaign_stats", await time_path(conn, ROLLUP_SQL.format(**tables))),
+            ]
+            for path, (p50, p99) in results:
+                print(f"{campaigns:>10}{transactions:>14}  {path:<22}{p50:>10.2f}{p99:>10.2f}")
+            for table in ("stats", "transaction", "campaign"):
+                await conn.execute(f"DROP TABLE {tables[table]}")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
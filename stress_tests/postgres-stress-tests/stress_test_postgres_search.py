@@ -0,0 +1,102 @@
+import asyncpg
+import asyncio
+import random
+import sys
+import time
+
+sys.path.append(".")
+from backend.db.search import to_prefix_tsquery
+
+# Compara la búsqueda ILIKE original (seq scan) con trigramas y full-text
+# sobre copias de la tabla video de 100k, 1M y 10M filas.
+DB_CONFIG = {
+    'user': 'postgres',
+    'password': 'root',
+    'database': 'BD2-Project',
+    'host': 'localhost',
+    'port': '5432'
+}
+
+SCALES = [100_000, 1_000_000, 10_000_000]
+QUERIES_PER_PATH = 50
+KEYWORDS = ["music", "game", "travel", "food", "learn", "world", "daughter", "picture", "home", "movie"]
+
+ILIKE_SQL = """
+    SELECT video_id, title, description, upload_datetime
+    FROM {table}
+    WHERE title ILIKE $1 OR description ILIKE $1
+    ORDER BY upload_datetime DESC
+    LIMIT 20
+"""
+
+FULLTEXT_SQL = """
+    SELECT video_id, title, description, upload_datetime,
+           ts_rank_cd(search_vector, to_tsquery('english', $1)) AS rank
+    FROM {table}
+    WHERE search_vector @@ to_tsquery('english', $1)
+    ORDER BY rank DESC, video_id DESC
+    LIMIT 20
+"""
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def build_table(conn, table, rows):
+    # Réplica de video (con search_vector generado) multiplicando las filas existentes
+    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+    await conn.execute(f"""
+        CREATE TABLE {table} AS
+        SELECT row_number() OVER () AS video_id, v.title, v.description, v.upload_datetime
+        FROM generate_series(1, CEIL($1::numeric / (SELECT COUNT(*) FROM video))::int) AS g
+        CROSS JOIN video v
+        LIMIT $1
+    """, rows)
+    await conn.execute(f"""
+        ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED
+    """)
+    await conn.execute(f"ANALYZE {table}")
+
+
+async def time_path(conn, sql, args_for):
+    latencies = []
+    for i in range(QUERIES_PER_PATH):
+        keyword = random.choice(KEYWORDS)
+        start = time.perf_counter()
+        await conn.fetch(sql, args_for(keyword))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentile(latencies, 50), percentile(latencies, 99)
+
+
+async def main():
+    conn = await asyncpg.connect(**DB_CONFIG)
+    try:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        print(f"{'rows':>10}  {'path':<16}{'p50 ms':>10}{'p99 ms':>10}")
+        for rows in SCALES:
+            table = f"bench_video_{rows}"
+            print(f"⚙️ Construyendo {table}...")
+            await build_table(conn, table, rows)
+
+            results = [("ilike (seqscan)", await time_path(conn, ILIKE_SQL.format(table=table), lambda k: f"%{k}%"))]
+
+            await conn.execute(f"CREATE INDEX ON {table} USING GIN (title gin_trgm_ops)")
+            await conn.execute(f"CREATE INDEX ON {table} USING GIN (description gin_trgm_ops)")
+            await conn.execute(f"CREATE INDEX ON {table} USING GIN (search_vector)")
+            await conn.execute(f"ANALYZE {table}")
+            results.append(("ilike (trigram)", await time_path(conn, ILIKE_SQL.format(table=table), lambda k: f"%{k}%")))
+            results.append(("fulltext", await time_path(conn, FULLTEXT_SQL.format(table=table), to_prefix_tsquery)))
+
+            for path, (p50, p99) in results:
+                print(f"{rows:>10}  {path:<16}{p50:>10.2f}{p99:>10.2f}")
+            await conn.execute(f"DROP TABLE {table}")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())